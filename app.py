@@ -4,7 +4,15 @@ from functools import wraps
 import streamlit as st
 
 from app.auth_demo import handle_demo_login
-from app.backend_interface import run_pipeline
+from app.backend_interface import (
+    ClarificationRequested,
+    cancel_run,
+    new_run,
+    run_pipeline,
+)
+from app.progress import keep_alive, show_progress
+from app.uploads import clear_uploads, save_uploads
+from src.pipeline import RunCancelled
 
 # Page config
 st.set_page_config(page_title="Optimo.ai", page_icon="🔮", layout="wide")
@@ -99,6 +107,7 @@ def go_to_page(page_name):
 
 
 def logout_callback():
+    clear_uploads(st.session_state)
     st.session_state.authenticated = False
     st.session_state.username = ""
     go_to_page("logout_message")
@@ -255,9 +264,11 @@ def show_main():
 
         with col3:
             if st.button(" Reset Conversation"):
+                cancel_run(st.session_state)
                 st.session_state.messages = []
                 st.session_state.pipeline_prompt = ""
                 st.session_state.awaiting_clarification = False
+                st.session_state.expert_history = None
                 st.rerun()
 
     # CSS
@@ -339,6 +350,14 @@ def show_main():
         st.caption("Multi-agent optimization assistant")
         st.divider()
         st.markdown(f"👤 **{st.session_state.get('username', 'User')}**")
+        data_files = st.file_uploader(
+            "Attach data (CSV / Parquet)",
+            type=["csv", "parquet"],
+            accept_multiple_files=True,
+            help="Columns are passed to the model code as arrays; "
+            "only their schema is sent to the assistant.",
+            key="data_files",
+        )
         st.button(
             "Logout",
             on_click=lambda: st.session_state.update(
@@ -370,20 +389,28 @@ def show_main():
         with st.chat_message("user"):
             st.markdown(prompt)
 
+        history = None
         if st.session_state.awaiting_clarification:
-            full_prompt = f"{st.session_state.pipeline_prompt}\nClarifications:\n{prompt}"
+            # Continue the Expert's dialogue with just the answer
+            history = st.session_state.expert_history
             st.session_state.awaiting_clarification = False
         else:
-            full_prompt = prompt
             st.session_state.pipeline_prompt = prompt
 
         with st.chat_message("assistant"):
             message_placeholder = st.empty()
-            message_placeholder.markdown("Optimo is thinking…")
 
             try:
-                # Run the pipeline
-                response = run_pipeline(full_prompt)
+                # Run the pipeline, showing each stage as it finishes
+                with st.status("Optimo is thinking…") as progress:
+                    response = run_pipeline(
+                        prompt,
+                        save_uploads(data_files, st.session_state),
+                        on_event=show_progress(progress),
+                        history=history,
+                        cancel=new_run(st.session_state),
+                        on_idle=keep_alive(progress),
+                    )
 
                 if (
                     not response
@@ -391,9 +418,12 @@ def show_main():
                     or response.strip() == ""
                 ):
                     response = "Oops, that didn’t work. Try again."
-            except RuntimeError as e:
+            except ClarificationRequested as e:
                 response = f"Clarification needed:\n{str(e)}"
                 st.session_state.awaiting_clarification = True
+                st.session_state.expert_history = e.history
+            except RunCancelled as e:
+                response = str(e)
             except Exception as e:
                 import google
 
@@ -5,7 +5,11 @@ from functools import wraps
 
 import streamlit as st
 
-from .backend_interface import run_pipeline
+from src.pipeline import RunCancelled
+
+from .backend_interface import ClarificationRequested, new_run, run_pipeline
+from .progress import keep_alive, show_progress
+from .uploads import clear_uploads, save_uploads
 
 # Page config
 
@@ -105,6 +109,7 @@ def login_callback(username, password):
 
 
 def logout_callback():
+    clear_uploads(st.session_state)
     st.session_state.authenticated = False
     st.session_state.username = ""
     go_to_page("logout_message")
@@ -214,15 +219,17 @@ def show_main():
         st.caption("Multi-agent optimization assistant")
         st.divider()
         st.markdown(f"👤 **{st.session_state.username}**")
+        data_files = st.file_uploader(
+            "Attach data (CSV / Parquet)",
+            type=["csv", "parquet"],
+            accept_multiple_files=True,
+            help="Columns are passed to the model code as arrays; "
+            "only their schema is sent to the assistant.",
+            key="data_files",
+        )
         st.button(
             "Logout",
-            on_click=lambda: st.session_state.update(
-                {
-                    "authenticated": False,
-                    "username": "",
-                    "page": "logout_message",
-                }
-            ),
+            on_click=logout_callback,
         )
 
     # Base CSS
@@ -345,22 +352,34 @@ def show_main():
     st.markdown("</div>", unsafe_allow_html=True)
 
     # --- Pipeline runner ---
-    def _run_pipeline(prompt):
+    def _run_pipeline(prompt, history=None):
         logs = []
 
         try:
-            # spustenie pipeline
-            final_msg = run_pipeline(prompt)
+            # spustenie pipeline, priebeh zobrazujeme po etapách
+            with st.status("Optimo is thinking…") as progress:
+                final_msg = run_pipeline(
+                    prompt,
+                    save_uploads(data_files, st.session_state),
+                    on_event=show_progress(progress),
+                    history=history,
+                    cancel=new_run(st.session_state),
+                    on_idle=keep_alive(progress),
+                )
             # pridáme finálnu správu iba raz
             st.session_state.messages.append(
                 {"role": "assistant", "content": final_msg, "final": True}
             )
             logs.clear()
-        except RuntimeError as e:
+        except ClarificationRequested as e:
             # Expert potrebuje klarifikáciu
             st.session_state.awaiting_clarification = True
-            st.session_state.pipeline_prompt = prompt
             st.session_state.clarification_prompt = str(e)
+            st.session_state.expert_history = e.history
+        except RunCancelled as e:
+            st.session_state.messages.append(
+                {"role": "assistant", "content": str(e)}
+            )
 
     # --- Chat input ---
     if st.session_state.awaiting_clarification:
@@ -377,11 +396,8 @@ def show_main():
                     {"role": "user", "content": clar_input}
                 )
                 st.session_state.awaiting_clarification = False
-                updated_prompt = (
-                    st.session_state.pipeline_prompt
-                    + f"\nClarifications: {clar_input}\n"
-                )
-                _run_pipeline(updated_prompt)
+                # pokračujeme v dialógu s Expertom len s odpoveďou
+                _run_pipeline(clar_input, st.session_state.expert_history)
     else:
         prompt = st.chat_input("Ask Optimo…", key="chat_input")
         if prompt:
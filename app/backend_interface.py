@@ -1,19 +1,89 @@
-import asyncio
+from collections.abc import Callable, Iterator, MutableMapping
+from typing import Any
 
-from main_app import main as async_main
+from pydantic_ai.messages import ModelMessage
 
+from main_app import settings, stream
+from src.pipeline import (
+    CancelToken,
+    ClarificationNeeded,
+    PipelineEvent,
+    Validated,
+    get_runner,
+)
 
-def run_pipeline(prompt: str) -> str:
-    """Pomoc ."""
-    try:
-        loop = asyncio.get_event_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
 
-    if loop.is_running():
-        # Použijeme thread-safe future a počkáme na výsledok
-        future = asyncio.run_coroutine_threadsafe(async_main(prompt), loop)
-        return future.result()
-    else:
-        return loop.run_until_complete(async_main(prompt))
+class ClarificationRequested(RuntimeError):
+    """The Expert needs answers; pass ``history`` with them to resume."""
+
+    def __init__(self, event: ClarificationNeeded):
+        super().__init__(event.message)
+        self.questions = event.questions
+        self.history = event.history
+
+
+def new_run(state: MutableMapping[str, Any]) -> CancelToken:
+    """Cancel the session's previous run and return a token for the next."""
+    cancel_run(state, "superseded")
+    state["pipeline_cancel"] = token = CancelToken()
+    return token
+
+
+def cancel_run(state: MutableMapping[str, Any], reason: str = "reset") -> None:
+    """Cancel the run started with :func:`new_run`, if any."""
+    token = state.get("pipeline_cancel")
+    if token is not None:
+        token.cancel(reason)
+
+
+def stream_pipeline(
+    prompt: str,
+    data_files: list[str] | None = None,
+    history: list[ModelMessage] | None = None,
+    cancel: CancelToken | None = None,
+    on_idle: Callable[[], None] | None = None,
+) -> Iterator[PipelineEvent]:
+    """Yield pipeline events to synchronous callers such as Streamlit.
+
+    All sessions share one background event loop and one pipeline, at
+    most ``settings.max_concurrent_runs`` runs execute at once, model
+    requests and sandbox executions are capped by ``llm_concurrency`` and
+    ``sandbox_concurrency``, and a run is
+    cancelled with ``TimeoutError`` after ``settings.pipeline_timeout``
+    seconds. Cancelling ``cancel`` or closing the iterator stops the run,
+    its model requests and its sandbox. ``on_idle`` is called about
+    once a second while waiting for events.
+    """
+    cancel = cancel or CancelToken()
+    runner = get_runner(settings.max_concurrent_runs)
+    yield from runner.stream(
+        stream(prompt, data_files, history, cancel),
+        timeout=settings.pipeline_timeout,
+        cancel=cancel,
+        idle=on_idle,
+    )
+
+
+def run_pipeline(
+    prompt: str,
+    data_files: list[str] | None = None,
+    on_event: Callable[[PipelineEvent], None] | None = None,
+    history: list[ModelMessage] | None = None,
+    cancel: CancelToken | None = None,
+    on_idle: Callable[[], None] | None = None,
+) -> str:
+    """Run the pipeline and return the summary.
+
+    ``on_event`` sees every event as it arrives. A clarification request
+    raises :class:`ClarificationRequested`; call again with the answer as
+    ``prompt`` and its ``history`` to continue the Expert's dialogue. A
+    cancelled run raises :class:`~src.pipeline.RunCancelled`.
+    """
+    for event in stream_pipeline(prompt, data_files, history, cancel, on_idle):
+        if on_event is not None:
+            on_event(event)
+        if isinstance(event, ClarificationNeeded):
+            raise ClarificationRequested(event)
+        if isinstance(event, Validated):
+            return event.message
+    raise RuntimeError("Pipeline ended without a validation result.")
@@ -0,0 +1,38 @@
+"""Progressive rendering of pipeline events in Streamlit."""
+
+from collections.abc import Callable
+from typing import Any
+
+from src.pipeline import ClarificationNeeded, PipelineEvent, Validated
+
+
+def show_progress(status: Any) -> Callable[[PipelineEvent], None]:
+    """Event callback that writes each stage into an ``st.status`` box."""
+
+    def on_event(event: PipelineEvent) -> None:
+        if isinstance(event, Validated):
+            success = event.output.success
+            status.update(
+                label="Validated" if success else "Validation failed",
+                state="complete" if success else "error",
+            )
+        elif isinstance(event, ClarificationNeeded):
+            status.update(label="Clarification needed", state="complete")
+        else:
+            status.update(label=event.message)
+            status.write(event.message)
+
+    return on_event
+
+
+def keep_alive(status: Any) -> Callable[[], None]:
+    """Idle callback that touches ``status`` while a stage runs.
+
+    Streamlit interrupts a script only inside its own calls, so this lets
+    a reset or a closed session stop the script, which cancels the run.
+    """
+
+    def on_idle() -> None:
+        status.update(state="running")
+
+    return on_idle
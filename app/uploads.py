@@ -0,0 +1,81 @@
+"""Session-scoped storage of attached data files.
+
+Each Streamlit session writes its uploads once into its own directory
+under ``.artifacts/uploads``, reuses them across reruns and clarification
+rounds, and deletes files that are no longer attached. Directories of
+sessions idle for longer than ``UPLOAD_TTL_SECONDS`` are removed when a
+new session starts.
+"""
+
+import os
+import shutil
+import tempfile
+import time
+from collections.abc import Iterable, MutableMapping
+from typing import Any
+
+UPLOAD_ROOT = os.path.join(".artifacts", "uploads")
+UPLOAD_TTL_SECONDS = 24 * 3600
+
+
+def _upload_key(file: Any) -> str:
+    file_id = getattr(file, "file_id", None)
+    return file_id or f"{file.name}:{getattr(file, 'size', '')}"
+
+
+def prune_stale_uploads(
+    root: str = UPLOAD_ROOT, ttl: float = UPLOAD_TTL_SECONDS
+) -> None:
+    """Remove session upload directories idle for more than ``ttl``."""
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - ttl
+    for entry in os.scandir(root):
+        if entry.is_dir() and entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def save_uploads(
+    files: Iterable[Any] | None,
+    state: MutableMapping[str, Any],
+    root: str = UPLOAD_ROOT,
+) -> list[str]:
+    """Write uploaded files once per session and return their paths.
+
+    ``state`` is the session state; it remembers the session directory
+    and which uploads are already on disk.
+    """
+    files = list(files or [])
+    upload_dir = state.get("upload_dir")
+    if not files and upload_dir is None:
+        return []
+    if upload_dir is None or not os.path.isdir(upload_dir):
+        prune_stale_uploads(root)
+        os.makedirs(root, exist_ok=True)
+        upload_dir = state["upload_dir"] = tempfile.mkdtemp(dir=root)
+        state["upload_paths"] = {}
+
+    saved: dict[str, str] = state["upload_paths"]
+    current: dict[str, str] = {}
+    for file in files:
+        key = _upload_key(file)
+        path = saved.get(key)
+        if path is None or not os.path.exists(path):
+            path = os.path.join(upload_dir, os.path.basename(file.name))
+            with open(path, "wb") as f:
+                f.write(file.getbuffer())
+        current[key] = path
+    for path in saved.values():
+        if path not in current.values() and os.path.exists(path):
+            os.remove(path)
+    state["upload_paths"] = current
+    os.utime(upload_dir)  # mark the session as active
+    return list(current.values())
+
+
+def clear_uploads(state: MutableMapping[str, Any]) -> None:
+    """Delete the session's upload directory."""
+    upload_dir = state.pop("upload_dir", None)
+    state.pop("upload_paths", None)
+    if upload_dir is not None:
+        shutil.rmtree(upload_dir, ignore_errors=True)
@@ -0,0 +1,112 @@
+"""Per-step solve latency of the receding-horizon MPC.
+
+Closed-loop reference tracking on the industrial heating plant
+``1/(s^2+3s+2)`` with input, input-rate and output bounds. Warm-started
+solves are compared with cold solves (warm-start data reset before every
+step) and with a generic SLSQP solve of the same QP. Run from the
+repository root::
+
+    python -m benchmarks.bench_mpc
+"""
+
+import time
+
+import numpy as np
+from scipy.optimize import minimize
+
+from src.controls import LinearMPC
+
+PLANT = ([1.0], [1.0, 3.0, 2.0])
+DT = 0.1
+HORIZON = 30
+STEPS = 300
+SLSQP_STEPS = 30
+# Set-point changes 0 -> 1 -> 0.4 -> 1.2.
+REFERENCE = np.repeat([1.0, 0.4, 1.2], STEPS // 3)[:, None]
+
+
+def _mpc() -> LinearMPC:
+    return LinearMPC.from_plant(
+        PLANT,
+        DT,
+        horizon=HORIZON,
+        u_min=0.0,
+        u_max=3.0,
+        du_max=0.5,
+        y_max=1.25,
+    )
+
+
+def _report(name: str, times: np.ndarray, iterations: np.ndarray) -> None:
+    print(
+        f"  {name:<6} mean {times.mean() * 1e3:7.3f} ms  "
+        f"p50 {np.percentile(times, 50) * 1e3:7.3f} ms  "
+        f"p99 {np.percentile(times, 99) * 1e3:7.3f} ms  "
+        f"max {times.max() * 1e3:7.3f} ms  "
+        f"{iterations.mean():6.1f} it/step"
+    )
+
+
+def _cold(mpc: LinearMPC) -> tuple[np.ndarray, np.ndarray]:
+    x, u = np.zeros(mpc.n), np.zeros(mpc.m)
+    times, iterations = [], []
+    for k in range(STEPS):
+        mpc.reset()
+        step = mpc.solve(x, REFERENCE[k:], u)
+        u = step.u
+        x = mpc.A @ x + mpc.B @ u
+        times.append(step.solve_time)
+        iterations.append(step.iterations)
+    return np.array(times), np.array(iterations)
+
+
+def _slsqp(mpc: LinearMPC) -> tuple[np.ndarray, np.ndarray]:
+    x, u = np.zeros(mpc.n), np.zeros(mpc.m)
+    bounds = [(0.0, 3.0)] * HORIZON
+    times, iterations = [], []
+    for k in range(SLSQP_STEPS):
+        start = time.perf_counter()
+        ref = np.full(HORIZON, REFERENCE[k, 0])
+        f = mpc._f_x @ x + mpc._f_r @ ref + mpc._f_u @ u
+        free = mpc.Psi @ x
+        rate = mpc.E @ u
+        constraints = [
+            {"type": "ineq", "fun": lambda U: 1.25 - free - mpc.Theta @ U},
+            {"type": "ineq", "fun": lambda U: 0.5 - (mpc.D @ U - rate)},
+            {"type": "ineq", "fun": lambda U: 0.5 + (mpc.D @ U - rate)},
+        ]
+        res = minimize(
+            lambda U: 0.5 * U @ mpc.H @ U + f @ U,
+            np.zeros(HORIZON),
+            jac=lambda U: mpc.H @ U + f,
+            bounds=bounds,
+            constraints=constraints,
+            method="SLSQP",
+        )
+        times.append(time.perf_counter() - start)
+        iterations.append(res.nit)
+        u = res.x[:1]
+        x = mpc.A @ x + mpc.B @ u
+    return np.array(times), np.array(iterations)
+
+
+def main() -> None:
+    mpc = _mpc()
+    sim = mpc.simulate(REFERENCE, STEPS)
+    print(
+        f"heating plant, N={HORIZON}, dt={DT}, {STEPS} steps "
+        f"({sum(s != 'unconstrained' and s != 'optimal' for s in sim.status)}"
+        " steps with active constraints)"
+    )
+    print(
+        f"  max y {sim.y.max():.4f} (bound 1.25), u in "
+        f"[{sim.u.min():.3f}, {sim.u.max():.3f}], max |du| "
+        f"{np.abs(np.diff(sim.u[:, 0], prepend=0.0)).max():.3f}"
+    )
+    _report("warm", sim.solve_time, sim.iterations)
+    _report("cold", *_cold(_mpc()))
+    _report("slsqp", *_slsqp(_mpc()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Transport LP scaling: sparse builder versus rule-based Pyomo.
+
+Random warehouse x store transport problems from 10 to 100k arcs. The
+Pyomo model is written the way generated code writes it (indexed sets,
+``Param`` dictionaries and rule functions). Pyomo is timed for model
+construction plus LP-file export, i.e. everything before a file-based
+solver starts, and additionally solved when a HiGHS or GLPK interface is
+installed. Run from the repository root::
+
+    python -m benchmarks.bench_sparse_lp
+"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+import pyomo.environ as pyo
+
+from src.optimization import SparseModel
+
+SIZES = [(2, 5), (10, 10), (20, 50), (100, 100), (200, 500)]
+
+
+def _instance(n_w: int, n_s: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    cost = rng.uniform(5.0, 20.0, size=(n_w, n_s))
+    demand = rng.uniform(10.0, 100.0, size=n_s)
+    capacity = np.full(n_w, 1.2 * demand.sum() / n_w)
+    return cost, capacity, demand
+
+
+def _sparse(cost, capacity, demand) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    m = SparseModel("transport")
+    x = m.add_variables("ship", cost.shape)
+    m.add_constraints("capacity", x.sum(axis=1) <= capacity)
+    m.add_constraints("demand", x.sum(axis=0) >= demand)
+    m.minimize(x.dot(cost))
+    built = time.perf_counter()
+    solution = m.solve()
+    return built - start, time.perf_counter() - built, solution.objective_value
+
+
+def _pyomo_solver():
+    for name in ("appsi_highs", "glpk"):
+        try:
+            solver = pyo.SolverFactory(name)
+            if solver.available(exception_flag=False):
+                return solver
+        except Exception:
+            continue
+    return None
+
+
+def _pyomo(cost, capacity, demand, solver) -> tuple[float, float, float]:
+    start = time.perf_counter()
+    n_w, n_s = cost.shape
+    model = pyo.ConcreteModel()
+    model.W = pyo.Set(initialize=range(n_w))
+    model.S = pyo.Set(initialize=range(n_s))
+    model.cost = pyo.Param(
+        model.W,
+        model.S,
+        initialize={
+            (i, j): cost[i, j] for i in range(n_w) for j in range(n_s)
+        },
+    )
+    model.capacity = pyo.Param(model.W, initialize=dict(enumerate(capacity)))
+    model.demand = pyo.Param(model.S, initialize=dict(enumerate(demand)))
+    model.x = pyo.Var(model.W, model.S, domain=pyo.NonNegativeReals)
+    model.obj = pyo.Objective(
+        expr=sum(
+            model.cost[i, j] * model.x[i, j] for i in model.W for j in model.S
+        ),
+        sense=pyo.minimize,
+    )
+    model.cap = pyo.Constraint(
+        model.W,
+        rule=lambda m, i: sum(m.x[i, j] for j in m.S) <= m.capacity[i],
+    )
+    model.dem = pyo.Constraint(
+        model.S,
+        rule=lambda m, j: sum(m.x[i, j] for i in m.W) >= m.demand[j],
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        model.write(os.path.join(tmp, "model.lp"))
+    built = time.perf_counter()
+    if solver is None:
+        return built - start, float("nan"), float("nan")
+    solver.solve(model)
+    return built - start, time.perf_counter() - built, pyo.value(model.obj)
+
+
+def main() -> None:
+    solver = _pyomo_solver()
+    print(
+        "Pyomo solver: "
+        + (solver.name if solver else "none installed (build + LP export)")
+    )
+    print(
+        f"{'arcs':>8} {'sparse build':>13} {'sparse solve':>13} "
+        f"{'pyomo build':>12} {'pyomo solve':>12} {'build speedup':>14} "
+        f"{'total speedup':>14}"
+    )
+    for n_w, n_s in SIZES:
+        data = _instance(n_w, n_s)
+        sb, ss, s_obj = _sparse(*data)
+        pb, ps, p_obj = _pyomo(*data, solver)
+        if solver is not None:
+            assert abs(s_obj - p_obj) <= 1e-6 * abs(p_obj)
+        pyomo_solve = "n/a" if solver is None else f"{ps:.3f}s"
+        # Without a Pyomo solver the total compares against build only.
+        pyomo_total = pb if solver is None else pb + ps
+        print(
+            f"{n_w * n_s:>8} {sb:>12.4f}s {ss:>12.4f}s {pb:>11.3f}s "
+            f"{pyomo_solve:>12} {pb / sb:>13.0f}x "
+            f"{pyomo_total / (sb + ss):>13.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Throughput of batched PID stability screening on the example plants.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_stability
+"""
+
+import time
+
+import numpy as np
+
+from src.controls import screen_pid_candidates, simulate_pid_batch
+
+# Plants from examples/pid_tuning.txt and
+# examples/industrial_heating_process.txt.
+PLANTS = {
+    "pid_tuning 1/(s(s+1))": ([1.0], [1.0, 1.0, 0.0]),
+    "industrial_heating 1/(s^2+3s+2)": ([1.0], [1.0, 3.0, 2.0]),
+}
+N_CANDIDATES = 200_000
+N_SIMULATED = 2_000
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    gains = rng.uniform(
+        [-5.0, -5.0, -1.0], [50.0, 50.0, 10.0], size=(N_CANDIDATES, 3)
+    )
+    for name, plant in PLANTS.items():
+        print(name)
+        for method in ("routh", "roots"):
+            start = time.perf_counter()
+            mask = screen_pid_candidates(plant, gains, method=method)
+            elapsed = time.perf_counter() - start
+            print(
+                f"  {method:>5}: {N_CANDIDATES / elapsed:>12,.0f} "
+                f"candidates/s ({mask.mean():.1%} stable)"
+            )
+
+        subset = gains[:N_SIMULATED]
+        timings = {}
+        for screen in (False, True):
+            start = time.perf_counter()
+            simulate_pid_batch(plant, subset, screen=screen)
+            timings[screen] = time.perf_counter() - start
+        print(
+            f"  simulate {N_SIMULATED} candidates: "
+            f"{timings[False]:.3f} s unscreened, "
+            f"{timings[True]:.3f} s screened"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Benchmark vectorized step metrics against ``control.step_info``.
+
+Run from the repository root::
+
+    python -m benchmarks.bench_step_metrics
+"""
+
+import time
+
+import control
+import numpy as np
+
+from src.controls import simulate_pid_batch, step_metrics
+
+PLANT = control.tf([1], [1, 3, 2])
+BATCH_SIZES = [100, 1_000, 5_000]
+
+
+def _loop_step_info(t: np.ndarray, y: np.ndarray) -> np.ndarray:
+    rows = []
+    for yi in y:
+        info = control.step_info(yi, T=t)
+        rows.append(
+            [info["Overshoot"], info["RiseTime"], info["SettlingTime"]]
+        )
+    return np.array(rows)
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(
+        f"{'batch':>8} {'step_info [s]':>14} {'vectorized [s]':>15} "
+        f"{'speedup':>8} {'max abs diff':>13}"
+    )
+    for n in BATCH_SIZES:
+        gains = rng.uniform([0.5, 0.1, 0.0], [10.0, 5.0, 2.0], size=(n, 3))
+        res = simulate_pid_batch(PLANT, gains, t_final=10.0, dt=0.01)
+
+        start = time.perf_counter()
+        reference = _loop_step_info(res.t, res.y)
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        m = step_metrics(res.t, res.y, res.u)
+        vec_time = time.perf_counter() - start
+
+        ours = np.column_stack([m.overshoot, m.rise_time, m.settling_time])
+        diff = np.nanmax(np.abs(ours - reference))
+        print(
+            f"{n:>8} {loop_time:>14.4f} {vec_time:>15.4f} "
+            f"{loop_time / vec_time:>7.1f}x {diff:>13.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Two-stage stochastic LP: L-shaped decomposition versus extensive form.
+
+The Birge & Louveaux farmer problem with sampled yields; scenario ``i``
+draws its yield multipliers from a generator seeded with ``i``, so worker
+processes rebuild scenarios instead of receiving them. The extensive form
+holds every scenario in one LP. Run from the repository root::
+
+    python -m benchmarks.bench_stochastic
+"""
+
+import os
+import time
+
+import numpy as np
+
+from src.optimization import (
+    FirstStage,
+    Scenario,
+    solve_extensive_form,
+    solve_l_shaped,
+)
+
+SIZES = [10, 100, 500]
+
+FIRST_STAGE = FirstStage(
+    c=[150.0, 230.0, 260.0], A=[[1.0, 1.0, 1.0]], upper=[500.0]
+)
+
+
+def farmer_scenario(i: int, n_scenarios: int) -> Scenario:
+    """Scenario ``i`` of ``n_scenarios`` with yields scaled 0.8-1.2."""
+    scale = np.random.default_rng(i).uniform(0.8, 1.2, size=3)
+    wheat, corn, beets = np.array([2.5, 3.0, 20.0]) * scale
+    return Scenario(
+        probability=1.0 / n_scenarios,
+        q=[238.0, 210.0, -170.0, -150.0, -36.0, -10.0],
+        T=[[wheat, 0, 0], [0, corn, 0], [0, 0, -beets]],
+        W=[[1, 0, -1, 0, 0, 0], [0, 1, 0, -1, 0, 0], [0, 0, 0, 0, 1, 1]],
+        lower=[200.0, 240.0, -np.inf],
+        upper=[np.inf, np.inf, 0.0],
+        y_ub=[np.inf, np.inf, np.inf, np.inf, 6000.0, np.inf],
+    )
+
+
+class _Generator:
+    """Picklable ``i -> Scenario`` for a fixed scenario count."""
+
+    def __init__(self, n_scenarios: int):
+        self.n_scenarios = n_scenarios
+
+    def __call__(self, i: int) -> Scenario:
+        return farmer_scenario(i, self.n_scenarios)
+
+
+def main() -> None:
+    workers = os.cpu_count() or 1
+    print(f"workers: {workers}")
+    print(
+        f"{'scenarios':>9} {'extensive':>10} {'L-shaped':>9} "
+        f"{'iters':>6} {'sub s/iter':>11} {'rel diff':>9}"
+    )
+    last = None
+    for n in SIZES:
+        generator = _Generator(n)
+        start = time.perf_counter()
+        _, ef_objective = solve_extensive_form(
+            FIRST_STAGE, [generator(i) for i in range(n)]
+        )
+        ef_time = time.perf_counter() - start
+        last = solve_l_shaped(FIRST_STAGE, generator, n, workers=workers)
+        per_iter = np.mean([it.subproblem_time for it in last.iterations])
+        diff = abs(last.objective - ef_objective) / abs(ef_objective)
+        print(
+            f"{n:>9} {ef_time:>9.3f}s {last.elapsed:>8.3f}s "
+            f"{len(last.iterations):>6} {per_iter:>10.4f}s {diff:>9.1e}"
+        )
+    print()
+    print(last.summary())
+
+
+if __name__ == "__main__":
+    main()
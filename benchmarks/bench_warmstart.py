@@ -0,0 +1,77 @@
+"""Iteration savings of warm-started PID tuning on the example plants.
+
+Every example plant is tuned once with a full multi-start search to fill a
+fresh warm-start store; then
+plants with coefficients perturbed by up to ±10 % are tuned cold (generic
+guess) and warm (nearest stored solution). Run from the repository root::
+
+    python -m benchmarks.bench_warmstart
+"""
+
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from src.controls import PIDObjective, WarmStartStore, tune_pid_multistart
+
+# Plants from examples/pid_tuning.txt and
+# examples/industrial_heating_process.txt.
+PLANTS = {
+    "pid_tuning 1/(s(s+1))": ([1.0], [1.0, 1.0, 0.0]),
+    "industrial_heating 1/(s^2+3s+2)": ([1.0], [1.0, 3.0, 2.0]),
+}
+N_VARIANTS = 5
+GUESS = (1.0, 0.1, 0.1)
+SETTINGS = {"metric": "iae", "effort_weight": 0.01, "max_overshoot": 10.0}
+
+
+def _tune(num, den, store=None, n_starts=1):
+    objective = PIDObjective.from_plant((num, den), **SETTINGS)
+    # A single start isolates the effect of the initial guess.
+    return tune_pid_multistart(
+        objective,
+        n_starts=n_starts,
+        x0=GUESS,
+        workers=1,
+        warm_start=store,
+        n_warm=1,
+    )
+
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = WarmStartStore(Path(tmp) / "warmstart.sqlite")
+        for name, (num, den) in PLANTS.items():
+            _tune(num, den, store, n_starts=8)
+            print(name)
+            totals = {"cold": [0, 0], "warm": [0, 0]}
+            for _ in range(N_VARIANTS):
+                scale = 1.0 + rng.uniform(-0.1, 0.1, size=len(den))
+                perturbed = (np.asarray(den) * scale).tolist()
+                runs = {
+                    "cold": _tune(num, perturbed),
+                    "warm": _tune(num, perturbed, store),
+                }
+                for label, result in runs.items():
+                    totals[label][0] += result.starts[0].nit
+                    totals[label][1] += result.n_evaluations
+                print(
+                    "  "
+                    + "  ".join(
+                        f"{label}: {r.starts[0].nit:>3} it "
+                        f"{r.n_evaluations:>4} ev cost {r.cost:.4f}"
+                        for label, r in runs.items()
+                    )
+                )
+            (cold_it, cold_ev), (warm_it, warm_ev) = totals.values()
+            print(
+                f"  total iterations {cold_it} -> {warm_it} "
+                f"({1 - warm_it / cold_it:.0%} fewer), evaluations "
+                f"{cold_ev} -> {warm_ev}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,43 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     gemini_api_key: str = ""
+    # System keys shared by all sessions; defaults to ``gemini_api_key``.
+    gemini_api_keys: list[str] = []
+    # Seconds a key that answered 429 is skipped.
+    key_cooldown: float = 60.0
     logfire_token: str = ""
+    artifact_dir: str = ".artifacts"
+    artifact_max_bytes: int = 256 * 1024 * 1024
+    reuse_artifacts: bool = True
+    # Answer the example prompts from ``python precompute.py`` results.
+    serve_precomputed: bool = True
+    diagnosis_retries: int = 1
+    # Execute Integrator code while Ruff lints it.
+    speculative_execution: bool = True
+    # Integrator candidates raced per run; see ``src/pipeline/candidates``.
+    integrator_candidates: int = 1
+    candidate_deadline: float = 180.0
+    candidate_selection: str = "first"  # first | best
+    candidate_tiers: bool = False
+    # Identical concurrent runs share one execution.
+    coalesce_requests: bool = True
+    max_clarifications: int = 3
+    expert_history_chars: int = 12_000
+    max_concurrent_runs: int = 4
+    pipeline_timeout: float = 600.0
+    llm_concurrency: int = 8
+    # Gemini quota scheduling, see ``src/agents/quota``. ``quota_db``
+    # shares the buckets between processes; ``quota_limits`` overrides
+    # the requests and tokens per minute of a model.
+    quota_db: str = ""
+    quota_limits: dict[str, tuple[int, int]] = {}
+    quota_max_wait: float = 60.0
+    sandbox_concurrency: int = 2
+    service_workers: int = 4
+    service_queue_size: int = 32
+    job_db: str = ".artifacts/jobs.sqlite"
+    job_lease_seconds: float = 900.0
+    job_max_attempts: int = 3
     model_config = SettingsConfigDict(
         env_file=(".env", ".streamlit/secrets.toml"),
         env_file_encoding="utf-8",
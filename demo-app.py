@@ -4,7 +4,15 @@ from functools import wraps
 import streamlit as st
 
 from app.access_control import check_can_use_free_tier, mark_free_tier_used
-from app.backend_interface import run_pipeline
+from app.backend_interface import (
+    ClarificationRequested,
+    cancel_run,
+    new_run,
+    run_pipeline,
+)
+from app.progress import keep_alive, show_progress
+from app.uploads import save_uploads
+from src.pipeline import RunCancelled
 
 # --- Setup ---
 st.set_page_config(page_title="Optimo.ai", page_icon="🔮", layout="wide")
@@ -52,7 +60,9 @@ def get_user_email() -> str | None:
 
 
 @rate_limit
-def run_backend(prompt_text):
+def run_backend(
+    prompt_text, data_files=None, on_event=None, history=None, on_idle=None
+):
     # Check usage before running
     system_key = st.secrets.get("GEMINI_API_KEY", "")
 
@@ -83,7 +93,14 @@ def run_backend(prompt_text):
     if not has_valid_access:
         return "🔒 **Access Restricted**\nPlease log in or provide a Gemini API Key in the sidebar to proceed."
 
-    return run_pipeline(prompt_text)
+    return run_pipeline(
+        prompt_text,
+        save_uploads(data_files, st.session_state),
+        on_event=on_event,
+        history=history,
+        cancel=new_run(st.session_state),
+        on_idle=on_idle,
+    )
 
 
 # --- Sidebar Logic ---
@@ -177,6 +194,16 @@ with st.sidebar:
             # Re-ensure system key is set if user cleared the input but free tier is valid
             st.session_state.api_key = system_key
 
+    st.markdown("---")
+    data_files = st.file_uploader(
+        "Attach data (CSV / Parquet)",
+        type=["csv", "parquet"],
+        accept_multiple_files=True,
+        help="Columns are passed to the model code as arrays; "
+        "only their schema is sent to the assistant.",
+        key="data_files",
+    )
+
     st.markdown("---")
     st.caption("© 2026 Optimo.ai\nAgent-based control system design")
 
@@ -200,9 +227,11 @@ with title_row:
 
     with col3:
         if st.button("Reset Chat", help="Clear conversation history"):
+            cancel_run(st.session_state)
             st.session_state.messages = []
             st.session_state.pipeline_prompt = ""
             st.session_state.awaiting_clarification = False
+            st.session_state.expert_history = None
             st.rerun()
 
 # CSS for Chat Input
@@ -294,22 +323,27 @@ if prompt := st.chat_input(
     with st.chat_message("user"):
         st.markdown(prompt)
 
+    history = None
     if st.session_state.awaiting_clarification:
-        full_prompt = (
-            f"{st.session_state.pipeline_prompt}\nClarifications:\n{prompt}"
-        )
+        # Continue the Expert's dialogue with just the answer
+        history = st.session_state.expert_history
         st.session_state.awaiting_clarification = False
     else:
-        full_prompt = prompt
         st.session_state.pipeline_prompt = prompt
 
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
-        message_placeholder.markdown("Optimo is thinking…")
 
         try:
             # Run the pipeline using the rate-limited, access-aware wrapper
-            response = run_backend(full_prompt)
+            with st.status("Optimo is thinking…") as progress:
+                response = run_backend(
+                    prompt,
+                    data_files,
+                    on_event=show_progress(progress),
+                    history=history,
+                    on_idle=keep_alive(progress),
+                )
 
             if (
                 not response
@@ -317,9 +351,12 @@ if prompt := st.chat_input(
                 or response.strip() == ""
             ):
                 response = "Oops, that didn't work. Try again."
-        except RuntimeError as e:
+        except ClarificationRequested as e:
             response = f"Clarification needed:\n{str(e)}"
             st.session_state.awaiting_clarification = True
+            st.session_state.expert_history = e.history
+        except RunCancelled as e:
+            response = str(e)
         except Exception as e:
             import google
 
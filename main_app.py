@@ -1,89 +1,49 @@
+from collections.abc import AsyncIterator
+
 import logfire
+from pydantic_ai.messages import ModelMessage
 
 from config import Settings
-from src.agents import (
-    ExpertAgent,
-    ExpertDeps,
-    ExpertOutput,
-    IntegratorAgent,
-    IntegratorDeps,
-    IntegratorOutput,
-    ValidatorAgent,
-    ValidatorDeps,
+from src.pipeline import (
+    CancelToken,
+    ClarificationNeeded,
+    Pipeline,
+    PipelineEvent,
+    StageLimits,
+    Validated,
 )
 
-logfire.configure(token=Settings().logfire_token)
+settings = Settings()
+logfire.configure(token=settings.logfire_token)
 logfire.instrument_pydantic_ai()
+# Shared by all sessions: the agents, their HTTP clients and the stage
+# limits are built once per process.
+pipeline = Pipeline(settings, limits=StageLimits.from_settings(settings))
 
 
-async def main(prompt: str):
-    """Run Expert → Integrator → Validator pipeline and return summary."""
-    messages = []
-
-    # --- Expert Step ---
-    expert = ExpertAgent().agent
-    optimization_prompt = prompt
-    while True:
-        deps_expert = ExpertDeps()
-        expert_result = await expert.run(optimization_prompt, deps=deps_expert)
-        expert_output = expert_result.output
-
-        if isinstance(expert_output, ExpertOutput):
-            break
-        else:
-            messages.append(" Expert requires clarification:\n")
-            for q in expert_output.clarification_questions:
-                messages.append(f" - {q}")
-            # pipeline zastaví, aby frontend vedel ukázať klarifikáciu
-            raise RuntimeError(
-                "\n".join(expert_output.clarification_questions)
-            )
-
-    if not isinstance(expert_output, ExpertOutput):
-        raise RuntimeError("Expert agent response was not finalized.")
+def stream(
+    prompt: str,
+    data_files: list[str] | None = None,
+    history: list[ModelMessage] | None = None,
+    cancel: CancelToken | None = None,
+) -> AsyncIterator[PipelineEvent]:
+    """Events of one Expert → Integrator → Validator run, as they happen.
 
-    # --- Integrator Step ---
-    integrator = IntegratorAgent().agent
-    deps_integrator = IntegratorDeps(
-        reformulated_problem=expert_output.reformulated_problem,
-        problem_type=expert_output.problem_type,
-        assumptions=expert_output.assumptions,
-    )
-    integrator_prompt = f"""
-You are the Integrator Agent.
-Write a runnable Pyomo model for:
+    ``data_files`` are CSV/Parquet paths; only their schema enters the
+    prompts and the generated code reads the values from ``data``. With
+    the ``history`` of a ``ClarificationNeeded`` event, ``prompt`` is the
+    answer and continues that dialogue. Cancelling ``cancel`` stops the
+    run.
+    """
+    return pipeline.run(prompt, data_files, history=history, cancel=cancel)
 
-{expert_output.reformulated_problem}
 
-Assumptions:
-{expert_output.assumptions}
-"""
-    integrator_result = await integrator.run(
-        integrator_prompt, deps=deps_integrator
-    )
-    output = integrator_result.output
-    if isinstance(output, IntegratorOutput):
-        pyomo_code = output.code.strip()
-    else:
-        pyomo_code = str(output).strip()
-
-    with open("generated_code.py", "w", encoding="utf-8") as f:
-        f.write(pyomo_code)
-
-    # --- Validator Step ---
-    validator = ValidatorAgent().agent
-    deps_validator = ValidatorDeps(code=pyomo_code)
-    validator_result = await validator.run("", deps=deps_validator)
-    validation_output = validator_result.output
-
-    # --- Summary ---
-    messages.append(f" Success: {validation_output.success}")
-    if getattr(validation_output, "objective_name", None):
-        messages.append(f"Objective Name: {validation_output.objective_name}")
-    if getattr(validation_output, "objective_value", None) is not None:
-        messages.append(
-            f"Objective Value: {validation_output.objective_value}"
-        )
-    if getattr(validation_output, "stdout", None):
-        messages.append(f"Solver output:\n{validation_output.stdout}")
-    return "\n".join(messages)
+async def main(prompt: str, data_files: list[str] | None = None):
+    """Run Expert → Integrator → Validator pipeline and return summary."""
+    async for event in stream(prompt, data_files):
+        if isinstance(event, ClarificationNeeded):
+            # pipeline zastaví, aby frontend vedel ukázať klarifikáciu
+            raise RuntimeError(event.message)
+        if isinstance(event, Validated):
+            return event.message
+    raise RuntimeError("Pipeline ended without a validation result.")
@@ -0,0 +1,53 @@
+"""Precompute the results of the example prompts.
+
+    python precompute.py             # build missing or stale results
+    python precompute.py --force     # rebuild every example
+    python precompute.py --check     # only report which are fresh
+
+Results are stored in ``Settings.artifact_dir`` together with the hashes
+of the agent instructions they were built with. The apps and the service
+answer a matching prompt from them instantly, until an instruction file
+changes.
+"""
+
+import argparse
+
+import anyio
+import logfire
+
+from config import Settings
+from src.artifacts import ArtifactStore
+from src.pipeline import Pipeline
+from src.pipeline.precomputed import EXAMPLES, build, example_prompts, lookup
+
+settings = Settings()
+logfire.configure(
+    token=settings.logfire_token or None, send_to_logfire="if-token-present"
+)
+logfire.instrument_pydantic_ai()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.add_argument("--examples", default=EXAMPLES)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--check", action="store_true")
+    args = parser.parse_args()
+
+    prompts = example_prompts(args.examples)
+    if args.check:
+        store = ArtifactStore(
+            settings.artifact_dir, settings.artifact_max_bytes
+        )
+        for name, prompt in prompts.items():
+            result = lookup(store, prompt)
+            print(f"{name}: {result.build if result else 'missing or stale'}")
+    else:
+        pipeline = Pipeline(
+            settings.model_copy(update={"serve_precomputed": False})
+        )
+        statuses = anyio.run(build, pipeline, prompts, args.force)
+        for name, status in statuses.items():
+            print(f"{name}: {status}")
@@ -0,0 +1,155 @@
+"""HTTP service running the pipeline behind a bounded job queue.
+
+Start with ``uvicorn service:app`` or ``python service.py``. Clients
+``POST /jobs`` a prompt and poll ``GET /jobs/{id}`` for its events and
+result; a job that ends with questions is answered with
+``POST /jobs/{id}/answer``, which continues the Expert's dialogue, and
+``DELETE /jobs/{id}`` cancels a job and its model requests and sandbox.
+When the queue is full the service answers ``429`` with a
+``Retry-After`` header instead of accepting more work. Each process runs
+``Settings.service_workers`` jobs at once, with model requests and
+sandbox executions capped separately (``llm_concurrency``,
+``sandbox_concurrency``); scale out by running more processes.
+"""
+
+import argparse
+from contextlib import asynccontextmanager
+
+import logfire
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from config import Settings
+from src.agents.base import key_pool
+from src.pipeline import (
+    ClarificationNeeded,
+    Job,
+    JobQueue,
+    Pipeline,
+    QueueFull,
+    RunJob,
+    StageLimits,
+)
+from src.pipeline.cancel import metrics as cancel_metrics
+from src.pipeline.coalesce import flights
+
+settings = Settings()
+logfire.configure(
+    token=settings.logfire_token or None, send_to_logfire="if-token-present"
+)
+logfire.instrument_pydantic_ai()
+
+
+class JobRequest(BaseModel):
+    prompt: str
+
+
+def _busy(e: QueueFull) -> JSONResponse:
+    return JSONResponse(
+        {"detail": str(e)},
+        status_code=429,
+        headers={"Retry-After": str(int(e.retry_after))},
+    )
+
+
+def create_app(run: RunJob | None = None) -> FastAPI:
+    """Build the service; ``run`` replaces the pipeline (for tests)."""
+    if run is None:
+        pipeline = Pipeline(
+            settings, limits=StageLimits.from_settings(settings)
+        )
+
+        def run(job: Job):
+            return pipeline.run(
+                job.prompt,
+                job.data_files,
+                history=job.history,
+                cancel=job.cancel_token,
+            )
+
+    queue = JobQueue(
+        run, settings.service_workers, settings.service_queue_size
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await queue.start()
+        yield
+        await queue.stop()
+
+    app = FastAPI(title="Optimo", lifespan=lifespan)
+    app.state.queue = queue
+
+    @app.post("/jobs", status_code=202)
+    async def submit(request: JobRequest):
+        try:
+            job = queue.submit(request.prompt)
+        except QueueFull as e:
+            return _busy(e)
+        return {"id": job.id, "status": job.status}
+
+    @app.post("/jobs/{job_id}/answer", status_code=202)
+    async def answer(job_id: str, request: JobRequest):
+        """Answer a job's clarification questions in a follow-up job."""
+        job = queue.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"Unknown job {job_id}.")
+        last = job.events[-1] if job.events else None
+        if not isinstance(last, ClarificationNeeded):
+            raise HTTPException(409, "The job is not awaiting an answer.")
+        try:
+            follow_up = queue.submit(
+                request.prompt, job.data_files, last.history
+            )
+        except QueueFull as e:
+            return _busy(e)
+        return {"id": follow_up.id, "status": follow_up.status}
+
+    @app.delete("/jobs/{job_id}", status_code=202)
+    async def cancel(job_id: str):
+        job = queue.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"Unknown job {job_id}.")
+        if not queue.cancel(job_id):
+            raise HTTPException(409, f"Job {job_id} already finished.")
+        return {"id": job.id, "status": job.status}
+
+    @app.get("/jobs/{job_id}")
+    async def status(job_id: str):
+        job = queue.get(job_id)
+        if job is None:
+            raise HTTPException(404, f"Unknown job {job_id}.")
+        return job.to_dict()
+
+    @app.get("/health")
+    async def health():
+        return {
+            "queued": queue.queued,
+            "running": queue.running,
+            "workers": queue.workers,
+        }
+
+    @app.get("/metrics")
+    async def metrics():
+        """Cancelled and coalesced work and API key usage in this process."""
+        return {
+            "cancellation": cancel_metrics.snapshot(),
+            "coalescing": flights.snapshot(),
+            "keys": key_pool.snapshot(),
+        }
+
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -8,14 +8,19 @@ from typing import Any
 
 import google.genai.errors
 from pydantic_ai.models.google import GoogleModel
-from pydantic_ai.providers.google import GoogleProvider
 
 from config import Settings
 
+from .keys import ApiKey, KeyPool
+from .quota import QuotaScheduler, QuotaWaitTooLong, estimate_tokens
+
 # --- Model setup ---
 settings = Settings()
-# Default provider using env/config
-default_provider = GoogleProvider(api_key=settings.gemini_api_key)
+# Requests of all sessions share the quota of each model and key.
+quota_scheduler = QuotaScheduler.from_settings(settings)
+# System keys using env/config
+key_pool = KeyPool.from_settings(settings, quota_scheduler)
+default_provider = key_pool.keys[0].provider
 
 MODEL_PRIORITY = [
     "gemini-2.5-flash-lite",
@@ -26,52 +31,91 @@ MODEL_PRIORITY = [
 
 
 class GeminiFallbackModel(GoogleModel):
-    """GoogleModel wrapper with automatic fallback on quota exhaustion."""
+    """GoogleModel wrapper with automatic fallback on quota exhaustion.
+
+    Every request starts at the first model and waits for its turn in the
+    pool's scheduler, on the key with the most quota left. A key whose
+    quota would keep the request waiting too long, or that answers 429,
+    is skipped for the next one. Only when no key can serve a model does
+    the request move to the next model; the last model is always waited
+    for. The model that answered is the response's ``model_name``.
+    """
 
-    def __init__(self, model_names, provider):
+    def __init__(self, model_names, pool: KeyPool):
         self.model_names = model_names
-        self.current_index = 0
-        self.provider = provider
-        # initialize the first model
-        super().__init__(model_names[self.current_index], provider=provider)
+        self.pool = pool
+        # initialize the first model (GoogleModel keeps the provider)
+        super().__init__(model_names[0], provider=pool.keys[0].provider)
 
     async def request(
         self, messages, model_settings=None, model_request_parameters=None
     ):
-        while self.current_index < len(self.model_names):
-            try:
-                return await super().request(
-                    messages, model_settings, model_request_parameters
+        args = (messages, model_settings, model_request_parameters)
+        estimated = estimate_tokens(messages)
+        scheduler = self.pool.scheduler
+        # The tier is local: keys recover from their cooldowns, so every
+        # request tries the preferred model again.
+        for index, model_name in enumerate(self.model_names):
+            refused: list[tuple[float, ApiKey]] = []
+            for key in self.pool.ranked(model_name):
+                try:
+                    await scheduler.acquire(model_name, key.id, estimated)
+                except QuotaWaitTooLong as e:
+                    refused.append((e.wait, key))
+                    continue
+                response = await self._send(key, model_name, estimated, args)
+                if response is not None:
+                    return response
+            if refused and index == len(self.model_names) - 1:
+                _, key = min(refused, key=lambda r: r[0])
+                await scheduler.acquire(
+                    model_name, key.id, estimated, max_wait=float("inf")
                 )
-            except google.genai.errors.ClientError as e:
-                if e.code == 429:
-                    print(
-                        f"Model {self.model_names[self.current_index]} quota exhausted, switching to next..."
-                    )
-                    self.current_index += 1
-                    if self.current_index < len(self.model_names):
-                        self._model_name = self.model_names[self.current_index]
-                        continue
-                    else:
-                        raise RuntimeError(
-                            "All Gemini models exhausted, please try again later."
-                        )
-                else:
-                    raise
-
-
-# Default model instance (using system key)
-def get_model(api_key: str | None = None):
+                response = await self._send(key, model_name, estimated, args)
+                if response is not None:
+                    return response
+            print(f"Model {model_name} quota exhausted, switching to next...")
+        raise RuntimeError(
+            "All Gemini models exhausted, please try again later."
+        )
+
+    async def _send(self, key: ApiKey, model_name: str, estimated: int, args):
+        """Response of ``model_name`` with ``key``, or None on 429."""
+        try:
+            response = await key.model(model_name).request(*args)
+        except google.genai.errors.ClientError as e:
+            if e.code != 429:
+                raise
+            self.pool.rate_limited(key, model_name)
+            return None
+        if not response.model_name:
+            response.model_name = model_name
+        used = response.usage.total_tokens
+        self.pool.scheduler.settle(model_name, key.id, estimated, used)
+        self.pool.succeeded(key, used)
+        return response
+
+
+# Default model instance (using the system keys)
+def get_model(api_key: str | None = None, tier: int = 0):
+    """Fallback model starting at ``MODEL_PRIORITY[tier]``."""
+    model_names = MODEL_PRIORITY[tier % len(MODEL_PRIORITY) :]
     if not api_key:
-        return GeminiFallbackModel(MODEL_PRIORITY, default_provider)
+        return GeminiFallbackModel(model_names, key_pool)
     else:
-        return GeminiFallbackModel(
-            MODEL_PRIORITY, GoogleProvider(api_key=api_key)
+        pool = KeyPool(
+            [ApiKey.from_key(api_key)], quota_scheduler, settings.key_cooldown
         )
+        return GeminiFallbackModel(model_names, pool)
 
 
-def safe_execute_python_code(code: str) -> dict[str, Any]:
-    """Safely execute Python code (e.g. Pyomo model) in an isolated temp directory."""
+def safe_execute_python_code(
+    code: str, data: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    """Safely execute Python code (e.g. Pyomo model) in an isolated temp directory.
+
+    ``data`` holds attached tables and is visible to the code as ``data``.
+    """
     from typing import Any
 
     output_capture = io.StringIO()
@@ -84,7 +128,7 @@ def safe_execute_python_code(code: str) -> dict[str, Any]:
 
     try:
         with contextlib.redirect_stdout(output_capture):
-            ns = runpy.run_path(script_path)
+            ns = runpy.run_path(script_path, init_globals={"data": data or {}})
 
             for name, fn in ns.items():
                 if callable(fn) and "solve" in name.lower():
@@ -97,9 +141,24 @@ def safe_execute_python_code(code: str) -> dict[str, Any]:
         result["error"] = None
 
         model_obj = ns.get("model")
-        if model_obj:
+        from src.optimization import SparseModel, termination_status
+
+        status = None
+        if isinstance(model_obj, SparseModel):
+            if model_obj.solution is None:
+                model_obj.solve()
+            sparse_result = model_obj.result_dict()
+            sparse_result["objective_sense"] = model_obj.sense
+            del sparse_result["stdout"]
+            result.update(sparse_result)
+            status = sparse_result.get("status")
+        elif model_obj:
+            status = termination_status(ns)
+            if status is not None:
+                result["status"] = status
+                result["error"] = f"Solver status: {status}"
             try:
-                from pyomo.core import Objective
+                from pyomo.core import Objective, maximize
 
                 objs = [
                     c
@@ -111,10 +170,24 @@ def safe_execute_python_code(code: str) -> dict[str, Any]:
                     obj = objs[0]
                     val = obj()
                     result["objective_name"] = obj.name
+                    result["objective_sense"] = (
+                        "max" if obj.sense == maximize else "min"
+                    )
                     result["objective_value"] = float(val)
             except Exception:
                 result["objective_value"] = "Unknown (not solved)"
 
+        if status in (
+            "infeasible",
+            "unbounded",
+            "infeasible_or_unbounded",
+        ) and _is_model(model_obj):
+            result["diagnosis"] = _diagnose(model_obj, status)
+        elif model_obj:
+            feasibility = _check_feasibility(model_obj)
+            if feasibility is not None:
+                result["feasibility"] = feasibility
+
     except Exception as e:
         result["stdout"] = output_capture.getvalue()
         result["error"] = str(e)
@@ -122,3 +195,39 @@ def safe_execute_python_code(code: str) -> dict[str, Any]:
         shutil.rmtree(tmp_dir, ignore_errors=True)
 
     return result
+
+
+def _is_model(obj: Any) -> bool:
+    """Whether ``obj`` is a :class:`SparseModel` or a Pyomo block."""
+    from src.optimization import SparseModel
+
+    if isinstance(obj, SparseModel):
+        return True
+    try:
+        from pyomo.core.base.block import BlockData
+    except ImportError:
+        return False
+    return isinstance(obj, BlockData)
+
+
+def _diagnose(model: Any, status: str) -> dict[str, Any]:
+    """Conflict set or unbounded ray of a failed model, as a dict."""
+    from src.optimization import diagnose
+
+    try:
+        return diagnose(model, status).to_dict()
+    except Exception as e:
+        return {"status": status, "message": f"Diagnosis failed: {e}"}
+
+
+def _check_feasibility(model: Any) -> dict[str, Any] | None:
+    """Violations of the reported solution, or None if there is none."""
+    from src.optimization import check_solution
+
+    if not _is_model(model):
+        return None
+    try:
+        report = check_solution(model)
+    except Exception as e:
+        return {"feasible": None, "message": f"Check failed: {e}"}
+    return report.to_dict() if report is not None else None
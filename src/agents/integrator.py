@@ -1,10 +1,12 @@
+import ast
 import os
 import subprocess
 import tempfile
+from collections.abc import Callable
 from dataclasses import dataclass
 
 from pydantic import BaseModel
-from pydantic_ai import Agent
+from pydantic_ai import Agent, RunContext
 from pydantic_ai.exceptions import ModelRetry
 
 from .base import get_model
@@ -18,6 +20,9 @@ class IntegratorDeps:
     reformulated_problem: str
     problem_type: ProblemType
     assumptions: list[str]
+    # Called with code that parses, before Ruff runs, e.g. to start
+    # executing it speculatively.
+    on_parsed: Callable[[str], None] | None = None
 
 
 class IntegratorOutput(BaseModel):
@@ -30,8 +35,15 @@ with open("src/instructions/integrator.md", encoding="utf-8") as f:
     integrator_instructions = f.read()
 
 
-def ruff_check(code: str) -> str:
+def ruff_check(ctx: RunContext[IntegratorDeps], code: str) -> str:
     """Run Ruff on generated code and auto-fix issues."""
+    if ctx.deps.on_parsed is not None:
+        try:
+            ast.parse(code)
+        except SyntaxError:
+            pass
+        else:
+            ctx.deps.on_parsed(code)
     with tempfile.NamedTemporaryFile(suffix=".py", delete=False) as tmp:
         tmp.write(code.encode("utf-8"))
         tmp.flush()
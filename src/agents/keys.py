@@ -0,0 +1,120 @@
+"""Pool of Gemini API keys balanced by remaining quota.
+
+Every key has its own quota, so requests are spread across the keys of a
+:class:`KeyPool` before a model tier is given up. :meth:`KeyPool.ranked`
+orders the keys by the quota they have left for a model in the
+:class:`~src.agents.quota.QuotaScheduler`. A key that answered 429 for a
+model cools down and is skipped for it. Every key counts its requests,
+tokens and 429s for monitoring.
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic_ai.models.google import GoogleModel
+from pydantic_ai.providers.google import GoogleProvider
+
+from config import Settings
+
+from .quota import QuotaScheduler, key_id
+
+
+@dataclass(eq=False)
+class ApiKey:
+    """One API key, its provider and its usage counters."""
+
+    provider: GoogleProvider = field(repr=False)
+    id: str
+    requests: int = 0
+    tokens: int = 0
+    rate_limited: int = 0
+    # Model name -> end of its cooldown (monotonic seconds).
+    cooldowns: dict[str, float] = field(default_factory=dict)
+    _models: dict[str, GoogleModel] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_key(cls, api_key: str) -> "ApiKey":
+        return cls(GoogleProvider(api_key=api_key), key_id(api_key))
+
+    def cooling_down(self, model_name: str) -> bool:
+        return time.monotonic() < self.cooldowns.get(model_name, 0.0)
+
+    def model(self, model_name: str) -> GoogleModel:
+        """``model_name`` served with this key."""
+        if model_name not in self._models:
+            self._models[model_name] = GoogleModel(
+                model_name, provider=self.provider
+            )
+        return self._models[model_name]
+
+
+class KeyPool:
+    """API keys that share the load of all sessions.
+
+    A key that answered 429 for a model is skipped for that model for
+    ``cooldown`` seconds; its other models have their own quota.
+    """
+
+    def __init__(
+        self,
+        keys: list[ApiKey],
+        scheduler: QuotaScheduler,
+        cooldown: float = 60.0,
+    ):
+        if not keys:
+            raise ValueError("A key pool needs at least one API key.")
+        self.keys = keys
+        self.scheduler = scheduler
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(
+        cls, settings: Settings, scheduler: QuotaScheduler
+    ) -> "KeyPool":
+        """The system keys: ``gemini_api_keys``, else ``gemini_api_key``."""
+        keys = settings.gemini_api_keys or [settings.gemini_api_key]
+        return cls(
+            [ApiKey.from_key(k) for k in dict.fromkeys(keys)],
+            scheduler,
+            settings.key_cooldown,
+        )
+
+    def ranked(self, model_name: str) -> list[ApiKey]:
+        """Keys not cooling down for a model, most remaining quota first."""
+        available = [k for k in self.keys if not k.cooling_down(model_name)]
+        return sorted(
+            available,
+            key=lambda k: self.scheduler.remaining(model_name, k.id),
+            reverse=True,
+        )
+
+    def succeeded(self, key: ApiKey, tokens: int) -> None:
+        with self._lock:
+            key.requests += 1
+            key.tokens += tokens
+
+    def rate_limited(self, key: ApiKey, model_name: str) -> None:
+        """Cool ``key`` down and make other sessions wait for its quota."""
+        with self._lock:
+            key.rate_limited += 1
+            key.cooldowns[model_name] = time.monotonic() + self.cooldown
+        self.scheduler.exhaust(model_name, key.id)
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """JSON-ready counters of every key, identified by its hash."""
+        with self._lock:
+            return [
+                {
+                    "key": key.id,
+                    "requests": key.requests,
+                    "tokens": key.tokens,
+                    "rate_limited": key.rate_limited,
+                    "cooling_down": sorted(
+                        m for m in key.cooldowns if key.cooling_down(m)
+                    ),
+                }
+                for key in self.keys
+            ]
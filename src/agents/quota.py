@@ -0,0 +1,284 @@
+"""Quota-aware scheduling of Gemini requests.
+
+Gemini limits requests and tokens per minute for every model and API key.
+Instead of discovering the limits through 429 responses,
+:class:`QuotaScheduler` keeps a token bucket for requests and one for
+tokens per (model, key) pair, and makes every request wait for its turn.
+Waiting requests reserve capacity in arrival order, so the calls of all
+sessions are served first come, first served instead of failing.
+
+The buckets live in the process by default. With a SQLite path they are
+shared by every process that uses the same file.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Protocol
+
+import anyio
+
+from config import Settings
+
+# Requests and tokens per minute of the free tier.
+DEFAULT_LIMITS: dict[str, tuple[int, int]] = {
+    "gemini-2.5-flash-lite": (15, 250_000),
+    "gemini-2.5-flash": (10, 250_000),
+    "gemini-3-flash-preview": (10, 250_000),
+    "gemini-3-pro-preview": (5, 125_000),
+}
+FALLBACK_LIMITS = (5, 125_000)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    level REAL NOT NULL,
+    updated REAL NOT NULL
+);
+"""
+
+
+class QuotaWaitTooLong(Exception):
+    """A request would wait more than the scheduler's ``max_wait``."""
+
+    def __init__(self, model: str, wait: float):
+        super().__init__(f"Quota of {model} frees up in {wait:.0f} s.")
+        self.model = model
+        self.wait = wait
+
+
+def key_id(api_key: str) -> str:
+    """Short, non-secret identifier of ``api_key``."""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+def estimate_tokens(messages: list[Any]) -> int:
+    """Rough token count of ``messages``: four characters per token."""
+    chars = 0
+    for message in messages:
+        for part in getattr(message, "parts", ()):
+            content = getattr(part, "content", None)
+            if content is None:
+                content = getattr(part, "args", None)
+            chars += len(str(content or ""))
+    return chars // 4 + 1
+
+
+class Buckets(Protocol):
+    """Storage of bucket levels; ``take`` is atomic."""
+
+    def take(
+        self, name: str, amount: float, capacity: float, rate: float
+    ) -> float: ...
+
+    def give(self, name: str, amount: float, capacity: float) -> None: ...
+
+    def level(self, name: str, capacity: float, rate: float) -> float: ...
+
+
+def _refill(
+    level: float, elapsed: float, capacity: float, rate: float
+) -> float:
+    return min(capacity, level + rate * max(0.0, elapsed))
+
+
+class MemoryBuckets:
+    """Buckets shared by all threads and event loops of the process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._levels: dict[str, tuple[float, float]] = {}
+
+    def take(
+        self, name: str, amount: float, capacity: float, rate: float
+    ) -> float:
+        """Take ``amount`` and return the seconds until it is available.
+
+        The level may go negative: the deficit is the queue of requests
+        that reserved capacity before it refilled.
+        """
+        with self._lock:
+            now = time.monotonic()
+            level, updated = self._levels.get(name, (capacity, now))
+            level = _refill(level, now - updated, capacity, rate) - amount
+            self._levels[name] = (level, now)
+        return max(0.0, -level / rate)
+
+    def give(self, name: str, amount: float, capacity: float) -> None:
+        """Return ``amount``, e.g. of a cancelled or overestimated request."""
+        with self._lock:
+            if name in self._levels:
+                level, updated = self._levels[name]
+                self._levels[name] = (min(capacity, level + amount), updated)
+
+    def level(self, name: str, capacity: float, rate: float) -> float:
+        """Current level; negative while requests wait for the bucket."""
+        with self._lock:
+            now = time.monotonic()
+            level, updated = self._levels.get(name, (capacity, now))
+        return _refill(level, now - updated, capacity, rate)
+
+
+class SqliteBuckets:
+    """Buckets shared by all processes that use the database at ``path``."""
+
+    def __init__(self, path: str | os.PathLike[str]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # The write lock is taken up front so that reading and updating a
+        # bucket is atomic across processes.
+        conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def take(
+        self, name: str, amount: float, capacity: float, rate: float
+    ) -> float:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT level, updated FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+            level, updated = row or (capacity, now)
+            level = _refill(level, now - updated, capacity, rate) - amount
+            conn.execute(
+                "INSERT INTO buckets(name, level, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET level = ?, updated = ?",
+                (name, level, now, level, now),
+            )
+        return max(0.0, -level / rate)
+
+    def give(self, name: str, amount: float, capacity: float) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE buckets SET level = MIN(?, level + ?) WHERE name = ?",
+                (capacity, amount, name),
+            )
+
+    def level(self, name: str, capacity: float, rate: float) -> float:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT level, updated FROM buckets WHERE name = ?", (name,)
+            ).fetchone()
+        level, updated = row or (capacity, now)
+        return _refill(level, now - updated, capacity, rate)
+
+
+class QuotaScheduler:
+    """Per-model, per-key request and token buckets.
+
+    ``limits`` maps model names to requests and tokens per minute;
+    unknown models get :data:`FALLBACK_LIMITS`. :meth:`acquire` raises
+    :class:`QuotaWaitTooLong` instead of waiting more than ``max_wait``
+    seconds, so that the caller can fall back to another model.
+    """
+
+    def __init__(
+        self,
+        limits: dict[str, tuple[int, int]] | None = None,
+        buckets: Buckets | None = None,
+        max_wait: float | None = None,
+    ):
+        self.limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.buckets = buckets or MemoryBuckets()
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self.waited = 0.0
+        self.requests = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "QuotaScheduler":
+        buckets = (
+            SqliteBuckets(settings.quota_db) if settings.quota_db else None
+        )
+        return cls(settings.quota_limits, buckets, settings.quota_max_wait)
+
+    def _buckets(self, model: str, key: str) -> list[tuple[str, float, float]]:
+        rpm, tpm = self.limits.get(model, FALLBACK_LIMITS)
+        return [
+            (f"{key}/{model}/requests", rpm, rpm / 60),
+            (f"{key}/{model}/tokens", tpm, tpm / 60),
+        ]
+
+    async def acquire(
+        self,
+        model: str,
+        key: str,
+        tokens: int,
+        max_wait: float | None = None,
+    ) -> None:
+        """Wait until ``model`` may be sent a request of ``tokens``.
+
+        ``max_wait`` overrides the scheduler's; pass ``float("inf")`` to
+        always wait. If the wait is cancelled the reservation is returned.
+        """
+        limit = self.max_wait if max_wait is None else max_wait
+        taken: list[tuple[str, float, float]] = []
+        wait = 0.0
+        for (name, capacity, rate), amount in zip(
+            self._buckets(model, key), (1, tokens), strict=True
+        ):
+            wait = max(wait, self.buckets.take(name, amount, capacity, rate))
+            taken.append((name, amount, capacity))
+        if limit is not None and wait > limit:
+            self._give(taken)
+            raise QuotaWaitTooLong(model, wait)
+        try:
+            await anyio.sleep(wait)
+        except BaseException:
+            self._give(taken)
+            raise
+        with self._lock:
+            self.waited += wait
+            self.requests += 1
+
+    def remaining(self, model: str, key: str) -> float:
+        """Fraction of the quota of ``model`` and ``key`` that is left.
+
+        The smaller of the request and token fractions; negative while
+        requests are queued for it.
+        """
+        return min(
+            self.buckets.level(name, capacity, rate) / capacity
+            for name, capacity, rate in self._buckets(model, key)
+        )
+
+    def settle(self, model: str, key: str, estimated: int, used: int) -> None:
+        """Correct the token bucket once the actual usage is known."""
+        name, capacity, rate = self._buckets(model, key)[1]
+        if used < estimated:
+            self.buckets.give(name, estimated - used, capacity)
+        elif used > estimated:
+            self.buckets.take(name, used - estimated, capacity, rate)
+
+    def exhaust(self, model: str, key: str) -> None:
+        """Empty the request bucket after a 429, making others wait."""
+        name, capacity, rate = self._buckets(model, key)[0]
+        self.buckets.take(name, capacity, capacity, rate)
+
+    def _give(self, taken: list[tuple[str, float, float]]) -> None:
+        for name, amount, capacity in taken:
+            self.buckets.give(name, amount, capacity)
@@ -0,0 +1,78 @@
+"""Run generated code in a separate, killable process.
+
+:func:`safe_execute_python_code` redirects the process-wide stdout and
+cannot be interrupted, so concurrent or abandoned executions in threads
+interfere with each other. :func:`execute_code` runs it in a child
+process instead: several executions can run at once, and cancelling the
+awaiting task or exceeding ``timeout`` kills the child.
+"""
+
+import multiprocessing
+import sys
+from multiprocessing.connection import Connection
+from typing import Any
+
+import anyio
+import anyio.to_thread
+
+from .base import safe_execute_python_code
+
+# Seconds a worker thread waits for the child's result at a time.
+_POLL_INTERVAL = 0.1
+
+
+def _context() -> multiprocessing.context.BaseContext:
+    # A fork server keeps children cheap without forking the threads of
+    # the serving process (Streamlit, the event-loop runner).
+    if sys.platform == "win32":
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload([__name__])
+    return context
+
+
+def _child(conn: Connection, code: str, data: dict[str, Any] | None) -> None:
+    try:
+        conn.send(safe_execute_python_code(code, data=data))
+    except BaseException as e:
+        conn.send({"stdout": "", "error": f"Sandbox failed: {e}"})
+    finally:
+        conn.close()
+
+
+async def execute_code(
+    code: str,
+    data: dict[str, Any] | None = None,
+    timeout: float | None = None,
+) -> dict[str, Any]:
+    """Execute ``code`` like :func:`safe_execute_python_code`, in a child.
+
+    Raises ``TimeoutError`` after ``timeout`` seconds; the child is
+    killed on timeout and on cancellation.
+    """
+    context = _context()
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, code, data))
+    process.start()
+    sender.close()
+    try:
+        with anyio.fail_after(timeout):
+            # Short polls, so that cancellation is seen between them and
+            # no thread is left polling the pipe when it is closed.
+            while not await anyio.to_thread.run_sync(
+                receiver.poll, _POLL_INTERVAL
+            ):
+                pass
+        try:
+            return receiver.recv()
+        except EOFError:
+            process.join()
+            return {
+                "stdout": "",
+                "error": f"Sandbox exited with code {process.exitcode}.",
+            }
+    finally:
+        if process.is_alive():
+            process.kill()
+        process.join()
+        receiver.close()
@@ -1,7 +1,10 @@
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 from typing import Any
 
+import anyio.to_thread
 from pydantic import BaseModel
+from pydantic.json_schema import SkipJsonSchema
 from pydantic_ai import Agent, RunContext
 
 from .base import get_model, safe_execute_python_code
@@ -12,6 +15,10 @@ class ValidatorDeps:
     code: str | None = None
     results: dict[str, Any] | None = None
     logs: str | None = None
+    data: dict[str, Any] | None = None
+    # Executes the code, e.g. in a killable sandbox process; without it
+    # the code runs in a worker thread.
+    execute: Callable[[str], Awaitable[dict[str, Any]]] | None = None
 
 
 class ValidatorOutput(BaseModel):
@@ -20,6 +27,11 @@ class ValidatorOutput(BaseModel):
     error: str | None = None
     objective_name: str | None = None
     objective_value: Any | None = None
+    # Results of the deterministic checks, attached by the pipeline after
+    # the agent returns; hidden from the schema the model fills.
+    diagnosis: SkipJsonSchema[str | None] = None
+    max_violation: SkipJsonSchema[float | None] = None
+    feasibility: SkipJsonSchema[str | None] = None
 
 
 with open("src/instructions/validator.md") as f:
@@ -39,7 +51,16 @@ class ValidatorAgent:
         )
 
         @self.agent.tool()
-        def run_and_validate_code(
+        async def run_and_validate_code(
             ctx: RunContext[ValidatorDeps],
         ) -> dict[str, Any]:
-            return safe_execute_python_code(ctx.deps.code or "")
+            if ctx.deps.results is not None:
+                return ctx.deps.results  # executed before, e.g. on resume
+            code = ctx.deps.code or ""
+            if ctx.deps.execute is not None:
+                ctx.deps.results = await ctx.deps.execute(code)
+            else:
+                ctx.deps.results = await anyio.to_thread.run_sync(
+                    safe_execute_python_code, code, ctx.deps.data
+                )
+            return ctx.deps.results
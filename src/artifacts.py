@@ -0,0 +1,273 @@
+"""Content-addressed store for pipeline artifacts.
+
+Generated code, execution results and stage outputs are saved as immutable
+blobs named by their SHA-256 digest. A SQLite index records which run
+produced each blob and for which reformulated problem, so concurrent
+sessions never overwrite each other and later runs can look up prior work.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from pydantic import BaseModel
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    digest TEXT NOT NULL REFERENCES objects(digest),
+    kind TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    problem_key TEXT,
+    created_at REAL NOT NULL,
+    metadata TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS artifacts_problem
+    ON artifacts(problem_key, kind, created_at);
+CREATE INDEX IF NOT EXISTS artifacts_run ON artifacts(run_id);
+"""
+
+
+def content_digest(data: bytes) -> str:
+    """Return the hex SHA-256 digest of ``data``."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def problem_key(problem: str) -> str:
+    """Return a whitespace-insensitive key for a reformulated problem."""
+    normalized = " ".join(problem.split())
+    return content_digest(normalized.encode("utf-8"))
+
+
+def new_run_id() -> str:
+    """Return a fresh identifier for one pipeline run."""
+    return uuid.uuid4().hex
+
+
+def _serialize(content: Any) -> bytes:
+    if isinstance(content, bytes):
+        return content
+    if isinstance(content, str):
+        return content.encode("utf-8")
+    if isinstance(content, BaseModel):
+        content = content.model_dump(mode="json")
+    return json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """Index entry describing one stored artifact."""
+
+    digest: str
+    kind: str
+    run_id: str
+    problem_key: str | None
+    size: int
+    created_at: float
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+class ArtifactStore:
+    """Size-bounded, content-addressed artifact store with LRU eviction."""
+
+    def __init__(
+        self,
+        root: str | os.PathLike[str] = ".artifacts",
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.root / "index.sqlite"
+        self.max_bytes = max_bytes
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def _write_blob(self, digest: str, data: bytes) -> None:
+        path = self._object_path(digest)
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a private temp file first so readers never see partial
+        # blobs; identical content from concurrent runs lands on one name.
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    # --- Writing ---
+    def put(
+        self,
+        kind: str,
+        content: Any,
+        *,
+        run_id: str,
+        problem: str | None = None,
+        metadata: dict[str, Any] | None = None,
+    ) -> Artifact:
+        """Store ``content`` and index it under ``kind`` for ``run_id``.
+
+        Strings and bytes are stored verbatim; pydantic models and other
+        JSON-serializable values are stored as canonical JSON.
+        """
+        data = _serialize(content)
+        digest = content_digest(data)
+        self._write_blob(digest, data)
+
+        now = time.time()
+        key = problem_key(problem) if problem is not None else None
+        meta = metadata or {}
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO objects(digest, size, last_access) "
+                "VALUES (?, ?, ?) "
+                "ON CONFLICT(digest) DO UPDATE SET last_access = ?",
+                (digest, len(data), now, now),
+            )
+            conn.execute(
+                "INSERT INTO artifacts"
+                "(digest, kind, run_id, problem_key, created_at, metadata) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, kind, run_id, key, now, json.dumps(meta)),
+            )
+        self.evict()
+        return Artifact(digest, kind, run_id, key, len(data), now, meta)
+
+    # --- Reading ---
+    def get(self, digest: str) -> bytes | None:
+        """Return the raw bytes of an artifact, or ``None`` if evicted."""
+        try:
+            data = self._object_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE objects SET last_access = ? WHERE digest = ?",
+                (time.time(), digest),
+            )
+        return data
+
+    def get_text(self, digest: str) -> str | None:
+        data = self.get(digest)
+        return data.decode("utf-8") if data is not None else None
+
+    def get_json(self, digest: str) -> Any:
+        data = self.get(digest)
+        return json.loads(data) if data is not None else None
+
+    def find(
+        self, problem: str, kind: str, **metadata: Any
+    ) -> Artifact | None:
+        """Return the newest ``kind`` artifact stored for ``problem``.
+
+        Keyword arguments further require matching metadata values, e.g.
+        ``store.find(problem, "code", success=True)``.
+        """
+        for artifact in self.history(problem, kind):
+            if all(artifact.metadata.get(k) == v for k, v in metadata.items()):
+                return artifact
+        return None
+
+    def history(self, problem: str, kind: str | None = None) -> list[Artifact]:
+        """Return artifacts stored for ``problem``, newest first."""
+        query = (
+            "SELECT a.digest, a.kind, a.run_id, a.problem_key, o.size, "
+            "a.created_at, a.metadata FROM artifacts a "
+            "JOIN objects o ON o.digest = a.digest WHERE a.problem_key = ?"
+        )
+        params: list[Any] = [problem_key(problem)]
+        if kind is not None:
+            query += " AND a.kind = ?"
+            params.append(kind)
+        query += " ORDER BY a.created_at DESC, a.id DESC"
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._row_to_artifact(row) for row in rows]
+
+    def run(self, run_id: str) -> list[Artifact]:
+        """Return all artifacts produced by ``run_id`` in creation order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT a.digest, a.kind, a.run_id, a.problem_key, o.size, "
+                "a.created_at, a.metadata FROM artifacts a "
+                "JOIN objects o ON o.digest = a.digest WHERE a.run_id = ? "
+                "ORDER BY a.id",
+                (run_id,),
+            ).fetchall()
+        return [self._row_to_artifact(row) for row in rows]
+
+    @staticmethod
+    def _row_to_artifact(row: tuple) -> Artifact:
+        digest, kind, run_id, key, size, created_at, metadata = row
+        return Artifact(
+            digest, kind, run_id, key, size, created_at, json.loads(metadata)
+        )
+
+    # --- Housekeeping ---
+    def total_bytes(self) -> int:
+        with self._connect() as conn:
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM objects"
+            ).fetchone()
+        return int(total)
+
+    def evict(self) -> int:
+        """Drop least recently used blobs until under ``max_bytes``.
+
+        Returns the number of evicted blobs.
+        """
+        evicted: list[str] = []
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM objects"
+            ).fetchone()
+            if total <= self.max_bytes:
+                return 0
+            rows = conn.execute(
+                "SELECT digest, size FROM objects ORDER BY last_access"
+            ).fetchall()
+            for digest, size in rows:
+                if total <= self.max_bytes:
+                    break
+                conn.execute(
+                    "DELETE FROM artifacts WHERE digest = ?", (digest,)
+                )
+                conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                total -= size
+                evicted.append(digest)
+        for digest in evicted:
+            self._object_path(digest).unlink(missing_ok=True)
+        return len(evicted)
@@ -0,0 +1,55 @@
+from .metrics import StepMetrics, step_metrics
+from .mpc import LinearMPC, MPCSimulation, MPCStep
+from .plants import (
+    Plant,
+    as_plant,
+    as_state_space,
+    clear_plant_cache,
+    plant,
+    plant_cache_info,
+    plant_coefficients,
+)
+from .simulation import BatchResponse, simulate_pid_batch
+from .stability import (
+    pid_characteristic_polynomials,
+    roots_stable,
+    routh_hurwitz_stable,
+    screen_pid_candidates,
+)
+from .tuning import (
+    PIDObjective,
+    StartResult,
+    TuningResult,
+    start_points,
+    tune_pid_multistart,
+)
+from .warmstart import WarmStart, WarmStartStore, plant_signature
+
+__all__ = [
+    "BatchResponse",
+    "LinearMPC",
+    "MPCSimulation",
+    "MPCStep",
+    "PIDObjective",
+    "Plant",
+    "StartResult",
+    "StepMetrics",
+    "TuningResult",
+    "WarmStart",
+    "WarmStartStore",
+    "as_plant",
+    "as_state_space",
+    "clear_plant_cache",
+    "pid_characteristic_polynomials",
+    "plant",
+    "plant_cache_info",
+    "plant_coefficients",
+    "plant_signature",
+    "roots_stable",
+    "routh_hurwitz_stable",
+    "screen_pid_candidates",
+    "simulate_pid_batch",
+    "start_points",
+    "step_metrics",
+    "tune_pid_multistart",
+]
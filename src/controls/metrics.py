@@ -0,0 +1,97 @@
+"""Vectorized step-response metrics for batches of responses.
+
+The definitions follow ``control.step_info`` (final value taken from the
+last sample, 10-90 % rise time, band-based settling time) but operate on a
+whole ``(n_responses, n_samples)`` array in one pass.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+
+@dataclass
+class StepMetrics:
+    """Per-response step metrics, each an array of shape ``(n,)``.
+
+    Responses whose final value is zero or not finite get ``inf`` for the
+    time-domain metrics so that penalty terms built on them stay ordered.
+    """
+
+    overshoot: np.ndarray
+    rise_time: np.ndarray
+    settling_time: np.ndarray
+    steady_state_error: np.ndarray
+    peak_control: np.ndarray
+
+
+def _first_true(mask: np.ndarray) -> np.ndarray:
+    """Index of the first ``True`` per row (0 for rows without any)."""
+    return np.argmax(mask, axis=1)
+
+
+def step_metrics(
+    t: ArrayLike,
+    y: ArrayLike,
+    u: ArrayLike | None = None,
+    reference: float = 1.0,
+    settling_threshold: float = 0.02,
+    rise_limits: tuple[float, float] = (0.1, 0.9),
+) -> StepMetrics:
+    """Compute step metrics for every row of ``y``.
+
+    Args:
+        t: Sample times, shape ``(n_samples,)``.
+        y: Output responses, shape ``(n_responses, n_samples)``.
+        u: Optional control signals of the same shape as ``y``; used for
+            the peak control effort ``max |u|``.
+        reference: Step amplitude used for the steady-state error.
+        settling_threshold: Relative band for the settling time (2 %).
+        rise_limits: Fractions of the final value bounding the rise time.
+
+    Returns:
+        A :class:`StepMetrics` with overshoot in percent, rise and settling
+        times in the units of ``t``, steady-state error
+        ``reference - y_final`` and peak control effort (``nan`` without
+        ``u``).
+    """
+    t = np.asarray(t, dtype=float)
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    n, k = y.shape
+
+    final = y[:, -1]
+    valid = np.isfinite(final) & (final != 0)
+    # Work on the response normalized by its final value: every threshold
+    # of ``step_info`` becomes a comparison against a constant, and the
+    # sign of the final value drops out.
+    with np.errstate(invalid="ignore", over="ignore"):
+        z = y * (1.0 / np.where(valid, final, 1.0))[:, None]
+
+    lo, hi = rise_limits
+    rise_time = t[_first_true(z >= hi)] - t[_first_true(z >= lo)]
+
+    outside = np.abs(z - 1.0) >= settling_threshold
+    last_outside = k - 1 - _first_true(outside[:, ::-1])
+    settled = np.where(outside.any(axis=1), last_outside + 1, 0)
+    settling_time = np.where(
+        settled < k, t[np.minimum(settled, k - 1)], np.inf
+    )
+
+    overshoot = np.maximum(100.0 * (z.max(axis=1) - 1.0), 0.0)
+
+    if u is None:
+        peak_control = np.full(n, np.nan)
+    else:
+        with np.errstate(invalid="ignore"):
+            peak_control = np.max(np.abs(np.atleast_2d(u)), axis=1)
+
+    return StepMetrics(
+        overshoot=np.where(valid, overshoot, np.inf),
+        rise_time=np.where(valid, rise_time, np.inf),
+        settling_time=np.where(valid, settling_time, np.inf),
+        steady_state_error=np.where(
+            np.isfinite(final), reference - final, np.inf
+        ),
+        peak_control=peak_control,
+    )
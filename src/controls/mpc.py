@@ -0,0 +1,451 @@
+"""Receding-horizon linear MPC with warm-started QP solves.
+
+The prediction model is condensed once: over a horizon of ``N`` steps the
+outputs are affine in the stacked input sequence, so the quadratic cost
+Hessian and the constraint matrix do not change between steps. Only the
+linear term and the constraint bounds depend on the current state,
+reference and previous input.
+
+Each step first tries the unconstrained minimizer, a single triangular
+solve with a precomputed Cholesky factor. If that violates a bound, the
+QP is solved with an OSQP-style ADMM iteration on the Ruiz-equilibrated
+problem. Its KKT matrix is factorized once per penalty value and cached,
+and each solve starts from the previous solution and duals shifted by one
+step.
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike
+from scipy.linalg import cho_factor, cho_solve
+
+from .plants import PlantLike, as_plant
+
+
+def _per_step(
+    value: ArrayLike | None, size: int, horizon: int, fill: float
+) -> np.ndarray:
+    """Broadcast a scalar or per-channel value over the horizon."""
+    if value is None:
+        value = fill
+    v = np.broadcast_to(np.asarray(value, dtype=float), (size,))
+    return np.tile(v, horizon)
+
+
+@dataclass
+class MPCStep:
+    """Result of one receding-horizon solve."""
+
+    u: np.ndarray
+    inputs: np.ndarray
+    predicted: np.ndarray
+    status: str
+    iterations: int
+    solve_time: float
+
+
+@dataclass
+class MPCSimulation:
+    """Closed-loop trajectories and per-step solver statistics.
+
+    ``x`` and ``y`` have one more row than ``u`` (the final state);
+    ``solve_time`` and ``iterations`` have one entry per step.
+    """
+
+    t: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    u: np.ndarray
+    reference: np.ndarray
+    solve_time: np.ndarray
+    iterations: np.ndarray
+    status: list[str]
+
+    def latency(self) -> dict[str, float]:
+        """Per-step solve latency statistics in seconds."""
+        st = self.solve_time
+        return {
+            "mean": float(st.mean()),
+            "p50": float(np.percentile(st, 50)),
+            "p99": float(np.percentile(st, 99)),
+            "max": float(st.max()),
+        }
+
+    def summary(self) -> str:
+        lat = self.latency()
+        return (
+            f"{len(self.u)} steps, solve latency mean "
+            f"{lat['mean'] * 1e3:.3f} ms, p99 {lat['p99'] * 1e3:.3f} ms, "
+            f"max {lat['max'] * 1e3:.3f} ms, "
+            f"{self.iterations.mean():.1f} ADMM iterations/step"
+        )
+
+
+class LinearMPC:
+    """Output-tracking MPC for ``x[k+1] = A x[k] + B u[k]``, ``y = C x``.
+
+    The cost over ``horizon`` steps is::
+
+        sum_k (y[k] - r[k])' Q (y[k] - r[k]) + u[k]' R u[k]
+              + du[k]' S du[k]
+
+    with ``du[k] = u[k] - u[k-1]``, subject to optional input, input-rate
+    and output bounds. Weights and bounds are scalars or per-channel
+    vectors. With ``r=0`` (the default) and ``r_rate > 0`` the controller
+    tracks constant references without offset on the nominal model.
+
+    Args:
+        A, B, C: Discrete-time model matrices.
+        horizon: Prediction and control horizon ``N``.
+        q, r, r_rate: Diagonal output, input and input-rate weights.
+        u_min, u_max: Input bounds.
+        du_max: Symmetric bound on the input change per step.
+        y_min, y_max: Output bounds (soft feasibility is not provided; the
+            ADMM iteration returns its best iterate if they conflict).
+        rho: Initial ADMM penalty; ``None`` picks ``sqrt(λmin λmax)`` of
+            the scaled Hessian.
+        sigma, alpha: ADMM regularization and relaxation parameters.
+        max_iter, eps_abs, eps_rel: ADMM termination settings.
+        check_interval: Iterations between termination checks.
+        adapt_interval: Iterations between penalty updates (a multiple of
+            ``check_interval``).
+        dt: Sample time, used for the time axis of :meth:`simulate`.
+    """
+
+    def __init__(
+        self,
+        A: ArrayLike,
+        B: ArrayLike,
+        C: ArrayLike,
+        horizon: int = 20,
+        q: ArrayLike = 1.0,
+        r: ArrayLike = 0.0,
+        r_rate: ArrayLike = 0.1,
+        u_min: ArrayLike | None = None,
+        u_max: ArrayLike | None = None,
+        du_max: ArrayLike | None = None,
+        y_min: ArrayLike | None = None,
+        y_max: ArrayLike | None = None,
+        rho: float | None = None,
+        sigma: float = 1e-6,
+        alpha: float = 1.6,
+        max_iter: int = 4000,
+        eps_abs: float = 1e-6,
+        eps_rel: float = 1e-6,
+        check_interval: int = 5,
+        adapt_interval: int = 25,
+        dt: float = 1.0,
+    ):
+        A = np.atleast_2d(np.asarray(A, dtype=float))
+        B = np.asarray(B, dtype=float).reshape(len(A), -1)
+        C = np.asarray(C, dtype=float).reshape(-1, len(A))
+        n, m, p, N = len(A), B.shape[1], len(C), int(horizon)
+        if N < 1:
+            raise ValueError("horizon must be at least 1.")
+        self.A, self.B, self.C = A, B, C
+        self.n, self.m, self.p, self.horizon = n, m, p, N
+        self.dt = float(dt)
+        self.alpha, self.sigma = alpha, sigma
+        self.max_iter, self.eps_abs, self.eps_rel = max_iter, eps_abs, eps_rel
+        self.check_interval = check_interval
+        self.adapt_interval = adapt_interval
+
+        # Condensed prediction Y = Psi x0 + Theta U.
+        powers = [np.eye(n)]
+        for _ in range(N):
+            powers.append(A @ powers[-1])
+        Psi = np.vstack([C @ powers[k] for k in range(1, N + 1)])
+        Theta = np.zeros((N * p, N * m))
+        for k in range(N):
+            for j in range(k + 1):
+                Theta[k * p : (k + 1) * p, j * m : (j + 1) * m] = (
+                    C @ powers[k - j] @ B
+                )
+        self.Psi, self.Theta = Psi, Theta
+
+        Q = _per_step(q, p, N, 1.0)
+        R = _per_step(r, m, N, 0.0)
+        S = _per_step(r_rate, m, N, 0.0)
+        # Input differences: D U - E u_prev with E selecting the first block.
+        D = np.eye(N * m) - np.eye(N * m, k=-m)
+        E = np.zeros((N * m, m))
+        E[:m] = np.eye(m)
+        self.D, self.E = D, E
+        QTheta = Q[:, None] * Theta
+        self.H = Theta.T @ QTheta + np.diag(R) + D.T @ (S[:, None] * D)
+        self._f_x = QTheta.T @ Psi
+        self._f_r = -QTheta.T
+        self._f_u = -D.T @ (S[:, None] * E)
+        self._H_factor = cho_factor(self.H)
+
+        # Constraint rows l <= G U <= h; the state-dependent parts of the
+        # bounds are added per solve.
+        blocks, lower, upper, shifts = [], [], [], []
+        if u_min is not None or u_max is not None:
+            blocks.append(np.eye(N * m))
+            lower.append(_per_step(u_min, m, N, -np.inf))
+            upper.append(_per_step(u_max, m, N, np.inf))
+            shifts.append(("input", m))
+        if du_max is not None:
+            bound = _per_step(du_max, m, N, np.inf)
+            blocks.append(D)
+            lower.append(-bound)
+            upper.append(bound)
+            shifts.append(("rate", m))
+        if y_min is not None or y_max is not None:
+            blocks.append(Theta)
+            lower.append(_per_step(y_min, p, N, -np.inf))
+            upper.append(_per_step(y_max, p, N, np.inf))
+            shifts.append(("output", p))
+        self.constrained = bool(blocks)
+        self._shifts = shifts
+        if self.constrained:
+            self.G = np.vstack(blocks)
+            self._lower = np.concatenate(lower)
+            self._upper = np.concatenate(upper)
+            self._equilibrate()
+            if rho is None:
+                eig = np.linalg.eigvalsh(self._Hs)
+                rho = float(np.sqrt(max(eig[0], 1e-12) * eig[-1]))
+            self._initial_rho = rho
+            self._kkt_factors: dict[float, tuple] = {}
+        self.reset()
+
+    def _equilibrate(self, iterations: int = 15) -> None:
+        """Ruiz-scale variables and constraint rows of the QP.
+
+        ADMM converges slowly on the condensed Hessian, whose entries
+        span orders of magnitude. The solver works on ``U = Dv Us`` with
+        rows scaled by ``Ec``, so that every column of the KKT matrix
+        ``[[H, G'], [G, 0]]`` has unit infinity norm.
+        """
+        H, G = self.H, self.G
+        dv, ec = np.ones(len(H)), np.ones(len(G))
+        for _ in range(iterations):
+            Hs = dv[:, None] * H * dv
+            Gs = ec[:, None] * G * dv
+            col = np.maximum(np.abs(Hs).max(axis=0), np.abs(Gs).max(axis=0))
+            row = np.abs(Gs).max(axis=1)
+            dv = dv / np.sqrt(np.where(col > 0, col, 1.0))
+            ec = ec / np.sqrt(np.where(row > 0, row, 1.0))
+        self._dv, self._ec = dv, ec
+        self._Hs = dv[:, None] * H * dv
+        self._Gs = ec[:, None] * G * dv
+
+    def _kkt_factor(self, rho: float) -> tuple:
+        """Cached factor of ``Hs + sigma I + rho Gs' Gs`` for ``rho``."""
+        factor = self._kkt_factors.get(rho)
+        if factor is None:
+            Gs = self._Gs
+            factor = cho_factor(
+                self._Hs + self.sigma * np.eye(len(Gs.T)) + rho * Gs.T @ Gs
+            )
+            self._kkt_factors[rho] = factor
+        return factor
+
+    @classmethod
+    def from_plant(
+        cls, plant: PlantLike, dt: float, **kwargs: object
+    ) -> "LinearMPC":
+        """Build the MPC for a strictly proper SISO plant sampled at ``dt``.
+
+        The zero-order-hold model comes from the plant cache, so repeated
+        construction for the same plant does not re-discretize it.
+        """
+        p = as_plant(plant)
+        _, _, C, D = p.state_space()
+        if D != 0:
+            raise ValueError("MPC requires a strictly proper plant.")
+        Ad, Bd = p.transition(dt)
+        return cls(Ad, Bd, C, dt=dt, **kwargs)
+
+    def reset(self) -> None:
+        """Forget the warm-start data of the previous solve."""
+        self._U: np.ndarray | None = None
+        self._y: np.ndarray | None = None
+        if self.constrained:
+            self.rho = self._initial_rho
+
+    def _shift(self, v: np.ndarray, width: int) -> np.ndarray:
+        return np.concatenate([v[width:], v[-width:]])
+
+    def _warm_start(self) -> tuple[np.ndarray, np.ndarray]:
+        U = self._shift(self._U, self.m)
+        parts, start = [], 0
+        for _, width in self._shifts:
+            size = width * self.horizon
+            parts.append(self._shift(self._y[start : start + size], width))
+            start += size
+        return U, np.concatenate(parts)
+
+    def _reference(self, reference: ArrayLike) -> np.ndarray:
+        ref = np.asarray(reference, dtype=float)
+        if ref.ndim == 0 or ref.shape == (self.p,):
+            return np.tile(np.broadcast_to(ref, (self.p,)), self.horizon)
+        ref = ref.reshape(-1, self.p)[: self.horizon]
+        # Hold the last reference value beyond the provided preview.
+        pad = np.repeat(ref[-1:], self.horizon - len(ref), axis=0)
+        return np.concatenate([ref, pad]).ravel()
+
+    def solve(
+        self,
+        x: ArrayLike,
+        reference: ArrayLike = 0.0,
+        u_prev: ArrayLike | None = None,
+    ) -> MPCStep:
+        """Optimal input sequence from state ``x``.
+
+        ``reference`` is a constant (scalar or per output) or a preview of
+        shape ``(k, p)``; the last row is held to the end of the horizon.
+        ``u_prev`` is the input applied in the previous step (zero if
+        omitted) and enters the rate weight and bound.
+        """
+        started = time.perf_counter()
+        x = np.asarray(x, dtype=float).ravel()
+        u_prev = np.zeros(self.m) if u_prev is None else u_prev
+        u_prev = np.broadcast_to(np.asarray(u_prev, dtype=float), (self.m,))
+        f = (
+            self._f_x @ x
+            + self._f_r @ self._reference(reference)
+            + self._f_u @ u_prev
+        )
+
+        U = cho_solve(self._H_factor, -f)
+        status, iterations = "unconstrained", 0
+        if self.constrained:
+            offset = self._constraint_offset(x, u_prev)
+            lower, upper = self._lower - offset, self._upper - offset
+            GU = self.G @ U
+            if np.any(GU < lower - self.eps_abs) or np.any(
+                GU > upper + self.eps_abs
+            ):
+                U, status, iterations = self._admm(f, lower, upper)
+            else:
+                status = "optimal"
+                self._y = np.zeros(len(self.G))
+        self._U = U
+        predicted = self.Psi @ x + self.Theta @ U
+        return MPCStep(
+            u=U[: self.m].copy(),
+            inputs=U.reshape(self.horizon, self.m),
+            predicted=predicted.reshape(self.horizon, self.p),
+            status=status,
+            iterations=iterations,
+            solve_time=time.perf_counter() - started,
+        )
+
+    def _constraint_offset(
+        self, x: np.ndarray, u_prev: np.ndarray
+    ) -> np.ndarray:
+        parts = []
+        for kind, _ in self._shifts:
+            if kind == "input":
+                parts.append(np.zeros(self.horizon * self.m))
+            elif kind == "rate":
+                parts.append(-self.E @ u_prev)
+            else:
+                parts.append(self.Psi @ x)
+        return np.concatenate(parts)
+
+    def _admm(
+        self, f: np.ndarray, lower: np.ndarray, upper: np.ndarray
+    ) -> tuple[np.ndarray, str, int]:
+        Hs, Gs, dv, ec = self._Hs, self._Gs, self._dv, self._ec
+        sigma, alpha = self.sigma, self.alpha
+        fs, lower, upper = dv * f, ec * lower, ec * upper
+        if self._U is None or self._y is None:
+            U, y = np.zeros(len(f)), np.zeros(len(Gs))
+        else:
+            U, y = self._warm_start()
+            U, y = U / dv, y / ec
+        z = np.clip(Gs @ U, lower, upper)
+        rho, status = self.rho, "solved"
+        factor = self._kkt_factor(rho)
+        for it in range(1, self.max_iter + 1):
+            U_tilde = cho_solve(factor, sigma * U - fs + Gs.T @ (rho * z - y))
+            z_tilde = Gs @ U_tilde
+            U = alpha * U_tilde + (1 - alpha) * U
+            z_relaxed = alpha * z_tilde + (1 - alpha) * z
+            z_new = np.clip(z_relaxed + y / rho, lower, upper)
+            y = y + rho * (z_relaxed - z_new)
+            z = z_new
+
+            if it % self.check_interval:
+                continue
+            # Residuals of the unscaled problem.
+            GU, z_u = (Gs @ U) / ec, z / ec
+            HU, Gy = (Hs @ U) / dv, (Gs.T @ y) / dv
+            primal = np.max(np.abs(GU - z_u))
+            dual = np.max(np.abs(HU + f + Gy))
+            primal_scale = max(np.max(np.abs(GU)), np.max(np.abs(z_u)))
+            dual_scale = max(
+                np.max(np.abs(HU)), np.max(np.abs(Gy)), np.max(np.abs(f))
+            )
+            if (
+                primal <= self.eps_abs + self.eps_rel * primal_scale
+                and dual <= self.eps_abs + self.eps_rel * dual_scale
+            ):
+                break
+            if it % self.adapt_interval == 0:
+                # Balance the relative residuals; round rho to a power of
+                # sqrt(10) so that factorizations are reused across steps.
+                ratio = (primal / max(primal_scale, 1e-12)) / (
+                    dual / max(dual_scale, 1e-12) + 1e-30
+                )
+                new_rho = float(
+                    10.0 ** (np.round(2 * np.log10(rho * ratio**0.5)) / 2)
+                )
+                new_rho = min(max(new_rho, 1e-6), 1e6)
+                if new_rho != rho:
+                    rho, factor = new_rho, self._kkt_factor(new_rho)
+        else:
+            it, status = self.max_iter, "max_iter"
+        # Consecutive QPs are similar; start the next one from this rho.
+        self.rho = rho
+        self._y = y * ec
+        return U * dv, status, it
+
+    def simulate(
+        self,
+        reference: ArrayLike,
+        steps: int,
+        x0: ArrayLike | None = None,
+        u0: ArrayLike | None = None,
+    ) -> MPCSimulation:
+        """Run the controller in closed loop on its own model.
+
+        ``reference`` is a constant or a trajectory of shape ``(k, p)``;
+        at every step the controller sees the next ``horizon`` samples as
+        preview, with the last sample held.
+        """
+        ref = np.asarray(reference, dtype=float)
+        if ref.ndim == 0 or ref.shape == (self.p,):
+            ref = np.tile(np.broadcast_to(ref, (self.p,)), (steps, 1))
+        ref = ref.reshape(-1, self.p)
+        x = np.zeros(self.n) if x0 is None else np.asarray(x0, dtype=float)
+        u = np.zeros(self.m) if u0 is None else np.asarray(u0, dtype=float)
+
+        self.reset()
+        xs, us, times, iters, status = [x], [], [], [], []
+        for k in range(steps):
+            step = self.solve(x, ref[min(k, len(ref) - 1) :], u)
+            u = step.u
+            x = self.A @ x + self.B @ u
+            xs.append(x)
+            us.append(u)
+            times.append(step.solve_time)
+            iters.append(step.iterations)
+            status.append(step.status)
+        X = np.array(xs)
+        return MPCSimulation(
+            t=np.arange(steps + 1) * self.dt,
+            x=X,
+            y=X @ self.C.T,
+            u=np.array(us),
+            reference=ref[np.minimum(np.arange(steps), len(ref) - 1)],
+            solve_time=np.array(times),
+            iterations=np.array(iters),
+            status=status,
+        )
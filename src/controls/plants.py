@@ -0,0 +1,210 @@
+"""Cached plant models shared by the control toolbox.
+
+Tuning loops evaluate the same plant thousands of times. Plants are keyed
+on their normalized transfer-function coefficients, and realizations,
+discretizations and matrix exponentials are memoized in bounded LRU
+caches, so only the first evaluation pays for ``control`` conversions.
+:func:`plant` is the supported way for generated code to build plants.
+"""
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from typing import Any
+
+import control
+import numpy as np
+from numpy.typing import ArrayLike
+from scipy.linalg import expm
+
+PLANT_CACHE_SIZE = 256
+
+Coefficients = tuple[float, ...]
+
+
+def _readonly(*arrays: np.ndarray) -> tuple[np.ndarray, ...]:
+    for a in arrays:
+        a.flags.writeable = False
+    return arrays
+
+
+def normalize_coefficients(
+    num: ArrayLike, den: ArrayLike
+) -> tuple[Coefficients, Coefficients]:
+    """Trim leading zeros and scale so that ``den`` is monic."""
+    num = np.trim_zeros(np.atleast_1d(np.asarray(num, dtype=float)), "f")
+    den = np.trim_zeros(np.atleast_1d(np.asarray(den, dtype=float)), "f")
+    if den.size == 0:
+        raise ValueError("Denominator must not be zero.")
+    if num.size == 0:
+        num = np.zeros(1)
+    scale = den[0]
+    return tuple((num / scale).tolist()), tuple((den / scale).tolist())
+
+
+@dataclass(frozen=True)
+class Plant:
+    """Continuous-time SISO plant ``num(s) / den(s)`` with cached views.
+
+    Instances are hashable and compare equal for equivalent coefficients;
+    build them with :func:`plant`.
+    """
+
+    num: Coefficients
+    den: Coefficients
+
+    @cached_property
+    def tf(self) -> control.TransferFunction:
+        return control.tf(list(self.num), list(self.den))
+
+    def state_space(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+        """Controllable-canonical realization ``(A, B, C, D)``."""
+        return _realization(self.num, self.den)
+
+    def c2d(self, dt: float, method: str = "zoh") -> control.StateSpace:
+        """Discrete-time state-space model for sample time ``dt``.
+
+        The returned object is shared between callers; do not mutate it.
+        """
+        return _discretization(self.num, self.den, float(dt), method)
+
+    def transition(self, dt: float) -> tuple[np.ndarray, np.ndarray]:
+        """Zero-order-hold pair ``(Ad, Bd) = (e^{A dt}, ∫ e^{A t} B dt)``."""
+        return _transition(self.num, self.den, float(dt))
+
+
+PlantLike = (
+    Plant
+    | control.TransferFunction
+    | control.StateSpace
+    | tuple[Sequence[float], Sequence[float]]
+)
+
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def _plant(num: Coefficients, den: Coefficients) -> Plant:
+    return Plant(*normalize_coefficients(num, den))
+
+
+def plant(num: ArrayLike, den: ArrayLike) -> Plant:
+    """Return the cached :class:`Plant` for ``num(s) / den(s)``.
+
+    Coefficients are in descending powers of ``s``, e.g.
+    ``plant([1], [1, 3, 2])`` for ``1 / (s² + 3s + 2)``.
+    """
+    return _plant(
+        tuple(np.atleast_1d(np.asarray(num, dtype=float)).tolist()),
+        tuple(np.atleast_1d(np.asarray(den, dtype=float)).tolist()),
+    )
+
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def _realization(
+    num: Coefficients, den: Coefficients
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    sys = control.ss(control.tf(list(num), list(den)))
+    A, B, C = _readonly(
+        np.asarray(sys.A, dtype=float),
+        np.asarray(sys.B, dtype=float).ravel(),
+        np.asarray(sys.C, dtype=float).ravel(),
+    )
+    return A, B, C, float(np.asarray(sys.D).item())
+
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def _discretization(
+    num: Coefficients, den: Coefficients, dt: float, method: str
+) -> control.StateSpace:
+    A, B, C, D = _realization(num, den)
+    return control.c2d(control.ss(A, B[:, None], C[None, :], D), dt, method)
+
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def _transition(
+    num: Coefficients, den: Coefficients, dt: float
+) -> tuple[np.ndarray, np.ndarray]:
+    A, B, _, _ = _realization(num, den)
+    n = len(A)
+    aug = np.zeros((n + 1, n + 1))
+    aug[:n, :n] = A * dt
+    aug[:n, n] = B * dt
+    phi = expm(aug)
+    Ad, Bd = _readonly(phi[:n, :n].copy(), phi[:n, n].copy())
+    return Ad, Bd
+
+
+def as_plant(value: PlantLike) -> Plant:
+    """Coerce a transfer function or ``(num, den)`` pair to a Plant."""
+    if isinstance(value, Plant):
+        return value
+    if isinstance(value, tuple):
+        return plant(*value)
+    if isinstance(value, control.StateSpace):
+        value = control.tf(value)
+    if not isinstance(value, control.TransferFunction):
+        raise TypeError(f"Unsupported plant type: {type(value).__name__}")
+    if value.ninputs != 1 or value.noutputs != 1:
+        raise ValueError("Only SISO plants are supported.")
+    if not value.isctime():
+        raise ValueError("Plant must be a continuous-time system.")
+    return plant(value.num[0][0], value.den[0][0])
+
+
+def as_state_space(
+    plant: PlantLike,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """Return a continuous-time SISO realization ``(A, B, C, D)``.
+
+    ``plant`` may be a :class:`Plant`, a ``control.TransferFunction``, a
+    ``control.StateSpace`` or a ``(num, den)`` coefficient pair in
+    descending powers of ``s``. Returned arrays are cached and read-only.
+    """
+    if isinstance(plant, control.StateSpace):
+        if plant.ninputs != 1 or plant.noutputs != 1:
+            raise ValueError("Only SISO plants are supported.")
+        if not plant.isctime():
+            raise ValueError("Plant must be a continuous-time system.")
+        return (
+            np.asarray(plant.A, dtype=float),
+            np.asarray(plant.B, dtype=float).ravel(),
+            np.asarray(plant.C, dtype=float).ravel(),
+            float(np.asarray(plant.D).item()),
+        )
+    return as_plant(plant).state_space()
+
+
+def plant_coefficients(plant: PlantLike) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(num, den)`` of a SISO plant in descending powers of ``s``."""
+    p = as_plant(plant)
+    return np.asarray(p.num), np.asarray(p.den)
+
+
+def as_gains(gains: ArrayLike) -> np.ndarray:
+    """Validate PID gains as an array of ``(Kp, Ki, Kd)`` rows."""
+    gains = np.atleast_2d(np.asarray(gains, dtype=float))
+    if gains.ndim != 2 or gains.shape[1] != 3:
+        raise ValueError("gains must have shape (n_candidates, 3).")
+    return gains
+
+
+_CACHES: dict[str, Any] = {
+    "plant": _plant,
+    "realization": _realization,
+    "discretization": _discretization,
+    "transition": _transition,
+}
+
+
+def register_plant_cache(name: str, fn: Any) -> None:
+    """Include another ``lru_cache`` keyed on plant coefficients in stats."""
+    _CACHES[name] = fn
+
+
+def plant_cache_info() -> dict[str, Any]:
+    """Hit/miss statistics of every plant cache (``functools`` CacheInfo)."""
+    return {name: fn.cache_info() for name, fn in _CACHES.items()}
+
+
+def clear_plant_cache() -> None:
+    for fn in _CACHES.values():
+        fn.cache_clear()
@@ -0,0 +1,221 @@
+"""Batched closed-loop step simulation for PID tuning.
+
+Every (Kp, Ki, Kd) candidate is closed around the same SISO plant and the
+resulting linear systems are discretized exactly (zero-order hold on the
+constant reference) with one stacked matrix exponential. The time loop
+then advances all candidates at once, so an optimizer can score hundreds
+of gain vectors for the cost of a single Python-level simulation.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import ArrayLike
+from scipy.linalg import expm
+
+from .metrics import StepMetrics, step_metrics
+from .plants import PlantLike, as_gains, as_state_space
+from .stability import screen_pid_candidates
+
+
+@dataclass
+class BatchResponse:
+    """Step responses and integral metrics for a batch of PID candidates.
+
+    Trajectories have shape ``(n_candidates, len(t))``; metrics have shape
+    ``(n_candidates,)``. Candidates rejected by the stability screen have
+    ``nan`` trajectories; they and any diverging candidate get ``inf``
+    metrics.
+    """
+
+    t: np.ndarray
+    gains: np.ndarray
+    stable: np.ndarray
+    y: np.ndarray
+    u: np.ndarray
+    e: np.ndarray
+    iae: np.ndarray
+    ise: np.ndarray
+    itae: np.ndarray
+    effort: np.ndarray
+    peak_control: np.ndarray
+    reference: float = 1.0
+
+    def step_metrics(self, settling_threshold: float = 0.02) -> StepMetrics:
+        """Overshoot, rise/settling time and related step metrics."""
+        return step_metrics(
+            self.t,
+            self.y,
+            self.u,
+            reference=self.reference,
+            settling_threshold=settling_threshold,
+        )
+
+
+def closed_loop_matrices(
+    plant: tuple[np.ndarray, np.ndarray, np.ndarray, float],
+    gains: np.ndarray,
+    derivative_filter: float,
+) -> tuple[np.ndarray, ...]:
+    """Build stacked closed-loop matrices for unity-feedback PID control.
+
+    The controller is ``Kp + Ki/s + Kd*N*s/(s + N)`` with states
+    ``[integral, derivative filter]``. Returns ``(A, B, Cy, Dy, Cu, Du)``
+    where ``x' = A x + B r``, ``y = Cy x + Dy r`` and ``u = Cu x + Du r``.
+    """
+    Ap, Bp, Cp, Dp = plant
+    N = derivative_filter
+    kp, ki, kd = gains.T
+    m, n = len(gains), len(Ap)
+
+    # Controller: xc' = Ac xc + Bc e,  u = Cc xc + Dc e
+    Cc = np.stack([ki, -kd * N**2], axis=1)
+    Dc = kp + kd * N
+    # Solve the algebraic loop u = Cc xc + Dc (r - Cp xp - Dp u).
+    g = 1.0 / (1.0 + Dc * Dp)
+    Cu = np.concatenate([-(g * Dc)[:, None] * Cp, g[:, None] * Cc], axis=1)
+    Du = g * Dc
+    Cy = np.concatenate([np.broadcast_to(Cp, (m, n)), np.zeros((m, 2))], 1)
+    Cy = Cy + Dp * Cu
+    Dy = Dp * Du
+
+    A = np.zeros((m, n + 2, n + 2))
+    A[:, :n, :n] = Ap
+    A[:, :n, :] += Bp[None, :, None] * Cu[:, None, :]
+    # e = r - y feeds both controller states.
+    A[:, n, :] = -Cy
+    A[:, n + 1, :] = -Cy
+    A[:, n + 1, n + 1] -= N
+    B = np.zeros((m, n + 2))
+    B[:, :n] = Bp[None, :] * Du[:, None]
+    B[:, n] = 1.0 - Dy
+    B[:, n + 1] = 1.0 - Dy
+    return A, B, Cy, Dy, Cu, Du
+
+
+def simulate_pid_batch(
+    plant: PlantLike,
+    gains: ArrayLike,
+    t_final: float = 10.0,
+    dt: float = 0.01,
+    reference: float = 1.0,
+    derivative_filter: float = 100.0,
+    screen: bool = True,
+) -> BatchResponse:
+    """Simulate the closed-loop step response for many PID gain vectors.
+
+    Args:
+        plant: Continuous-time SISO plant (see :func:`as_state_space`).
+        gains: Array of shape ``(n_candidates, 3)`` with rows
+            ``(Kp, Ki, Kd)``; a single triple is also accepted.
+        t_final: Simulation horizon in seconds.
+        dt: Sample time of the returned trajectories.
+        reference: Step amplitude applied at ``t = 0``.
+        derivative_filter: Derivative filter bandwidth ``N`` in rad/s.
+        screen: Reject closed-loop unstable candidates with a batched
+            Routh-Hurwitz test instead of simulating them.
+
+    Returns:
+        A :class:`BatchResponse` with trajectories and IAE, ISE, ITAE,
+        control effort (``∫u² dt``) and peak ``|u|`` per candidate.
+    """
+    gains = as_gains(gains)
+    if screen:
+        stable = screen_pid_candidates(plant, gains, derivative_filter)
+    else:
+        stable = np.ones(len(gains), dtype=bool)
+    steps = int(round(t_final / dt)) + 1
+    t = np.arange(steps) * dt
+    y = np.full((len(gains), steps), np.nan)
+    u = np.full((len(gains), steps), np.nan)
+    if stable.any():
+        y[stable], u[stable] = _simulate(
+            as_state_space(plant),
+            gains[stable],
+            steps,
+            dt,
+            reference,
+            derivative_filter,
+        )
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        e = reference - y
+        abs_e = np.abs(e)
+        metrics = [
+            np.trapezoid(abs_e, t, axis=1),
+            np.trapezoid(e**2, t, axis=1),
+            np.trapezoid(t * abs_e, t, axis=1),
+            np.trapezoid(u**2, t, axis=1),
+            np.max(np.abs(u), axis=1),
+        ]
+    iae, ise, itae, effort, peak = (
+        np.nan_to_num(v, nan=np.inf, posinf=np.inf) for v in metrics
+    )
+    return BatchResponse(
+        t=t,
+        gains=gains,
+        stable=stable,
+        y=y,
+        u=u,
+        e=e,
+        iae=iae,
+        ise=ise,
+        itae=itae,
+        effort=effort,
+        peak_control=peak,
+        reference=reference,
+    )
+
+
+def _simulate(
+    plant: tuple[np.ndarray, np.ndarray, np.ndarray, float],
+    gains: np.ndarray,
+    steps: int,
+    dt: float,
+    reference: float,
+    derivative_filter: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    A, B, Cy, Dy, Cu, Du = closed_loop_matrices(
+        plant, gains, derivative_filter
+    )
+    m, nx = B.shape
+
+    # Exact discretization of x' = A x + B r for constant r.
+    aug = np.zeros((m, nx + 1, nx + 1))
+    aug[:, :nx, :nx] = A * dt
+    aug[:, :nx, nx] = B * dt
+    phi = expm(aug)
+    Ad, Bd = phi[:, :nx, :nx], phi[:, :nx, nx] * reference
+
+    # Advance in blocks of ``block`` samples. With the powers Ad^j and the
+    # partial sums (I + Ad + ... + Ad^(j-1)) Bd precomputed, the outputs of
+    # a whole block are one batched matmul, so the Python loop runs about
+    # 2*sqrt(steps) times instead of once per sample.
+    block = max(1, math.isqrt(steps))
+    n_blocks = -(-steps // block)
+    powers = np.empty((block + 1, m, nx, nx))
+    forced = np.empty((block + 1, m, nx))
+    powers[0] = np.eye(nx)
+    forced[0] = 0.0
+    with np.errstate(over="ignore", invalid="ignore"):
+        for j in range(1, block + 1):
+            powers[j] = powers[j - 1] @ Ad
+            forced[j] = (
+                forced[j - 1] + (powers[j - 1] @ Bd[:, :, None])[..., 0]
+            )
+
+        C = np.stack([Cy, Cu], axis=1)
+        D = np.stack([Dy, Du], axis=1) * reference
+        gain = np.einsum("moa,jmab->mjob", C, powers[:block])
+        gain = gain.reshape(m, 2 * block, nx)
+        bias = np.einsum("moa,jma->mjo", C, forced[:block]) + D[:, None, :]
+        bias = bias.reshape(m, 2 * block)
+
+        out = np.empty((m, n_blocks, 2 * block))
+        x = np.zeros((m, nx, 1))
+        for k in range(n_blocks):
+            out[:, k] = (gain @ x)[..., 0] + bias
+            x = powers[block] @ x + forced[block][..., None]
+    out = out.reshape(m, n_blocks * block, 2)[:, :steps]
+    return out[..., 0], out[..., 1]
@@ -0,0 +1,160 @@
+"""Batched closed-loop stability screening for PID candidates.
+
+The closed-loop characteristic polynomial of a unity-feedback PID loop is
+affine in ``(Kp, Ki, Kd)``, so the coefficients for a whole batch of gains
+are one matrix product. Stability is then decided for every candidate at
+once, either with a vectorized Routh-Hurwitz table or with batched
+companion-matrix eigenvalues.
+"""
+
+from functools import lru_cache
+from typing import Literal
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .plants import (
+    PLANT_CACHE_SIZE,
+    PlantLike,
+    as_gains,
+    as_plant,
+    register_plant_cache,
+)
+
+
+def _polymul(*polys: ArrayLike) -> np.ndarray:
+    out = np.array([1.0])
+    for p in polys:
+        out = np.polymul(out, p)
+    return out
+
+
+def pid_characteristic_polynomials(
+    plant: PlantLike,
+    gains: ArrayLike,
+    derivative_filter: float | None = 100.0,
+) -> np.ndarray:
+    """Closed-loop characteristic polynomials for a batch of PID gains.
+
+    With ``derivative_filter=N`` the controller is
+    ``Kp + Ki/s + Kd*N*s/(s + N)`` (as in :func:`simulate_pid_batch`);
+    ``None`` selects the ideal ``Kp + Ki/s + Kd*s``.
+
+    Returns:
+        Array of shape ``(n_candidates, order + 1)`` with coefficients in
+        descending powers of ``s``.
+    """
+    p = as_plant(plant)
+    offset, basis = _pid_basis(p.num, p.den, derivative_filter)
+    return offset + as_gains(gains) @ basis
+
+
+@lru_cache(maxsize=PLANT_CACHE_SIZE)
+def _pid_basis(
+    num: tuple[float, ...],
+    den: tuple[float, ...],
+    derivative_filter: float | None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Constant and per-gain parts of the characteristic polynomial."""
+    if derivative_filter is None:
+        base = _polymul([1, 0], den)
+        terms = [_polymul([1, 0], num), num, _polymul([1, 0, 0], num)]
+    else:
+        N = derivative_filter
+        base = _polymul([1, N, 0], den)
+        terms = [
+            _polymul([1, N, 0], num),
+            _polymul([1, N], num),
+            _polymul([N, 0, 0], num),
+        ]
+    width = max(len(base), *(len(p) for p in terms))
+    # Right-align so that column j always holds the same power of s.
+    basis = np.zeros((3, width))
+    for i, p in enumerate(terms):
+        basis[i, width - len(p) :] = p
+    offset = np.zeros(width)
+    offset[width - len(base) :] = base
+    offset.flags.writeable = False
+    basis.flags.writeable = False
+    return offset, basis
+
+
+register_plant_cache("pid_basis", _pid_basis)
+
+
+def routh_hurwitz_stable(coeffs: ArrayLike, tol: float = 1e-12) -> np.ndarray:
+    """Routh-Hurwitz test for each row of polynomial coefficients.
+
+    Rows hold coefficients in descending powers. A vanishing leading
+    coefficient (degenerate loop) and marginal cases, i.e. a zero in the
+    first column of the Routh table, are reported as unstable.
+    """
+    c = np.atleast_2d(np.asarray(coeffs, dtype=float))
+    m, width = c.shape
+    scale = np.max(np.abs(c), axis=1, keepdims=True)
+    c = c / np.where(scale > 0, scale, 1.0)
+    c = c * np.where(c[:, :1] < 0, -1.0, 1.0)
+
+    # All coefficients positive is necessary and keeps the table finite.
+    stable = np.all(c > tol, axis=1) & (width > 1)
+    half = width // 2 + 2
+    r0 = np.zeros((m, half))
+    r1 = np.zeros((m, half))
+    r0[:, : (width + 1) // 2] = c[:, 0::2]
+    r1[:, : width // 2] = c[:, 1::2]
+    for _ in range(width - 2):
+        ok = r1[:, 0] > tol
+        stable &= ok
+        pivot = np.where(ok, r1[:, 0], 1.0)[:, None]
+        r2 = np.zeros_like(r0)
+        r2[:, :-1] = (pivot * r0[:, 1:] - r0[:, :1] * r1[:, 1:]) / pivot
+        r0, r1 = r1, r2
+    return stable & (r1[:, 0] > tol)
+
+
+def roots_stable(coeffs: ArrayLike, tol: float = 0.0) -> np.ndarray:
+    """Stability via batched companion-matrix eigenvalues.
+
+    All rows must share the same degree (non-zero leading coefficient).
+    """
+    c = np.atleast_2d(np.asarray(coeffs, dtype=float))
+    m, width = c.shape
+    if width < 2:
+        return np.zeros(m, dtype=bool)
+    lead = c[:, 0]
+    ok = np.abs(lead) > 0
+    monic = c[:, 1:] / np.where(ok, lead, 1.0)[:, None]
+    n = width - 1
+    companion = np.zeros((m, n, n))
+    companion[:, 0, :] = -monic
+    companion[:, np.arange(1, n), np.arange(n - 1)] = 1.0
+    roots = np.linalg.eigvals(companion)
+    return ok & np.all(roots.real < -tol, axis=1)
+
+
+def screen_pid_candidates(
+    plant: PlantLike,
+    gains: ArrayLike,
+    derivative_filter: float | None = 100.0,
+    method: Literal["routh", "roots"] = "routh",
+) -> np.ndarray:
+    """Return a boolean mask of closed-loop stable PID candidates.
+
+    Without integral action (``Ki == 0``) the controller's ``1/s`` factor
+    cancels, so those rows are tested on the polynomial divided by ``s``.
+    """
+    if method == "routh":
+        test = routh_hurwitz_stable
+    elif method == "roots":
+        test = roots_stable
+    else:
+        raise ValueError(f"Unknown stability method: {method!r}")
+    gains = as_gains(gains)
+    coeffs = pid_characteristic_polynomials(plant, gains, derivative_filter)
+    no_integral = gains[:, 1] == 0
+    stable = np.zeros(len(coeffs), dtype=bool)
+    if (~no_integral).any():
+        stable[~no_integral] = test(coeffs[~no_integral])
+    if no_integral.any():
+        stable[no_integral] = test(coeffs[no_integral, :-1])
+    return stable
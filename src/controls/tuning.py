@@ -0,0 +1,358 @@
+"""Parallel multi-start PID tuning with a shared evaluation cache.
+
+A single local search from one Ziegler-Nichols guess easily stalls in a
+local minimum. :func:`tune_pid_multistart` instead spreads many starts
+over the gain box with a Latin hypercube, runs them across a process pool
+and lets them share two things: a memo cache of already evaluated gain
+vectors and the best cost found so far. Starts that keep trailing that
+incumbent are stopped early so the pool moves on to fresh starts.
+"""
+
+import math
+import os
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from multiprocessing import Manager
+from typing import Any, Literal
+
+import numpy as np
+from numpy.typing import ArrayLike
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+from .plants import PlantLike, plant_coefficients
+from .simulation import simulate_pid_batch
+from .warmstart import WarmStartStore
+
+DEFAULT_BOUNDS = ((0.0, 20.0), (0.0, 20.0), (0.0, 5.0))
+
+
+@dataclass(frozen=True)
+class PIDObjective:
+    """Picklable scalar PID cost built on :func:`simulate_pid_batch`.
+
+    The cost is ``error_weight * <metric> + effort_weight * ∫u² dt`` plus
+    relative penalties for exceeding the optional overshoot (percent),
+    settling-time and peak-control limits. Unstable candidates cost
+    ``inf``.
+    """
+
+    num: tuple[float, ...]
+    den: tuple[float, ...]
+    t_final: float = 10.0
+    dt: float = 0.01
+    metric: Literal["iae", "ise", "itae"] = "iae"
+    error_weight: float = 1.0
+    effort_weight: float = 0.0
+    max_overshoot: float | None = None
+    max_settling_time: float | None = None
+    max_control: float | None = None
+    penalty: float = 100.0
+    derivative_filter: float = 100.0
+
+    @classmethod
+    def from_plant(cls, plant: PlantLike, **kwargs: Any) -> "PIDObjective":
+        num, den = plant_coefficients(plant)
+        return cls(tuple(num), tuple(den), **kwargs)
+
+    @property
+    def settings(self) -> dict[str, Any]:
+        """Objective settings without the plant, as stored for warm starts."""
+        settings = asdict(self)
+        del settings["num"], settings["den"]
+        return settings
+
+    def batch(self, gains: ArrayLike) -> np.ndarray:
+        """Return the cost of every ``(Kp, Ki, Kd)`` row of ``gains``."""
+        res = simulate_pid_batch(
+            (self.num, self.den),
+            gains,
+            t_final=self.t_final,
+            dt=self.dt,
+            derivative_filter=self.derivative_filter,
+        )
+        m = res.step_metrics()
+        limits = [
+            (m.overshoot, self.max_overshoot),
+            (m.settling_time, self.max_settling_time),
+            (m.peak_control, self.max_control),
+        ]
+        with np.errstate(invalid="ignore"):
+            cost = (
+                self.error_weight * getattr(res, self.metric)
+                + self.effort_weight * res.effort
+            )
+            for value, limit in limits:
+                if limit is not None:
+                    excess = np.maximum(value - limit, 0.0) / max(limit, 1e-9)
+                    cost = cost + self.penalty * excess
+        return np.where(res.stable & ~np.isnan(cost), cost, np.inf)
+
+    def __call__(self, gains: ArrayLike) -> float:
+        return float(self.batch(np.asarray(gains, dtype=float)[None, :])[0])
+
+
+@dataclass
+class StartResult:
+    """Outcome of one local search."""
+
+    x0: np.ndarray
+    gains: np.ndarray
+    cost: float
+    nit: int
+    nfev: int
+    cache_hits: int
+    stopped_early: bool
+    elapsed: float
+
+
+@dataclass
+class TuningResult:
+    """Best gains found by :func:`tune_pid_multistart` and run statistics."""
+
+    gains: np.ndarray
+    cost: float
+    starts: list[StartResult] = field(default_factory=list)
+    n_evaluations: int = 0
+    cache_hits: int = 0
+    elapsed: float = 0.0
+    n_warm_starts: int = 0
+
+    @property
+    def n_stopped_early(self) -> int:
+        return sum(s.stopped_early for s in self.starts)
+
+    @property
+    def cache_hit_rate(self) -> float:
+        lookups = self.n_evaluations + self.cache_hits
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def summary(self) -> str:
+        kp, ki, kd = self.gains
+        return (
+            f"Kp={kp:.6g} Ki={ki:.6g} Kd={kd:.6g} cost={self.cost:.6g} | "
+            f"{len(self.starts)} starts, {self.n_stopped_early} stopped "
+            f"early, {self.n_evaluations} evaluations, "
+            f"{self.cache_hit_rate:.1%} cache hits, {self.elapsed:.2f} s"
+        )
+
+
+class _SharedState:
+    """Memo cache and incumbent, either in-process or manager-backed."""
+
+    def __init__(self, cache: Any, incumbent: Any, lock: Any):
+        self.cache = cache
+        self.incumbent = incumbent
+        self.lock = lock
+
+    def offer(self, cost: float) -> None:
+        if cost < self.incumbent.value:
+            with self.lock:
+                if cost < self.incumbent.value:
+                    self.incumbent.value = cost
+
+
+class _Value:
+    def __init__(self, value: float):
+        self.value = value
+
+
+class _NullLock:
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: object) -> None:
+        return None
+
+
+_STATE: _SharedState | None = None
+
+
+def _init_worker(state: _SharedState) -> None:
+    global _STATE
+    _STATE = state
+
+
+class _EarlyStop(Exception):
+    pass
+
+
+def _run_start(
+    cost: Callable[[np.ndarray], float],
+    x0: np.ndarray,
+    bounds: Sequence[tuple[float, float]],
+    maxiter: int,
+    decimals: int,
+    stop_ratio: float,
+    patience: int,
+) -> StartResult:
+    state = _STATE
+    assert state is not None
+    started = time.perf_counter()
+    stats = {"nfev": 0, "hits": 0, "nit": 0}
+    best: dict[str, Any] = {"cost": math.inf, "x": np.asarray(x0, float)}
+
+    def cached_cost(x: np.ndarray) -> float:
+        key = tuple(np.round(x, decimals).tolist())
+        value = state.cache.get(key)
+        if value is None:
+            value = float(cost(np.asarray(key)))
+            stats["nfev"] += 1
+            state.cache[key] = value
+            state.offer(value)
+        else:
+            stats["hits"] += 1
+        if value < best["cost"]:
+            best["cost"], best["x"] = value, np.asarray(key)
+        return value
+
+    def callback(intermediate_result: Any) -> None:
+        stats["nit"] += 1
+        incumbent = state.incumbent.value
+        if (
+            stats["nit"] >= patience
+            and math.isfinite(incumbent)
+            and best["cost"] > incumbent + stop_ratio * abs(incumbent)
+        ):
+            raise _EarlyStop
+
+    stopped = False
+    try:
+        minimize(
+            cached_cost,
+            x0,
+            method="Nelder-Mead",
+            bounds=bounds,
+            callback=callback,
+            options={"maxiter": maxiter, "xatol": 10.0**-decimals},
+        )
+    except _EarlyStop:
+        stopped = True
+    return StartResult(
+        x0=np.asarray(x0, float),
+        gains=best["x"],
+        cost=best["cost"],
+        nit=stats["nit"],
+        nfev=stats["nfev"],
+        cache_hits=stats["hits"],
+        stopped_early=stopped,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def start_points(
+    n_starts: int,
+    bounds: Sequence[tuple[float, float]] = DEFAULT_BOUNDS,
+    x0: ArrayLike | None = None,
+    seed: int | None = 0,
+) -> np.ndarray:
+    """Latin-hypercube start points in ``bounds``, optionally led by x0.
+
+    ``x0`` may be a single guess or several rows; they replace the first
+    sampled points.
+    """
+    lower, upper = np.asarray(bounds, dtype=float).T
+    sample = qmc.LatinHypercube(d=len(bounds), seed=seed).random(n_starts)
+    points = qmc.scale(sample, lower, upper)
+    if x0 is not None:
+        guesses = np.atleast_2d(np.asarray(x0, dtype=float))[:n_starts]
+        points[: len(guesses)] = np.clip(guesses, lower, upper)
+    return points
+
+
+def tune_pid_multistart(
+    cost: Callable[[np.ndarray], float],
+    bounds: Sequence[tuple[float, float]] = DEFAULT_BOUNDS,
+    n_starts: int = 16,
+    x0: ArrayLike | None = None,
+    workers: int | None = None,
+    maxiter: int = 200,
+    decimals: int = 6,
+    stop_ratio: float = 0.5,
+    patience: int = 20,
+    seed: int | None = 0,
+    warm_start: WarmStartStore | None = None,
+    n_warm: int = 3,
+) -> TuningResult:
+    """Minimize ``cost`` over PID gains from many starts in parallel.
+
+    Args:
+        cost: Scalar objective of a ``(Kp, Ki, Kd)`` vector. It must be
+            picklable for ``workers > 1``, e.g. a :class:`PIDObjective` or a
+            module-level function.
+        bounds: ``(low, high)`` per gain; starts are spread over this box.
+        n_starts: Number of local Nelder-Mead searches.
+        x0: Optional guess (e.g. Ziegler-Nichols) used as the first start.
+        workers: Process count; ``None`` uses all CPUs, ``1`` runs in
+            process.
+        maxiter: Iteration limit per start.
+        decimals: Gains are rounded to this many decimals for the shared
+            memo cache and the termination tolerance.
+        stop_ratio: A start is stopped once, after ``patience`` iterations,
+            its best cost exceeds the incumbent by this relative margin.
+        patience: Minimum iterations before a start may be stopped.
+        seed: Seed of the Latin hypercube.
+        warm_start: Optional store of previously tuned controllers. The
+            gains of the ``n_warm`` nearest plants with identical objective
+            settings lead the starts (before ``x0``), and the result is
+            recorded. Requires ``cost`` to be a :class:`PIDObjective`.
+        n_warm: Number of stored solutions used as starts.
+
+    Returns:
+        A :class:`TuningResult` with the best gains and statistics.
+    """
+    started = time.perf_counter()
+    guesses = []
+    if warm_start is not None:
+        if not isinstance(cost, PIDObjective):
+            raise TypeError("warm_start requires a PIDObjective cost.")
+        plant = (cost.num, cost.den)
+        previous = warm_start.nearest(plant, cost.settings, k=n_warm)
+        guesses += [w.gains for w in previous]
+    n_warm_starts = min(len(guesses), n_starts)
+    if x0 is not None:
+        guesses.append(np.asarray(x0, dtype=float))
+    points = start_points(
+        n_starts, bounds, np.vstack(guesses) if guesses else None, seed
+    )
+    workers = min(workers or os.cpu_count() or 1, n_starts)
+    args = (bounds, maxiter, decimals, stop_ratio, patience)
+
+    if workers <= 1:
+        _init_worker(_SharedState({}, _Value(math.inf), _NullLock()))
+        results = [_run_start(cost, p, *args) for p in points]
+    else:
+        with Manager() as manager:
+            state = _SharedState(
+                manager.dict(), manager.Value("d", math.inf), manager.Lock()
+            )
+            with ProcessPoolExecutor(
+                workers, initializer=_init_worker, initargs=(state,)
+            ) as pool:
+                futures = [
+                    pool.submit(_run_start, cost, p, *args) for p in points
+                ]
+                results = [f.result() for f in futures]
+
+    best = min(results, key=lambda r: r.cost)
+    result = TuningResult(
+        gains=best.gains,
+        cost=best.cost,
+        starts=results,
+        n_evaluations=sum(r.nfev for r in results),
+        cache_hits=sum(r.cache_hits for r in results),
+        elapsed=time.perf_counter() - started,
+        n_warm_starts=n_warm_starts,
+    )
+    if warm_start is not None and math.isfinite(result.cost):
+        warm_start.record(
+            plant,
+            result.gains,
+            result.cost,
+            cost.settings,
+            iterations=best.nit,
+            evaluations=result.n_evaluations,
+        )
+    return result
@@ -0,0 +1,185 @@
+"""Warm-start database of tuned PID controllers.
+
+Plants recur with small coefficient changes, so the gains tuned for a
+similar plant are a far better start than a generic guess. Every tuning
+run records the plant coefficients, the objective settings and the optimal
+gains in a local SQLite file; :meth:`WarmStartStore.nearest` returns the
+solutions for the most similar plants with the same structure.
+"""
+
+import json
+import sqlite3
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import ArrayLike
+
+from .plants import PlantLike, as_plant
+
+DEFAULT_WARMSTART_PATH = ".artifacts/warmstart.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS solutions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    num TEXT NOT NULL,
+    den TEXT NOT NULL,
+    structure TEXT NOT NULL,
+    objective TEXT NOT NULL,
+    kp REAL NOT NULL,
+    ki REAL NOT NULL,
+    kd REAL NOT NULL,
+    cost REAL NOT NULL,
+    iterations INTEGER,
+    evaluations INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS solutions_structure
+    ON solutions(structure, objective);
+"""
+
+
+def plant_signature(plant: PlantLike) -> tuple[str, np.ndarray]:
+    """Return ``(structure, features)`` describing a plant.
+
+    ``structure`` encodes the numerator/denominator orders; only plants
+    with the same structure are compared. ``features`` are the monic
+    coefficients mapped through ``sign(c) * log1p(|c|)`` so that relative
+    changes weigh similarly across magnitudes.
+    """
+    p = as_plant(plant)
+    coeffs = np.asarray(p.num + p.den[1:], dtype=float)
+    return f"{len(p.num)}/{len(p.den)}", np.sign(coeffs) * np.log1p(
+        np.abs(coeffs)
+    )
+
+
+def _objective_key(objective: dict[str, Any] | None) -> str:
+    return json.dumps(objective or {}, sort_keys=True, default=str)
+
+
+@dataclass(frozen=True)
+class WarmStart:
+    """A previously tuned controller and its distance to the query."""
+
+    gains: np.ndarray
+    cost: float
+    distance: float
+    num: tuple[float, ...]
+    den: tuple[float, ...]
+    objective: dict[str, Any]
+    iterations: int | None
+
+
+class WarmStartStore:
+    """SQLite store of tuned gains with nearest-neighbour lookup."""
+
+    def __init__(self, path: str | Path = DEFAULT_WARMSTART_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(
+        self,
+        plant: PlantLike,
+        gains: ArrayLike,
+        cost: float,
+        objective: dict[str, Any] | None = None,
+        iterations: int | None = None,
+        evaluations: int | None = None,
+    ) -> None:
+        """Store the optimal ``gains`` found for ``plant``.
+
+        ``objective`` holds the metric, weights and constraint limits that
+        define the tuning problem; lookups only match identical settings.
+        """
+        p = as_plant(plant)
+        structure, _ = plant_signature(p)
+        kp, ki, kd = np.asarray(gains, dtype=float).ravel()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO solutions(num, den, structure, objective, kp, "
+                "ki, kd, cost, iterations, evaluations, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    json.dumps(p.num),
+                    json.dumps(p.den),
+                    structure,
+                    _objective_key(objective),
+                    kp,
+                    ki,
+                    kd,
+                    float(cost),
+                    iterations,
+                    evaluations,
+                    time.time(),
+                ),
+            )
+
+    def nearest(
+        self,
+        plant: PlantLike,
+        objective: dict[str, Any] | None = None,
+        k: int = 1,
+    ) -> list[WarmStart]:
+        """Return up to ``k`` stored solutions closest to ``plant``.
+
+        Only solutions for plants of the same structure and, unless
+        ``objective`` is ``None``, identical objective settings qualify.
+        """
+        structure, features = plant_signature(plant)
+        query = (
+            "SELECT num, den, objective, kp, ki, kd, cost, iterations "
+            "FROM solutions WHERE structure = ?"
+        )
+        params: list[Any] = [structure]
+        if objective is not None:
+            query += " AND objective = ?"
+            params.append(_objective_key(objective))
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        if not rows:
+            return []
+
+        nums = [tuple(json.loads(r[0])) for r in rows]
+        dens = [tuple(json.loads(r[1])) for r in rows]
+        coeffs = np.array([n + d[1:] for n, d in zip(nums, dens, strict=True)])
+        stored = np.sign(coeffs) * np.log1p(np.abs(coeffs))
+        distance = np.linalg.norm(stored - features, axis=1)
+        # Among equally close plants prefer the cheaper solution.
+        costs = np.array([r[6] for r in rows])
+        order = np.lexsort((costs, distance))[:k]
+        return [
+            WarmStart(
+                gains=np.array(rows[i][3:6], dtype=float),
+                cost=float(rows[i][6]),
+                distance=float(distance[i]),
+                num=nums[i],
+                den=dens[i],
+                objective=json.loads(rows[i][2]),
+                iterations=rows[i][7],
+            )
+            for i in order
+        ]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(*) FROM solutions"
+            ).fetchone()
+        return int(count)
@@ -0,0 +1,233 @@
+"""Tabular problem data attached to a pipeline run.
+
+Users attach CSV or Parquet files instead of pasting tables into the
+prompt. Each file is parsed once into one ``.npy`` file per column under a
+cache directory keyed by the file's SHA-256 digest; later loads
+memory-map those arrays. Generated code receives the tables as the global
+``data`` (``data["costs"]["cost"]`` is a NumPy array), while the LLM only
+sees :func:`schema_summary`.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import shutil
+from collections.abc import Iterable, Iterator, Mapping
+from pathlib import Path
+
+import numpy as np
+
+DATASET_CACHE_DIR = ".artifacts/datasets"
+DATASET_CACHE_MAX_BYTES = 512 * 1024 * 1024
+_SUMMARY_LEVELS = 10
+
+
+def file_digest(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def table_name(path: str | Path) -> str:
+    """Python identifier derived from the file name, e.g. ``unit_costs``."""
+    name = re.sub(r"\W+", "_", Path(path).stem).strip("_").lower()
+    return name if name and not name[0].isdigit() else f"t_{name}"
+
+
+class Table(Mapping[str, np.ndarray]):
+    """Named columns of one attached file, in file order."""
+
+    def __init__(
+        self, name: str, columns: dict[str, np.ndarray], digest: str = ""
+    ):
+        self.name = name
+        self.columns = columns
+        self.digest = digest
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.columns[column]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def n_rows(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def summary(self) -> str:
+        """Markdown schema: dtype, range or category levels per column."""
+        lines = [f"### `data[{self.name!r}]` ({self.n_rows} rows)"]
+        for column, values in self.columns.items():
+            if values.dtype.kind in "iuf":
+                finite = values[np.isfinite(values)] if values.size else values
+                stats = (
+                    f"min {finite.min():.6g}, max {finite.max():.6g}"
+                    if finite.size
+                    else "no finite values"
+                )
+                missing = values.size - finite.size
+                if missing:
+                    stats += f", {missing} missing"
+            else:
+                levels = np.unique(values)
+                shown = ", ".join(map(str, levels[:_SUMMARY_LEVELS]))
+                more = len(levels) - _SUMMARY_LEVELS
+                stats = f"{len(levels)} distinct: {shown}" + (
+                    f", … (+{more})" if more > 0 else ""
+                )
+            lines.append(f"- `{column}` ({values.dtype}): {stats}")
+        return "\n".join(lines)
+
+
+def _convert(values: list[str]) -> np.ndarray:
+    """Integer, float (empty cells as NaN) or string array."""
+    try:
+        return np.array([int(v) for v in values], dtype=np.int64)
+    except ValueError:
+        pass
+    try:
+        return np.array(
+            [float(v) if v.strip() else np.nan for v in values], dtype=float
+        )
+    except ValueError:
+        return np.array(values, dtype=str)
+
+
+def _read_csv(path: Path) -> dict[str, np.ndarray]:
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = [h.strip() for h in next(reader)]
+        cells: list[list[str]] = [[] for _ in header]
+        for row in reader:
+            if not row:
+                continue
+            for column, value in zip(cells, row, strict=False):
+                column.append(value.strip())
+    if len({len(c) for c in cells}) > 1:
+        raise ValueError(f"{path.name}: rows have different lengths.")
+    return {h: _convert(c) for h, c in zip(header, cells, strict=True)}
+
+
+def _read_parquet(path: Path) -> dict[str, np.ndarray]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet files requires pyarrow.") from e
+    table = pq.read_table(path)
+    columns = {}
+    for name, column in zip(table.column_names, table.columns, strict=True):
+        values = column.to_numpy(zero_copy_only=False)
+        if values.dtype == object:
+            values = values.astype(str)
+        columns[name] = values
+    return columns
+
+
+_READERS = {".csv": _read_csv, ".parquet": _read_parquet}
+
+
+def load_table(
+    path: str | Path,
+    name: str | None = None,
+    cache_dir: str | Path = DATASET_CACHE_DIR,
+) -> Table:
+    """Load a CSV or Parquet file, memory-mapping its cached columns."""
+    path = Path(path)
+    reader = _READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"Unsupported data file type: {path.suffix}")
+    digest = file_digest(path)
+    target = Path(cache_dir) / digest
+    meta_path = target / "columns.json"
+
+    if not meta_path.exists():
+        columns = reader(path)
+        target.mkdir(parents=True, exist_ok=True)
+        for i, values in enumerate(columns.values()):
+            np.save(target / f"{i}.npy", values)
+        # Written last: its presence marks a complete cache entry.
+        meta_path.write_text(json.dumps(list(columns)), encoding="utf-8")
+
+    os.utime(meta_path)  # last access, for cache eviction
+    names = json.loads(meta_path.read_text(encoding="utf-8"))
+    columns = {
+        column: np.load(target / f"{i}.npy", mmap_mode="r")
+        for i, column in enumerate(names)
+    }
+    return Table(name or table_name(path), columns, digest)
+
+
+def prune_dataset_cache(
+    cache_dir: str | Path = DATASET_CACHE_DIR,
+    max_bytes: int = DATASET_CACHE_MAX_BYTES,
+    keep: Iterable[str] = (),
+) -> None:
+    """Evict least recently used cache entries until under ``max_bytes``.
+
+    Entries whose digest is in ``keep`` are never removed.
+    """
+    root = Path(cache_dir)
+    if not root.is_dir():
+        return
+    keep = set(keep)
+    entries = []
+    for entry in root.iterdir():
+        meta_path = entry / "columns.json"
+        if not entry.is_dir():
+            continue
+        size = sum(f.stat().st_size for f in entry.iterdir())
+        used = meta_path.stat().st_mtime if meta_path.exists() else 0.0
+        entries.append((used, size, entry))
+    total = sum(size for _, size, _ in entries)
+    for _, size, entry in sorted(entries, key=lambda e: e[0]):
+        if total <= max_bytes:
+            break
+        if entry.name in keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+
+
+def load_tables(
+    paths: Iterable[str | Path],
+    cache_dir: str | Path = DATASET_CACHE_DIR,
+    max_cache_bytes: int = DATASET_CACHE_MAX_BYTES,
+) -> dict[str, Table]:
+    """Load several files keyed by their table names.
+
+    Afterwards the cache is pruned to ``max_cache_bytes``, keeping the
+    entries just loaded.
+    """
+    tables: dict[str, Table] = {}
+    for path in paths:
+        table = load_table(path, cache_dir=cache_dir)
+        if table.name in tables:
+            raise ValueError(f"Two data files map to table {table.name!r}.")
+        tables[table.name] = table
+    if tables:
+        prune_dataset_cache(
+            cache_dir, max_cache_bytes, (t.digest for t in tables.values())
+        )
+    return tables
+
+
+def schema_summary(tables: Mapping[str, Table]) -> str:
+    """Prompt section describing the attached tables without their rows."""
+    if not tables:
+        return ""
+    parts = [
+        "## Attached data",
+        "The following tables are attached. Their values are available to "
+        "the generated code as NumPy arrays in the global `data` and must "
+        "not be requested, assumed or typed into the model.",
+    ]
+    parts += [table.summary() for table in tables.values()]
+    return "\n\n".join(parts)
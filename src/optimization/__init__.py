@@ -0,0 +1,40 @@
+from .diagnosis import (
+    Diagnosis,
+    diagnose,
+    termination_status,
+)
+from .feasibility import FeasibilityReport, check_solution
+from .sparse_lp import (
+    Constraint,
+    LinearExpression,
+    SparseModel,
+    SparseSolution,
+    Variables,
+)
+from .stochastic import (
+    FirstStage,
+    IterationLog,
+    LShapedResult,
+    Scenario,
+    solve_extensive_form,
+    solve_l_shaped,
+)
+
+__all__ = [
+    "Constraint",
+    "Diagnosis",
+    "FeasibilityReport",
+    "FirstStage",
+    "IterationLog",
+    "LShapedResult",
+    "LinearExpression",
+    "Scenario",
+    "SparseModel",
+    "SparseSolution",
+    "Variables",
+    "check_solution",
+    "diagnose",
+    "solve_extensive_form",
+    "solve_l_shaped",
+    "termination_status",
+]
@@ -0,0 +1,315 @@
+"""Local diagnosis of infeasible and unbounded linear models.
+
+When a generated model is infeasible, the error string alone gives the
+Integrator nothing to fix. :func:`diagnose` takes the linear rows of a
+:class:`SparseModel` or a Pyomo model and finds a small conflicting
+constraint set, an irreducible infeasible subsystem (IIS) when the
+solve budget allows. It uses an elastic filter followed by a deletion
+filter (Chinneck). For unbounded models it reports the variables that
+run off along the improving ray. Variable bounds are always part of the
+subsystem; only constraint rows are filtered.
+"""
+
+import math
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+
+from .sparse_lp import SparseModel, linprog_two_sided
+
+_TOL = 1e-7
+_BIG = 1e7  # artificial bound to locate unbounded rays
+
+
+@dataclass
+class LinearRows:
+    """``min c'x`` s.t. ``lower <= A x <= upper``, ``lb <= x <= ub``."""
+
+    c: np.ndarray
+    A: sp.csr_matrix
+    lower: np.ndarray
+    upper: np.ndarray
+    lb: np.ndarray
+    ub: np.ndarray
+    row_names: list[str]
+    var_names: list[str]
+    skipped: list[str] = field(default_factory=list)
+    integer: np.ndarray | None = None
+    x: np.ndarray | None = None  # current values, NaN when unset
+
+
+@dataclass
+class Diagnosis:
+    """Conflict or unbounded ray of a model that failed to solve."""
+
+    status: str
+    conflict: list[str] = field(default_factory=list)
+    unbounded: list[str] = field(default_factory=list)
+    skipped: list[str] = field(default_factory=list)
+    irreducible: bool = False
+    n_solves: int = 0
+
+    @property
+    def message(self) -> str:
+        lines = []
+        if self.conflict:
+            kind = "Irreducible" if self.irreducible else "Reduced"
+            lines.append(
+                f"{kind} conflicting constraint set "
+                f"({len(self.conflict)} of the rows, with variable bounds):"
+            )
+            lines.extend(f" - {name}" for name in self.conflict)
+        elif self.status == "infeasible":
+            lines.append(
+                "The linear relaxation is feasible; the conflict involves "
+                "integrality or the skipped nonlinear constraints."
+            )
+        if self.unbounded:
+            lines.append("Objective is unbounded along the variables:")
+            lines.extend(f" - {name}" for name in self.unbounded)
+        elif self.status == "unbounded":
+            lines.append("No unbounded direction found in the relaxation.")
+        if self.skipped:
+            lines.append(
+                "Not analysed (nonlinear): " + ", ".join(self.skipped)
+            )
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "message": self.message}
+
+
+def _names(prefix: str, shape: tuple[int, ...]) -> list[str]:
+    if not shape:
+        return [prefix]
+    return [f"{prefix}{list(idx)}" for idx in np.ndindex(*shape)]
+
+
+def sparse_rows(model: SparseModel) -> LinearRows:
+    """Linear rows of a :class:`SparseModel`."""
+    c, _, A, lower, upper = model._assemble()
+    if model.sense == "max":
+        c = -c
+    row_names = []
+    for name, k in model.constraints.items():
+        n_rows = len(k.lower)
+        row_names.extend(_names(name, (n_rows,)) if n_rows > 1 else [name])
+    var_names, integer, x = [], [], np.full(model.num_variables, np.nan)
+    for v in model.variables.values():
+        var_names.extend(_names(v.name, v.shape))
+        integer.append(np.full(v.size, v.integer))
+        if v.value is not None:
+            x[v.columns.ravel()] = np.ravel(v.value)
+    return LinearRows(
+        c,
+        A,
+        lower,
+        upper,
+        np.concatenate(model._lb or [[]]),
+        np.concatenate(model._ub or [[]]),
+        row_names,
+        var_names,
+        integer=np.concatenate(integer or [[]]).astype(bool),
+        x=x,
+    )
+
+
+def pyomo_rows(model: Any) -> LinearRows:
+    """Linear rows of the active constraints of a Pyomo model.
+
+    Fixed variables enter as constants and nonlinear constraints are
+    listed in ``skipped``.
+    """
+    from pyomo.core import Constraint, Objective, maximize
+    from pyomo.repn import generate_standard_repn
+
+    columns: dict[int, int] = {}
+    variables: list[Any] = []
+    rows, cols, vals = [], [], []
+    lower, upper, row_names, skipped = [], [], [], []
+
+    def column(var: Any) -> int:
+        if id(var) not in columns:
+            columns[id(var)] = len(variables)
+            variables.append(var)
+        return columns[id(var)]
+
+    for con in model.component_data_objects(Constraint, active=True):
+        repn = generate_standard_repn(con.body, compute_values=True)
+        if not repn.is_linear():
+            skipped.append(con.name)
+            continue
+        i = len(row_names)
+        for var, coef in zip(repn.linear_vars, repn.linear_coefs):
+            rows.append(i)
+            cols.append(column(var))
+            vals.append(float(coef))
+        constant = float(repn.constant)
+        lo, up = con.lb, con.ub
+        lower.append(-math.inf if lo is None else float(lo) - constant)
+        upper.append(math.inf if up is None else float(up) - constant)
+        row_names.append(con.name)
+
+    c_terms: dict[int, float] = {}
+    for obj in model.component_data_objects(Objective, active=True):
+        repn = generate_standard_repn(obj.expr, compute_values=True)
+        sign = -1.0 if obj.sense == maximize else 1.0
+        for var, coef in zip(repn.linear_vars, repn.linear_coefs):
+            c_terms[column(var)] = sign * float(coef)
+        break
+
+    n = len(variables)
+    c = np.zeros(n)
+    for j, coef in c_terms.items():
+        c[j] = coef
+    return LinearRows(
+        c,
+        sp.csr_matrix((vals, (rows, cols)), shape=(len(row_names), n)),
+        np.array(lower, dtype=float),
+        np.array(upper, dtype=float),
+        np.array([-math.inf if v.lb is None else v.lb for v in variables]),
+        np.array([math.inf if v.ub is None else v.ub for v in variables]),
+        row_names,
+        [v.name for v in variables],
+        skipped,
+        integer=np.array([v.is_integer() for v in variables], dtype=bool),
+        x=np.array(
+            [np.nan if v.value is None else v.value for v in variables],
+            dtype=float,
+        ),
+    )
+
+
+class _Filter:
+    """Feasibility tests over row subsets, with a solve budget."""
+
+    def __init__(self, rows: LinearRows, max_solves: int):
+        self.rows = rows
+        self.max_solves = max_solves
+        self.n_solves = 0
+
+    def feasible(self, subset: np.ndarray) -> bool:
+        r = self.rows
+        self.n_solves += 1
+        res, _ = linprog_two_sided(
+            np.zeros(len(r.c)),
+            r.A[subset],
+            r.lower[subset],
+            r.upper[subset],
+            r.lb,
+            r.ub,
+        )
+        return res.status != 2
+
+    def elastic(self) -> np.ndarray | None:
+        """Rows carrying the phase-1 dual certificate of infeasibility."""
+        r = self.rows
+        m, n = r.A.shape
+        eye = sp.eye(m, format="csr")
+        self.n_solves += 1
+        res, duals = linprog_two_sided(
+            np.concatenate([np.zeros(n), np.ones(2 * m)]),
+            sp.hstack([r.A, eye, -eye], format="csr"),
+            r.lower,
+            r.upper,
+            np.concatenate([r.lb, np.zeros(2 * m)]),
+            np.concatenate([r.ub, np.full(2 * m, np.inf)]),
+        )
+        if res.status != 0 or res.fun <= _TOL:
+            return None
+        return np.flatnonzero(np.abs(duals) > _TOL)
+
+    def deletion(self, candidates: np.ndarray) -> tuple[np.ndarray, bool]:
+        """Drop every row whose removal keeps the subset infeasible."""
+        keep = list(candidates)
+        for i in list(candidates):
+            if self.n_solves >= self.max_solves:
+                return np.array(keep, dtype=int), False
+            trial = [j for j in keep if j != i]
+            if not self.feasible(np.array(trial, dtype=int)):
+                keep = trial
+        return np.array(keep, dtype=int), True
+
+
+def find_conflict(
+    rows: LinearRows, max_solves: int = 200
+) -> tuple[list[int], bool, int]:
+    """Indices of a conflicting row set, whether it is irreducible and the
+    number of LP solves used. Empty if the LP relaxation is feasible."""
+    filt = _Filter(rows, max_solves)
+    candidates = filt.elastic()
+    if candidates is None:
+        return [], False, filt.n_solves
+    if filt.feasible(candidates):
+        # Degenerate certificate: fall back to all rows.
+        candidates = np.arange(rows.A.shape[0])
+    conflict, irreducible = filt.deletion(candidates)
+    return [int(i) for i in conflict], irreducible, filt.n_solves
+
+
+def unbounded_variables(rows: LinearRows) -> list[str]:
+    """Variables that reach an artificial ``±1e7`` box at the optimum."""
+    lb = np.maximum(rows.lb, -_BIG)
+    ub = np.minimum(rows.ub, _BIG)
+    res, _ = linprog_two_sided(rows.c, rows.A, rows.lower, rows.upper, lb, ub)
+    if res.status != 0:
+        return []
+    hit = (np.abs(res.x) >= 0.99 * _BIG) & (
+        ~np.isfinite(rows.lb) | ~np.isfinite(rows.ub)
+    )
+    return [rows.var_names[j] for j in np.flatnonzero(hit)]
+
+
+def diagnose(model: Any, status: str, max_solves: int = 200) -> Diagnosis:
+    """Diagnose a :class:`SparseModel` or Pyomo model.
+
+    ``status`` is the solver outcome: ``"infeasible"``, ``"unbounded"``
+    or ``"infeasible_or_unbounded"``.
+    """
+    rows = (
+        sparse_rows(model)
+        if isinstance(model, SparseModel)
+        else pyomo_rows(model)
+    )
+    diagnosis = Diagnosis(status=status, skipped=rows.skipped)
+    if "infeasible" in status:
+        conflict, irreducible, n_solves = find_conflict(rows, max_solves)
+        diagnosis.conflict = [rows.row_names[i] for i in conflict]
+        diagnosis.irreducible = irreducible
+        diagnosis.n_solves = n_solves
+        if conflict:
+            diagnosis.status = "infeasible"
+    if "unbounded" in status and not diagnosis.conflict:
+        diagnosis.unbounded = unbounded_variables(rows)
+        diagnosis.n_solves += 1
+        if diagnosis.unbounded:
+            diagnosis.status = "unbounded"
+    return diagnosis
+
+
+def termination_status(namespace: dict[str, Any]) -> str | None:
+    """``"infeasible"``/``"unbounded"``/``"infeasible_or_unbounded"`` from
+    the first Pyomo solver results object in ``namespace``, else ``None``.
+    """
+    from pyomo.opt import SolverResults
+
+    for obj in namespace.values():
+        if isinstance(obj, SolverResults):
+            condition = obj.solver.termination_condition
+        elif type(obj).__name__ == "Results" and hasattr(
+            obj, "termination_condition"
+        ):
+            condition = obj.termination_condition  # appsi results
+        else:
+            continue
+        name = str(getattr(condition, "name", condition)).lower()
+        if "infeasibleorunbounded" in name.replace("_", ""):
+            return "infeasible_or_unbounded"
+        if "infeasible" in name:
+            return "infeasible"
+        if "unbounded" in name:
+            return "unbounded"
+        return None
+    return None
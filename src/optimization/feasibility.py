@@ -0,0 +1,150 @@
+"""Deterministic feasibility check of a reported solution.
+
+The Validator can only read the solver's stdout, so it cannot tell
+whether the values it reports satisfy the model. :func:`check_solution`
+evaluates every active constraint at the current variable values: linear
+rows in one sparse product and nonlinear Pyomo rows one by one. It also
+checks variable bounds and integrality. A violation counts when it
+exceeds ``tol * max(1, |bound|)``.
+"""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any
+
+import numpy as np
+
+from .diagnosis import LinearRows, pyomo_rows, sparse_rows
+from .sparse_lp import SparseModel
+
+
+@dataclass
+class FeasibilityReport:
+    """Largest violations of constraints, bounds and integrality."""
+
+    feasible: bool
+    max_violation: float
+    n_checked: int
+    violations: list[tuple[str, float]] = field(default_factory=list)
+    unset: list[str] = field(default_factory=list)
+
+    @property
+    def message(self) -> str:
+        if self.feasible:
+            return (
+                f"All {self.n_checked} constraints and bounds hold "
+                f"(max violation {self.max_violation:.3g})."
+            )
+        lines = [
+            f"Max violation {self.max_violation:.6g} over "
+            f"{self.n_checked} checks; violated:"
+        ]
+        lines.extend(
+            f" - {name}: {amount:.6g}" for name, amount in self.violations
+        )
+        if self.unset:
+            lines.append("Unset variables: " + ", ".join(self.unset))
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {**asdict(self), "message": self.message}
+
+
+def _excess(
+    value: np.ndarray, lower: np.ndarray, upper: np.ndarray, tol: float
+) -> tuple[np.ndarray, np.ndarray]:
+    """Violation of ``lower <= value <= upper`` and whether it counts."""
+    with np.errstate(invalid="ignore"):
+        below = np.where(np.isfinite(lower), lower - value, 0.0)
+        above = np.where(np.isfinite(upper), value - upper, 0.0)
+    excess = np.maximum(np.maximum(below, above), 0.0)
+    scale = np.maximum(
+        1.0,
+        np.maximum(
+            np.where(np.isfinite(lower), np.abs(lower), 0.0),
+            np.where(np.isfinite(upper), np.abs(upper), 0.0),
+        ),
+    )
+    return excess, excess > tol * scale
+
+
+def _check_rows(
+    rows: LinearRows, tol: float
+) -> tuple[list[tuple[str, float]], int, float]:
+    x = rows.x
+    assert x is not None
+    found: list[tuple[str, float]] = []
+    worst = 0.0
+
+    # Rows touching an unset variable cannot be evaluated.
+    known = ~np.isnan(x)
+    x0 = np.where(known, x, 0.0)
+    evaluable = (abs(rows.A) @ (~known).astype(float)) == 0
+    excess, bad = _excess(rows.A @ x0, rows.lower, rows.upper, tol)
+    excess, bad = excess * evaluable, bad & evaluable
+    found += [
+        (rows.row_names[i], float(excess[i])) for i in np.flatnonzero(bad)
+    ]
+    worst = max(worst, float(excess.max(initial=0.0)))
+
+    excess, bad = _excess(x0, rows.lb, rows.ub, tol)
+    excess, bad = excess * known, bad & known
+    found += [
+        (f"bounds of {rows.var_names[j]}", float(excess[j]))
+        for j in np.flatnonzero(bad)
+    ]
+    worst = max(worst, float(excess.max(initial=0.0)))
+
+    if rows.integer is not None and rows.integer.any():
+        gap = np.abs(x0 - np.round(x0)) * (rows.integer & known)
+        found += [
+            (f"integrality of {rows.var_names[j]}", float(gap[j]))
+            for j in np.flatnonzero(gap > tol)
+        ]
+        worst = max(worst, float(gap.max(initial=0.0)))
+    return found, len(rows.row_names) + len(x), worst
+
+
+def check_solution(
+    model: Any, tol: float = 1e-6, max_items: int = 20
+) -> FeasibilityReport | None:
+    """Check the current values of a :class:`SparseModel` or Pyomo model.
+
+    Returns ``None`` when no variable has a value (the model was not
+    solved).
+    """
+    sparse = isinstance(model, SparseModel)
+    rows = sparse_rows(model) if sparse else pyomo_rows(model)
+    if rows.x is None or np.isnan(rows.x).all():
+        return None
+
+    found, n_checked, worst = _check_rows(rows, tol)
+    if not sparse:
+        from pyomo.core import value
+
+        for name in rows.skipped:
+            con = model.find_component(name)
+            try:
+                body = float(value(con.body))
+            except (ValueError, TypeError, ZeroDivisionError):
+                found.append((name, float("nan")))
+                continue
+            excess, bad = _excess(
+                np.array([body]),
+                np.array([-np.inf if con.lb is None else con.lb], float),
+                np.array([np.inf if con.ub is None else con.ub], float),
+                tol,
+            )
+            worst = max(worst, float(excess[0]))
+            if bad[0]:
+                found.append((name, float(excess[0])))
+        n_checked += len(rows.skipped)
+
+    found.sort(key=lambda item: -np.nan_to_num(item[1], nan=np.inf))
+    unset = [rows.var_names[j] for j in np.flatnonzero(np.isnan(rows.x))]
+    return FeasibilityReport(
+        feasible=not found and not unset,
+        max_violation=worst,
+        n_checked=n_checked,
+        violations=found[:max_items],
+        unset=unset[:max_items],
+    )
@@ -0,0 +1,498 @@
+"""Sparse LP/MILP builder solved with HiGHS through ``scipy.optimize``.
+
+Pyomo builds one Python expression per constraint and variable, which
+dominates run time once transport or allocation grids reach thousands of
+arcs. :class:`SparseModel` instead keeps variables as index blocks and
+linear expressions as ``scipy.sparse`` matrices, so a whole family of
+constraints (e.g. "every store receives its demand") is one sparse
+product. LPs are solved with ``linprog`` (with duals), MILPs with
+``milp``; both use HiGHS.
+
+Example::
+
+    m = SparseModel("transport")
+    x = m.add_variables("ship", (n_warehouses, n_stores), lb=0)
+    m.add_constraints("capacity", x.sum(axis=1) <= capacity)
+    m.add_constraints("demand", x.sum(axis=0) >= demand)
+    m.minimize(x.dot(cost))
+    solution = m.solve()
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import ArrayLike
+from scipy.optimize import Bounds, LinearConstraint, linprog, milp
+
+_STATUS = {
+    0: "optimal",
+    1: "limit_reached",
+    2: "infeasible",
+    3: "unbounded",
+    4: "numerical_error",
+}
+
+
+def _widen(matrix: sp.csr_matrix, n_cols: int) -> sp.csr_matrix:
+    """Give ``matrix`` ``n_cols`` columns (variables added later are 0)."""
+    if matrix.shape[1] == n_cols:
+        return matrix
+    return sp.csr_matrix(
+        (matrix.data, matrix.indices, matrix.indptr),
+        shape=(matrix.shape[0], n_cols),
+    )
+
+
+def linprog_two_sided(
+    c: np.ndarray,
+    A: sp.csr_matrix,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    lb: np.ndarray,
+    ub: np.ndarray,
+    options: dict[str, Any] | None = None,
+) -> tuple[Any, np.ndarray | None]:
+    """Solve ``min c'x`` s.t. ``lower <= A x <= upper``, ``lb <= x <= ub``.
+
+    Rows are split into ``linprog``'s ``A_ub``/``A_eq`` form and solved
+    with HiGHS. Returns the ``OptimizeResult`` and, for an optimal
+    solution, the row duals ``d objective / d bound`` of the active side.
+    """
+    eq = lower == upper
+    has_ub = ~eq & np.isfinite(upper)
+    has_lb = ~eq & np.isfinite(lower)
+    A_ub = sp.vstack([A[has_ub], -A[has_lb]], format="csr")
+    b_ub = np.concatenate([upper[has_ub], -lower[has_lb]])
+    res = linprog(
+        c,
+        A_ub=A_ub if A_ub.shape[0] else None,
+        b_ub=b_ub if A_ub.shape[0] else None,
+        A_eq=A[eq] if eq.any() else None,
+        b_eq=lower[eq] if eq.any() else None,
+        bounds=np.column_stack([lb, ub]),
+        method="highs",
+        options=options or {},
+    )
+    if res.status != 0:
+        return res, None
+    duals = np.zeros(len(lower))
+    marg_ub = res.ineqlin.marginals
+    n_ub = int(has_ub.sum())
+    duals[has_ub] += marg_ub[:n_ub]
+    duals[has_lb] -= marg_ub[n_ub:]
+    if eq.any():
+        duals[eq] = res.eqlin.marginals
+    return res, duals
+
+
+class LinearExpression:
+    """Rows ``matrix @ x + constant`` over the variables of a model."""
+
+    __array_priority__ = 100  # numpy operands defer to our operators
+    __hash__ = None  # type: ignore[assignment]
+
+    def __init__(self, matrix: sp.spmatrix, constant: ArrayLike = 0.0):
+        self.matrix = sp.csr_matrix(matrix)
+        self.constant = np.broadcast_to(
+            np.asarray(constant, dtype=float), (self.matrix.shape[0],)
+        ).copy()
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    def _combine(self, other: Any, sign: float) -> "LinearExpression":
+        if isinstance(other, Variables):
+            other = other.expr()
+        if isinstance(other, LinearExpression):
+            n = max(self.matrix.shape[1], other.matrix.shape[1])
+            a, b = _widen(self.matrix, n), _widen(other.matrix, n)
+            if a.shape[0] != b.shape[0]:
+                raise ValueError("Expression row counts do not match.")
+            return LinearExpression(
+                a + sign * b, self.constant + sign * other.constant
+            )
+        other = np.ravel(np.asarray(other, dtype=float))
+        return LinearExpression(self.matrix, self.constant + sign * other)
+
+    def __add__(self, other: Any) -> "LinearExpression":
+        return self._combine(other, 1.0)
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> "LinearExpression":
+        return self._combine(other, -1.0)
+
+    def __rsub__(self, other: Any) -> "LinearExpression":
+        return (-self)._combine(other, 1.0)
+
+    def __neg__(self) -> "LinearExpression":
+        return LinearExpression(-self.matrix, -self.constant)
+
+    def __mul__(self, factor: ArrayLike) -> "LinearExpression":
+        """Scale by a scalar or by one factor per row."""
+        f = np.ravel(np.asarray(factor, dtype=float))
+        if f.size == 1:
+            return LinearExpression(self.matrix * f[0], self.constant * f[0])
+        return LinearExpression(sp.diags(f) @ self.matrix, self.constant * f)
+
+    __rmul__ = __mul__
+
+    def sum(self) -> "LinearExpression":
+        """Single-row expression summing all rows."""
+        return LinearExpression(
+            sp.csr_matrix(self.matrix.sum(axis=0)), self.constant.sum()
+        )
+
+    def __le__(self, rhs: ArrayLike) -> "Constraint":
+        return Constraint.between(self, -np.inf, rhs)
+
+    def __ge__(self, rhs: ArrayLike) -> "Constraint":
+        return Constraint.between(self, rhs, np.inf)
+
+    def __eq__(self, rhs: ArrayLike) -> "Constraint":  # type: ignore[override]
+        return Constraint.between(self, rhs, rhs)
+
+
+@dataclass
+class Constraint:
+    """Rows ``lower <= matrix @ x <= upper``."""
+
+    matrix: sp.csr_matrix
+    lower: np.ndarray
+    upper: np.ndarray
+
+    @classmethod
+    def between(
+        cls, expr: LinearExpression, lower: ArrayLike, upper: ArrayLike
+    ) -> "Constraint":
+        """Bound ``expr`` on both sides; constants move to the bounds."""
+        n = len(expr)
+        shift = expr.constant
+        lower = np.broadcast_to(np.asarray(lower, dtype=float), (n,))
+        upper = np.broadcast_to(np.asarray(upper, dtype=float), (n,))
+        return cls(expr.matrix, lower - shift, upper - shift)
+
+
+class Variables:
+    """A named block of decision variables with an array shape."""
+
+    __array_priority__ = 100  # numpy operands defer to our operators
+    __hash__ = None  # type: ignore[assignment]
+
+    def __init__(
+        self, name: str, shape: tuple[int, ...], offset: int, integer: bool
+    ):
+        self.name = name
+        self.shape = shape
+        self.offset = offset
+        self.size = int(np.prod(shape, dtype=int))
+        self.integer = integer
+        self.value: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def columns(self) -> np.ndarray:
+        """Model column index of every variable, shaped like the block."""
+        return np.arange(self.offset, self.offset + self.size).reshape(
+            self.shape
+        )
+
+    def _rows(self, row_of: np.ndarray, coeffs: np.ndarray, n_rows: int):
+        return LinearExpression(
+            sp.csr_matrix(
+                (
+                    coeffs,
+                    (row_of, np.arange(self.offset, self.offset + self.size)),
+                ),
+                shape=(n_rows, self.offset + self.size),
+            )
+        )
+
+    def expr(self) -> LinearExpression:
+        """One row per variable (flattened in C order)."""
+        return self * 1.0
+
+    def __mul__(self, coeffs: ArrayLike) -> LinearExpression:
+        """Element-wise ``coeffs * x``, one row per variable."""
+        c = np.broadcast_to(np.asarray(coeffs, dtype=float), self.shape)
+        return self._rows(np.arange(self.size), c.ravel(), self.size)
+
+    __rmul__ = __mul__
+
+    def dot(self, coeffs: ArrayLike) -> LinearExpression:
+        """Single-row expression ``sum(coeffs * x)``."""
+        c = np.broadcast_to(np.asarray(coeffs, dtype=float), self.shape)
+        return self._rows(np.zeros(self.size, dtype=int), c.ravel(), 1)
+
+    def sum(
+        self, axis: int | tuple[int, ...] | None = None
+    ) -> LinearExpression:
+        """Sum over ``axis``; one row per remaining index (C order)."""
+        if axis is None:
+            return self.dot(1.0)
+        axes = (axis,) if isinstance(axis, int) else tuple(axis)
+        axes = tuple(a % len(self.shape) for a in axes)
+        kept = [d for d in range(len(self.shape)) if d not in axes]
+        out_shape = tuple(self.shape[d] for d in kept)
+        grid = np.indices(self.shape).reshape(len(self.shape), -1)
+        rows = (
+            np.ravel_multi_index(tuple(grid[kept]), out_shape)
+            if kept
+            else np.zeros(self.size, dtype=int)
+        )
+        n_rows = int(np.prod(out_shape, dtype=int))
+        return self._rows(rows, np.ones(self.size), n_rows)
+
+    def __add__(self, other: Any) -> LinearExpression:
+        return self.expr() + other
+
+    __radd__ = __add__
+
+    def __sub__(self, other: Any) -> LinearExpression:
+        return self.expr() - other
+
+    def __rsub__(self, other: Any) -> LinearExpression:
+        return other - self.expr()
+
+    def __neg__(self) -> LinearExpression:
+        return -self.expr()
+
+    def __le__(self, rhs: ArrayLike) -> Constraint:
+        return self.expr() <= rhs
+
+    def __ge__(self, rhs: ArrayLike) -> Constraint:
+        return self.expr() >= rhs
+
+    def __eq__(self, rhs: ArrayLike) -> Constraint:  # type: ignore[override]
+        return self.expr() == rhs
+
+
+@dataclass
+class SparseSolution:
+    """Solver outcome; ``values`` and ``duals`` are keyed by block name."""
+
+    status: str
+    message: str
+    objective_value: float | None
+    x: np.ndarray | None
+    values: dict[str, np.ndarray] = field(default_factory=dict)
+    duals: dict[str, np.ndarray] = field(default_factory=dict)
+    solve_time: float = 0.0
+    mip_gap: float | None = None
+
+    @property
+    def success(self) -> bool:
+        return self.status == "optimal"
+
+
+class SparseModel:
+    """LP/MILP assembled from variable blocks and sparse constraint rows."""
+
+    def __init__(self, name: str = "model"):
+        self.name = name
+        self.variables: dict[str, Variables] = {}
+        self.constraints: dict[str, Constraint] = {}
+        self._lb: list[np.ndarray] = []
+        self._ub: list[np.ndarray] = []
+        self._n = 0
+        self._objective: LinearExpression | None = None
+        self.sense: Literal["min", "max"] = "min"
+        self.objective_name = "objective"
+        self.solution: SparseSolution | None = None
+
+    @property
+    def num_variables(self) -> int:
+        return self._n
+
+    @property
+    def num_constraints(self) -> int:
+        return sum(len(c.lower) for c in self.constraints.values())
+
+    def add_variables(
+        self,
+        name: str,
+        shape: int | tuple[int, ...] = (),
+        lb: ArrayLike = 0.0,
+        ub: ArrayLike = np.inf,
+        integer: bool = False,
+    ) -> Variables:
+        """Add a block of variables with element-wise bounds."""
+        if name in self.variables:
+            raise ValueError(f"Variables {name!r} already exist.")
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        block = Variables(name, shape, self._n, integer)
+        self._lb.append(np.broadcast_to(np.asarray(lb, float), shape).ravel())
+        self._ub.append(np.broadcast_to(np.asarray(ub, float), shape).ravel())
+        self._n += block.size
+        self.variables[name] = block
+        return block
+
+    def add_constraints(self, name: str, constraint: Constraint) -> None:
+        """Add a family of constraint rows under ``name``."""
+        if name in self.constraints:
+            raise ValueError(f"Constraints {name!r} already exist.")
+        self.constraints[name] = constraint
+
+    def minimize(self, expr: LinearExpression, name: str = "objective"):
+        self._set_objective(expr, "min", name)
+
+    def maximize(self, expr: LinearExpression, name: str = "objective"):
+        self._set_objective(expr, "max", name)
+
+    def _set_objective(
+        self, expr: Any, sense: Literal["min", "max"], name: str
+    ) -> None:
+        if isinstance(expr, Variables):
+            expr = expr.sum()
+        if len(expr) != 1:
+            expr = expr.sum()
+        self._objective, self.sense, self.objective_name = expr, sense, name
+
+    def _assemble(self) -> tuple[Any, ...]:
+        """Objective ``(c, constant)`` and stacked rows ``(A, lower, upper)``."""
+        n = self._n
+        c = np.zeros(n)
+        constant = 0.0
+        if self._objective is not None:
+            c = _widen(self._objective.matrix, n).toarray().ravel()
+            constant = float(self._objective.constant[0])
+        if self.constraints:
+            A = sp.vstack(
+                [_widen(k.matrix, n) for k in self.constraints.values()],
+                format="csr",
+            )
+            lower = np.concatenate(
+                [k.lower for k in self.constraints.values()]
+            )
+            upper = np.concatenate(
+                [k.upper for k in self.constraints.values()]
+            )
+        else:
+            A, lower, upper = sp.csr_matrix((0, n)), np.zeros(0), np.zeros(0)
+        return c, constant, A, lower, upper
+
+    def solve(
+        self,
+        time_limit: float | None = None,
+        mip_rel_gap: float | None = None,
+    ) -> SparseSolution:
+        """Solve with HiGHS and store values on the variable blocks."""
+        started = time.perf_counter()
+        c, constant, A, lower, upper = self._assemble()
+        sign = -1.0 if self.sense == "max" else 1.0
+        lb, ub = (
+            np.concatenate(self._lb or [[]]),
+            np.concatenate(self._ub or [[]]),
+        )
+        integrality = np.concatenate(
+            [np.full(v.size, int(v.integer)) for v in self.variables.values()]
+            or [[]]
+        )
+        options: dict[str, Any] = {}
+        if time_limit is not None:
+            options["time_limit"] = time_limit
+
+        row_duals = None
+        mip_gap = None
+        if integrality.any():
+            if mip_rel_gap is not None:
+                options["mip_rel_gap"] = mip_rel_gap
+            res = milp(
+                sign * c,
+                constraints=LinearConstraint(A, lower, upper)
+                if A.shape[0]
+                else None,
+                integrality=integrality,
+                bounds=Bounds(lb, ub),
+                options=options,
+            )
+            mip_gap = getattr(res, "mip_gap", None)
+        else:
+            res, row_duals = linprog_two_sided(
+                sign * c, A, lower, upper, lb, ub, options
+            )
+            if row_duals is not None:
+                row_duals = sign * row_duals
+
+        status = _STATUS.get(res.status, "numerical_error")
+        x = res.x if res.x is not None else None
+        solution = SparseSolution(
+            status=status,
+            message=str(res.message),
+            objective_value=(
+                float(c @ x + constant) if x is not None else None
+            ),
+            x=x,
+            solve_time=time.perf_counter() - started,
+            mip_gap=mip_gap,
+        )
+        for v in self.variables.values():
+            if x is None:
+                v.value = None
+                continue
+            v.value = x[v.columns.ravel()].reshape(v.shape)
+            if v.integer:
+                v.value = np.round(v.value) + 0.0
+            solution.values[v.name] = v.value
+        if row_duals is not None:
+            start = 0
+            for name, k in self.constraints.items():
+                solution.duals[name] = row_duals[start : start + len(k.lower)]
+                start += len(k.lower)
+        self.solution = solution
+        return solution
+
+    def summary(self, max_items: int = 20) -> str:
+        """Status, objective and the largest nonzero variable values."""
+        sol = self.solution
+        if sol is None:
+            return f"{self.name}: not solved"
+        lines = [
+            f"Solver Status: {sol.status}",
+            f"Termination Condition: {sol.message}",
+            f"Variables: {self.num_variables}, constraints: "
+            f"{self.num_constraints}, solve time {sol.solve_time:.3f} s",
+        ]
+        if sol.objective_value is not None:
+            lines.append(f"{self.objective_name}: {sol.objective_value:.6g}")
+        shown = 0
+        for v in self.variables.values():
+            if v.value is None:
+                continue
+            nz = np.flatnonzero(np.abs(v.value.ravel()) > 1e-9)
+            for i in nz[: max_items - shown]:
+                idx = np.unravel_index(i, v.shape) if v.shape else ()
+                lines.append(
+                    f"{v.name}{list(map(int, idx))} = {v.value.ravel()[i]:.6g}"
+                )
+            shown += min(len(nz), max_items - shown)
+            if len(nz) and shown >= max_items:
+                lines.append("...")
+                break
+        return "\n".join(lines)
+
+    def result_dict(self) -> dict[str, Any]:
+        """Result in the structure of ``safe_execute_python_code``."""
+        sol = self.solution
+        if sol is None:
+            return {
+                "stdout": self.summary(),
+                "error": "Model has not been solved.",
+            }
+        result: dict[str, Any] = {
+            "stdout": self.summary(),
+            "error": None if sol.success else f"Solver status: {sol.status}",
+            "status": sol.status,
+            "n_variables": self.num_variables,
+            "n_constraints": self.num_constraints,
+            "solve_time": sol.solve_time,
+        }
+        if sol.objective_value is not None:
+            result["objective_name"] = self.objective_name
+            result["objective_value"] = sol.objective_value
+        return result
@@ -0,0 +1,445 @@
+"""Two-stage stochastic LPs by the L-shaped method.
+
+The extensive form of a two-stage program stacks one copy of the
+second-stage variables and constraints per scenario, so it grows linearly
+with the number of scenarios. :func:`solve_l_shaped` (Benders
+decomposition) instead alternates between a small master problem over the
+first-stage decisions and independent scenario subproblems. The
+subproblems are solved across a process pool. Each worker rebuilds its
+scenarios from the index through a user-supplied generator, and returns
+one aggregated optimality cut per chunk. Memory therefore grows with the
+number of workers, not with the number of scenarios.
+
+The problem is::
+
+    min  c'x + sum_s p_s Q_s(x)
+    s.t. lower <= A x <= upper,  lb <= x <= ub  (x optionally integer)
+
+    Q_s(x) = min q_s'y  s.t.  lower_s <= T_s x + W_s y <= upper_s,
+                              y_lb_s <= y <= y_ub_s
+"""
+
+import math
+import os
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import ArrayLike
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from .sparse_lp import linprog_two_sided
+
+
+@dataclass(frozen=True)
+class FirstStage:
+    """First-stage cost, constraints and bounds."""
+
+    c: ArrayLike
+    A: Any = None
+    lower: ArrayLike = -np.inf
+    upper: ArrayLike = np.inf
+    lb: ArrayLike = 0.0
+    ub: ArrayLike = np.inf
+    integer: ArrayLike | None = None
+
+    @property
+    def n(self) -> int:
+        return int(np.size(self.c))
+
+
+@dataclass
+class Scenario:
+    """One realization of the second stage; matrices may be sparse."""
+
+    probability: float
+    q: ArrayLike
+    T: Any
+    W: Any
+    lower: ArrayLike = -np.inf
+    upper: ArrayLike = np.inf
+    y_lb: ArrayLike = 0.0
+    y_ub: ArrayLike = np.inf
+
+
+ScenarioGenerator = Callable[[int], Scenario]
+
+
+def _rows(value: ArrayLike, n: int) -> np.ndarray:
+    return np.broadcast_to(np.asarray(value, dtype=float), (n,)).copy()
+
+
+def recourse(
+    scenario: Scenario, x: np.ndarray
+) -> tuple[float, np.ndarray, bool]:
+    """Evaluate one scenario at the first-stage decision ``x``.
+
+    Returns ``(Q(x), dQ/dx, True)`` if the subproblem is feasible.
+    Otherwise it returns ``(F(x), dF/dx, False)``, where ``F`` is the
+    minimal total constraint violation of the elastic subproblem; this
+    yields the feasibility cut ``F(x) + g'(x' - x) <= 0``.
+    """
+    T, W = sp.csr_matrix(scenario.T), sp.csr_matrix(scenario.W)
+    m, n_y = W.shape
+    Tx = T @ x
+    lower = _rows(scenario.lower, m) - Tx
+    upper = _rows(scenario.upper, m) - Tx
+    y_lb, y_ub = _rows(scenario.y_lb, n_y), _rows(scenario.y_ub, n_y)
+    q = np.asarray(scenario.q, dtype=float)
+
+    res, duals = linprog_two_sided(q, W, lower, upper, y_lb, y_ub)
+    if res.status == 0:
+        # Both row bounds shift by -T x, hence dQ/dx = -T' duals.
+        return float(res.fun), -(T.T @ duals), True
+    if res.status != 2:
+        raise RuntimeError(f"Scenario subproblem failed: {res.message}")
+
+    # Phase 1: minimize the violation s+ + s- of the elastic rows.
+    eye = sp.eye(m, format="csr")
+    res, duals = linprog_two_sided(
+        np.concatenate([np.zeros(n_y), np.ones(2 * m)]),
+        sp.hstack([W, eye, -eye], format="csr"),
+        lower,
+        upper,
+        np.concatenate([y_lb, np.zeros(2 * m)]),
+        np.concatenate([y_ub, np.full(2 * m, np.inf)]),
+    )
+    if res.status != 0:
+        raise RuntimeError(f"Feasibility subproblem failed: {res.message}")
+    return float(res.fun), -(T.T @ duals), False
+
+
+@dataclass
+class _Batch:
+    value: float
+    gradient: np.ndarray
+    feasibility_cuts: list[tuple[float, np.ndarray]]
+    n_scenarios: int
+    elapsed: float
+
+
+_GENERATOR: ScenarioGenerator | None = None
+
+
+def _init_worker(generator: ScenarioGenerator) -> None:
+    global _GENERATOR
+    _GENERATOR = generator
+
+
+def _evaluate(indices: range, x: np.ndarray) -> _Batch:
+    """Probability-weighted recourse value and gradient over ``indices``."""
+    generator = _GENERATOR
+    assert generator is not None
+    started = time.perf_counter()
+    value, gradient, cuts = 0.0, np.zeros_like(x), []
+    for i in indices:
+        scenario = generator(i)
+        v, g, feasible = recourse(scenario, x)
+        if feasible:
+            value += scenario.probability * v
+            gradient += scenario.probability * g
+        else:
+            cuts.append((v, g))
+    return _Batch(
+        value, gradient, cuts, len(indices), time.perf_counter() - started
+    )
+
+
+@dataclass
+class IterationLog:
+    """Bounds and timing of one L-shaped iteration."""
+
+    iteration: int
+    lower_bound: float
+    upper_bound: float
+    master_time: float
+    subproblem_time: float
+    feasibility_cuts: int
+
+    @property
+    def gap(self) -> float:
+        return self.upper_bound - self.lower_bound
+
+
+@dataclass
+class LShapedResult:
+    """Best first-stage decision and the convergence history."""
+
+    x: np.ndarray | None
+    objective: float
+    lower_bound: float
+    converged: bool
+    n_scenarios: int
+    iterations: list[IterationLog] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def gap(self) -> float:
+        return self.objective - self.lower_bound
+
+    def summary(self) -> str:
+        lines = [
+            f"{'iter':>4} {'lower':>14} {'upper':>14} {'gap':>11} "
+            f"{'master s':>9} {'scen s':>9} {'feas':>5}"
+        ]
+        for it in self.iterations:
+            lines.append(
+                f"{it.iteration:>4} {it.lower_bound:>14.6g} "
+                f"{it.upper_bound:>14.6g} {it.gap:>11.3g} "
+                f"{it.master_time:>9.3f} {it.subproblem_time:>9.3f} "
+                f"{it.feasibility_cuts:>5}"
+            )
+        status = "converged" if self.converged else "not converged"
+        lines.append(
+            f"{status}: objective {self.objective:.6g}, lower bound "
+            f"{self.lower_bound:.6g}, {len(self.iterations)} iterations, "
+            f"{self.n_scenarios} scenarios, {self.elapsed:.2f} s"
+        )
+        return "\n".join(lines)
+
+
+class _Master:
+    """Master problem over ``[x, theta]`` with a growing set of cuts."""
+
+    def __init__(self, first: FirstStage, theta_lower: float = -math.inf):
+        n = first.n
+        self.theta_lower = theta_lower
+        self.c = np.append(np.asarray(first.c, dtype=float), 1.0)
+        self.lb = np.append(_rows(first.lb, n), 0.0)
+        self.ub = np.append(_rows(first.ub, n), 0.0)
+        if math.isfinite(theta_lower):
+            self.lb[-1], self.ub[-1] = theta_lower, np.inf
+        self.integrality = np.zeros(n + 1)
+        if first.integer is not None:
+            self.integrality[:n] = np.broadcast_to(first.integer, (n,))
+        rows, lower, upper = [], [], []
+        if first.A is not None:
+            A = sp.csr_matrix(first.A)
+            rows.append(sp.hstack([A, sp.csr_matrix((A.shape[0], 1))]))
+            lower.append(_rows(first.lower, A.shape[0]))
+            upper.append(_rows(first.upper, A.shape[0]))
+        self.rows, self.lower, self.upper = rows, lower, upper
+
+    def add_cut(self, coeffs: np.ndarray, theta: float, rhs: float) -> None:
+        """Add ``coeffs'x + theta * theta_var <= rhs``."""
+        self.rows.append(sp.csr_matrix(np.append(coeffs, theta)[None, :]))
+        self.lower.append(np.array([-np.inf]))
+        self.upper.append(np.array([rhs]))
+        if theta:
+            # Without ``theta_lower``, theta is pinned to zero until the
+            # first optimality cut and bounded by the cuts afterwards.
+            self.lb[-1], self.ub[-1] = self.theta_lower, np.inf
+
+    def solve(self) -> tuple[np.ndarray, float]:
+        n = len(self.c)
+        A = (
+            sp.vstack(self.rows, format="csr")
+            if self.rows
+            else sp.csr_matrix((0, n))
+        )
+        lower = np.concatenate(self.lower) if self.lower else np.zeros(0)
+        upper = np.concatenate(self.upper) if self.upper else np.zeros(0)
+        if self.integrality.any():
+            res = milp(
+                self.c,
+                constraints=(
+                    LinearConstraint(A, lower, upper) if A.shape[0] else None
+                ),
+                integrality=self.integrality,
+                bounds=Bounds(self.lb, self.ub),
+            )
+        else:
+            res, _ = linprog_two_sided(
+                self.c, A, lower, upper, self.lb, self.ub
+            )
+        if res.status != 0:
+            hint = (
+                " Bound x or pass theta_lower."
+                if not math.isfinite(self.theta_lower)
+                else ""
+            )
+            raise RuntimeError(f"Master problem failed: {res.message}.{hint}")
+        return res.x, float(res.fun)
+
+
+def _chunks(n: int, size: int) -> list[range]:
+    return [range(i, min(i + size, n)) for i in range(0, n, size)]
+
+
+def solve_l_shaped(
+    first_stage: FirstStage,
+    scenario: ScenarioGenerator,
+    n_scenarios: int,
+    workers: int | None = None,
+    chunk_size: int | None = None,
+    tol: float = 1e-6,
+    max_iter: int = 100,
+    callback: Callable[[IterationLog], None] | None = None,
+    theta_lower: float = -math.inf,
+) -> LShapedResult:
+    """Solve a two-stage stochastic LP/MILP by the L-shaped method.
+
+    Args:
+        first_stage: First-stage data; ``integer`` marks integer
+            components (the master is then solved with ``milp``).
+        scenario: ``scenario(i)`` returns :class:`Scenario` ``i`` for
+            ``0 <= i < n_scenarios``. It must be deterministic, and for
+            ``workers > 1`` picklable (a module-level function or a
+            ``functools.partial`` of one).
+        n_scenarios: Number of scenarios.
+        workers: Process count; ``None`` uses all CPUs, ``1`` runs in
+            process.
+        chunk_size: Scenarios per task; defaults to about four tasks per
+            worker.
+        tol: Relative gap ``(upper - lower) / max(1, |upper|)`` to stop.
+        max_iter: Iteration limit.
+        callback: Called with every :class:`IterationLog`.
+        theta_lower: Lower bound on the expected recourse cost, e.g.
+            ``0`` for nonnegative costs. Without it the master relies on
+            the cuts alone and ``x`` must be bounded.
+
+    Returns:
+        An :class:`LShapedResult` with the best decision found.
+    """
+    started = time.perf_counter()
+    workers = min(workers or os.cpu_count() or 1, n_scenarios)
+    chunk_size = chunk_size or max(1, math.ceil(n_scenarios / (4 * workers)))
+    chunks = _chunks(n_scenarios, chunk_size)
+    master = _Master(first_stage, theta_lower)
+    n = first_stage.n
+    c = np.asarray(first_stage.c, dtype=float)
+
+    best_x, best_upper, lower_bound = None, math.inf, -math.inf
+    has_theta = False
+    log: list[IterationLog] = []
+    converged = False
+    pool = (
+        ProcessPoolExecutor(
+            workers, initializer=_init_worker, initargs=(scenario,)
+        )
+        if workers > 1
+        else None
+    )
+    if pool is None:
+        _init_worker(scenario)
+    try:
+        for iteration in range(1, max_iter + 1):
+            t0 = time.perf_counter()
+            solution, master_value = master.solve()
+            master_time = time.perf_counter() - t0
+            x = solution[:n]
+            if has_theta or math.isfinite(theta_lower):
+                lower_bound = max(lower_bound, master_value)
+
+            t0 = time.perf_counter()
+            if pool is None:
+                batches = [_evaluate(chunk, x) for chunk in chunks]
+            else:
+                batches = list(pool.map(_evaluate, chunks, [x] * len(chunks)))
+            subproblem_time = time.perf_counter() - t0
+
+            feasibility = [cut for b in batches for cut in b.feasibility_cuts]
+            for value, grad in feasibility:
+                master.add_cut(grad, 0.0, grad @ x - value)
+            if not feasibility:
+                value = sum(b.value for b in batches)
+                grad = sum(b.gradient for b in batches)
+                upper = float(c @ x + value)
+                if upper < best_upper:
+                    best_x, best_upper = x.copy(), upper
+                # theta >= value + grad'(x' - x)
+                master.add_cut(grad, -1.0, grad @ x - value)
+                has_theta = True
+
+            entry = IterationLog(
+                iteration,
+                lower_bound,
+                best_upper,
+                master_time,
+                subproblem_time,
+                len(feasibility),
+            )
+            log.append(entry)
+            if callback is not None:
+                callback(entry)
+            gap = best_upper - lower_bound
+            if math.isfinite(gap) and gap <= tol * max(1.0, abs(best_upper)):
+                converged = True
+                break
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    return LShapedResult(
+        x=best_x,
+        objective=best_upper,
+        lower_bound=lower_bound,
+        converged=converged,
+        n_scenarios=n_scenarios,
+        iterations=log,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+def solve_extensive_form(
+    first_stage: FirstStage,
+    scenarios: Sequence[Scenario],
+) -> tuple[np.ndarray, float]:
+    """Solve the monolithic deterministic equivalent.
+
+    Meant as a reference for small instances: all scenarios are held in
+    memory at once. Returns the first-stage decision and the objective.
+    """
+    n = first_stage.n
+    blocks_c = [np.asarray(first_stage.c, dtype=float)]
+    lb, ub = [_rows(first_stage.lb, n)], [_rows(first_stage.ub, n)]
+    rows, lower, upper = [], [], []
+    n_cols = n + sum(sp.csr_matrix(s.W).shape[1] for s in scenarios)
+    if first_stage.A is not None:
+        A = sp.csr_matrix(first_stage.A)
+        rows.append(sp.hstack([A, sp.csr_matrix((A.shape[0], n_cols - n))]))
+        lower.append(_rows(first_stage.lower, A.shape[0]))
+        upper.append(_rows(first_stage.upper, A.shape[0]))
+    offset = n
+    for s in scenarios:
+        T, W = sp.csr_matrix(s.T), sp.csr_matrix(s.W)
+        m, n_y = W.shape
+        rows.append(
+            sp.hstack(
+                [
+                    T,
+                    sp.csr_matrix((m, offset - n)),
+                    W,
+                    sp.csr_matrix((m, n_cols - offset - n_y)),
+                ]
+            )
+        )
+        lower.append(_rows(s.lower, m))
+        upper.append(_rows(s.upper, m))
+        blocks_c.append(s.probability * np.asarray(s.q, dtype=float))
+        lb.append(_rows(s.y_lb, n_y))
+        ub.append(_rows(s.y_ub, n_y))
+        offset += n_y
+
+    A = sp.vstack(rows, format="csr")
+    c = np.concatenate(blocks_c)
+    lower, upper = np.concatenate(lower), np.concatenate(upper)
+    lb, ub = np.concatenate(lb), np.concatenate(ub)
+    if first_stage.integer is not None and np.any(first_stage.integer):
+        integrality = np.zeros(n_cols)
+        integrality[:n] = np.broadcast_to(first_stage.integer, (n,))
+        res = milp(
+            c,
+            constraints=LinearConstraint(A, lower, upper),
+            integrality=integrality,
+            bounds=Bounds(lb, ub),
+        )
+    else:
+        res, _ = linprog_two_sided(c, A, lower, upper, lb, ub)
+    if res.status != 0:
+        raise RuntimeError(f"Extensive form failed: {res.message}")
+    return res.x[:n], float(res.fun)
@@ -0,0 +1,48 @@
+from .cancel import CancelToken, RunCancelled
+from .candidates import Candidate, RaceReport
+from .engine import Clarifier, Pipeline
+from .events import (
+    CandidatesRaced,
+    ClarificationNeeded,
+    CodeGenerated,
+    ExecutionProgress,
+    ExpertCompleted,
+    ExpertStarted,
+    LintPassed,
+    ModelRepair,
+    PipelineEvent,
+    Validated,
+)
+from .jobs import Job, JobQueue, QueueFull, RunJob
+from .jobstore import JobCheckpoints, JobStore, StoredJob
+from .limits import StageLimits
+from .runner import LoopRunner, get_runner
+
+__all__ = [
+    "CancelToken",
+    "Candidate",
+    "CandidatesRaced",
+    "ClarificationNeeded",
+    "Clarifier",
+    "CodeGenerated",
+    "ExecutionProgress",
+    "ExpertCompleted",
+    "ExpertStarted",
+    "Job",
+    "JobCheckpoints",
+    "JobQueue",
+    "JobStore",
+    "LintPassed",
+    "LoopRunner",
+    "ModelRepair",
+    "Pipeline",
+    "PipelineEvent",
+    "QueueFull",
+    "RaceReport",
+    "RunCancelled",
+    "RunJob",
+    "StageLimits",
+    "StoredJob",
+    "Validated",
+    "get_runner",
+]
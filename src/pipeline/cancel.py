@@ -0,0 +1,131 @@
+"""Cooperative cancellation of pipeline runs.
+
+A :class:`CancelToken` is handed to :meth:`Pipeline.run` and may be
+cancelled from any thread: a Streamlit session reset, a client that
+cancels its job, or a worker that lost its job. Cancelling it cancels
+the task running the pipeline on its event loop. This aborts the pending
+model request and kills the sandbox process, and the run ends with
+:class:`RunCancelled`. :data:`metrics` counts the work that was avoided.
+"""
+
+import asyncio
+import threading
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from typing import Any
+
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+STAGES = ("expert", "integrator", "validator")
+
+
+class RunCancelled(Exception):
+    """A run ended because its :class:`CancelToken` was cancelled."""
+
+    def __init__(self, reason: str):
+        super().__init__(f"Run cancelled: {reason}.")
+        self.reason = reason
+
+
+class CancelToken:
+    """Thread-safe request to stop one run."""
+
+    def __init__(self) -> None:
+        self.reason: str | None = None
+        self._lock = threading.Lock()
+        self._callbacks: list[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """Cancel once; later calls keep the first reason."""
+        with self._lock:
+            if self.reason is not None:
+                return
+            self.reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """Call ``callback`` on cancellation; returns an unsubscribe."""
+        with self._lock:
+            if self.reason is None:
+                self._callbacks.append(callback)
+                return lambda: self._unsubscribe(callback)
+        callback()
+        return lambda: None
+
+    def _unsubscribe(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+class CancelMetrics:
+    """Work avoided by cancelled runs, counted per process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.runs: Counter[str] = Counter()
+        self.stages_skipped = 0
+        self.llm_requests = 0
+        self.sandboxes_killed = 0
+
+    def run_cancelled(self, reason: str, stage: str) -> None:
+        """Record a run stopped during ``stage``."""
+        with self._lock:
+            self.runs[reason] += 1
+            self.stages_skipped += len(STAGES) - STAGES.index(stage) - 1
+
+    def llm_request_cancelled(self) -> None:
+        with self._lock:
+            self.llm_requests += 1
+
+    def sandbox_killed(self) -> None:
+        with self._lock:
+            self.sandboxes_killed += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-ready counters."""
+        with self._lock:
+            return {
+                "runs_cancelled": dict(self.runs),
+                "stages_skipped": self.stages_skipped,
+                "llm_requests_cancelled": self.llm_requests,
+                "sandboxes_killed": self.sandboxes_killed,
+            }
+
+
+metrics = CancelMetrics()
+
+
+class _TrackedModel(WrapperModel):
+    """Model that counts requests cancelled while in flight."""
+
+    async def request(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return await super().request(*args, **kwargs)
+        except asyncio.CancelledError:
+            metrics.llm_request_cancelled()
+            raise
+
+    @asynccontextmanager
+    async def request_stream(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        try:
+            async with super().request_stream(*args, **kwargs) as stream:
+                yield stream
+        except asyncio.CancelledError:
+            metrics.llm_request_cancelled()
+            raise
+
+
+def track_model(model: Model) -> Model:
+    """Wrap ``model`` so that cancelled requests count in :data:`metrics`."""
+    return _TrackedModel(model)
@@ -0,0 +1,157 @@
+"""Race several Integrator candidates and keep one that validates.
+
+Each candidate generates code, optionally on its own model tier, and is
+executed in its own sandbox process as soon as its code is ready. With
+``selection="first"`` the first candidate that validates wins and the
+others are cancelled. With ``"best"``, every candidate that finishes
+before the deadline is compared on its objective. :class:`RaceReport`
+records the tokens spent on the extra candidates against the latency
+they saved.
+"""
+
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import anyio
+
+# ``generate(index)`` returns a candidate with its code and tokens, and
+# its results if the code was already executed.
+Generate = Callable[[int], Awaitable["Candidate"]]
+Execute = Callable[[str], Awaitable[dict[str, Any]]]
+Selection = Literal["first", "best"]
+
+
+@dataclass
+class Candidate:
+    """One Integrator run and the execution of its code."""
+
+    index: int
+    code: str = ""
+    linted: bool = False
+    results: dict[str, Any] | None = None
+    tokens: int = 0
+    # Seconds from the start of the race until this candidate finished.
+    latency: float = 0.0
+    error: str | None = None
+
+    @property
+    def validated(self) -> bool:
+        """Executed without error, diagnosis or feasibility violation."""
+        results = self.results
+        if self.error is not None or results is None:
+            return False
+        if results.get("error") is not None or "diagnosis" in results:
+            return False
+        feasibility = results.get("feasibility") or {}
+        return feasibility.get("feasible") is not False
+
+    def score(self) -> float | None:
+        """Objective value to minimize, or None if there is none."""
+        results = self.results or {}
+        value = results.get("objective_value")
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            return None
+        return -value if results.get("objective_sense") == "max" else value
+
+
+@dataclass(frozen=True)
+class RaceReport:
+    """Cost and benefit of racing ``launched`` candidates.
+
+    Tokens are counted for finished candidates only; a cancelled request
+    may still have been billed for its prompt.
+    """
+
+    launched: int
+    finished: int
+    validated: int
+    winner: int | None
+    # Seconds until the winner finished, or the whole race without one.
+    latency: float
+    # Expected latency of a single candidate; candidates that were
+    # cancelled count with the time they had run (a lower bound).
+    mean_latency: float
+    tokens: int
+    winner_tokens: int
+
+    @property
+    def extra_tokens(self) -> int:
+        return self.tokens - self.winner_tokens
+
+    @property
+    def latency_saved(self) -> float:
+        return max(0.0, self.mean_latency - self.latency)
+
+
+def select(
+    finished: list[Candidate], selection: Selection = "first"
+) -> Candidate | None:
+    """The winning candidate among ``finished``, in finishing order.
+
+    Without a validated candidate, one with a diagnosis is returned so
+    that it can be repaired, else any candidate that produced code.
+    """
+    validated = [c for c in finished if c.validated]
+    if selection == "best":
+        scored = [c for c in validated if c.score() is not None]
+        if scored:
+            return min(scored, key=lambda c: c.score())
+    if validated:
+        return validated[0]
+    for candidate in finished:
+        if candidate.results is not None and "diagnosis" in candidate.results:
+            return candidate
+    return next((c for c in finished if c.error is None), None)
+
+
+async def race(
+    generate: Generate,
+    execute: Execute,
+    n: int,
+    deadline: float | None = None,
+    selection: Selection = "first",
+) -> tuple[Candidate | None, RaceReport]:
+    """Run ``n`` candidates concurrently and return the winner.
+
+    Unfinished candidates are cancelled once one validates (with
+    ``"first"``) or when ``deadline`` seconds have passed.
+    """
+    started = time.perf_counter()
+    finished: list[Candidate] = []
+
+    async def attempt(index: int, scope: anyio.CancelScope) -> None:
+        candidate = Candidate(index)
+        try:
+            candidate = await generate(index)
+            candidate.index = index
+            if candidate.results is None:
+                candidate.results = await execute(candidate.code)
+        except Exception as e:
+            candidate.error = str(e) or type(e).__name__
+        candidate.latency = time.perf_counter() - started
+        finished.append(candidate)
+        if selection == "first" and candidate.validated:
+            scope.cancel()
+
+    with anyio.move_on_after(deadline):
+        async with anyio.create_task_group() as tg:
+            for index in range(n):
+                tg.start_soon(attempt, index, tg.cancel_scope)
+    elapsed = time.perf_counter() - started
+
+    winner = select(finished, selection)
+    latencies = [c.latency for c in finished]
+    latencies += [elapsed] * (n - len(finished))
+    report = RaceReport(
+        launched=n,
+        finished=len(finished),
+        validated=sum(c.validated for c in finished),
+        winner=winner.index if winner else None,
+        latency=winner.latency if winner else elapsed,
+        mean_latency=sum(latencies) / n if n else 0.0,
+        tokens=sum(c.tokens for c in finished),
+        winner_tokens=winner.tokens if winner else 0,
+    )
+    return winner, report
@@ -0,0 +1,171 @@
+"""Single-flight coalescing of identical concurrent runs.
+
+When several clients submit the same prompt within seconds, as happens
+with the suggested prompts in demos and classes, they share one run:
+the first request starts it and later identical requests join it. Each
+of them receives every event, including those sent before it joined.
+Runs are identical when the normalized prompt, the data files, the API
+key class and the pipeline settings are. A data file is identified by
+its path, size and modification time, so that keying a run does not
+read it. A client that cancels
+leaves the run; the run itself is cancelled when its last client leaves.
+"""
+
+import asyncio
+import hashlib
+import json
+import threading
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any
+
+from config import Settings
+from src.agents.quota import key_id
+
+from .cancel import CancelToken, RunCancelled
+from .events import PipelineEvent
+
+Start = Callable[[CancelToken], AsyncIterator[PipelineEvent]]
+
+# Settings that do not change what a run produces.
+_SECRETS = {"gemini_api_key", "gemini_api_keys", "logfire_token"}
+
+
+def flight_key(
+    prompt: str,
+    data_files: list[str] | None,
+    api_key: str | None,
+    settings: Settings,
+) -> str:
+    """Identity of a run for coalescing."""
+    files = []
+    for path in data_files or []:
+        stat = Path(path).stat()
+        files.append(
+            [str(Path(path).resolve()), stat.st_size, stat.st_mtime_ns]
+        )
+    identity = {
+        "prompt": " ".join(prompt.split()).casefold(),
+        "data": files,
+        "key": key_id(api_key) if api_key else "system",
+        "settings": settings.model_dump(mode="json", exclude=_SECRETS),
+    }
+    encoded = json.dumps(identity, sort_keys=True).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class _Flight:
+    """One shared run, its events so far and its clients."""
+
+    def __init__(self) -> None:
+        self.loop = asyncio.get_running_loop()
+        self.cancel = CancelToken()
+        self.events: list[PipelineEvent] = []
+        self.error: BaseException | None = None
+        self.done = False
+        self.clients = 0
+        self.finished = asyncio.Event()
+        self.task: asyncio.Task | None = None
+        self._changed = asyncio.Event()
+
+    def notify(self) -> None:
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def changed(self, seen: int) -> None:
+        """Wait for news after ``seen`` events."""
+        changed = self._changed
+        if len(self.events) == seen and not self.done:
+            await changed.wait()
+
+
+class Coalescer:
+    """In-flight runs by :func:`flight_key`, shared by their clients.
+
+    Runs are shared only by clients on the event loop that started them.
+    """
+
+    def __init__(self) -> None:
+        self._flights: dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.started = 0
+        self.joined = 0
+
+    async def join(
+        self, key: str, start: Start, cancel: CancelToken | None = None
+    ) -> AsyncIterator[PipelineEvent]:
+        """Events of the run for ``key``, started with ``start`` if needed.
+
+        ``start`` receives the token that cancels the shared run. Raises
+        :class:`RunCancelled` when ``cancel`` is cancelled.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.loop is loop:
+                self.joined += 1
+            else:
+                flight = _Flight()
+                if key not in self._flights:
+                    self._flights[key] = flight
+                self.started += 1
+                flight.task = loop.create_task(self._drive(key, flight, start))
+            flight.clients += 1
+        cancel = cancel or CancelToken()
+        unsubscribe = cancel.on_cancel(
+            lambda: loop.call_soon_threadsafe(flight.notify)
+        )
+        seen = 0
+        try:
+            while True:
+                if cancel.cancelled:
+                    raise RunCancelled(cancel.reason)
+                if seen < len(flight.events):
+                    seen += 1
+                    yield flight.events[seen - 1]
+                    continue
+                if flight.done:
+                    break
+                await flight.changed(seen)
+            if flight.error is not None:
+                raise flight.error
+        finally:
+            unsubscribe()
+            flight.clients -= 1
+            if flight.clients == 0 and not flight.done:
+                # The last client waits until the model request and the
+                # sandbox are gone, as it would for a run of its own.
+                flight.cancel.cancel(cancel.reason or "all clients left")
+                await flight.finished.wait()
+
+    async def _drive(self, key: str, flight: _Flight, start: Start) -> None:
+        try:
+            async with aclosing(start(flight.cancel)) as events:
+                async for event in events:
+                    flight.events.append(event)
+                    flight.notify()
+        except asyncio.CancelledError:
+            flight.error = RunCancelled(flight.cancel.reason or "cancelled")
+            raise
+        except Exception as e:
+            flight.error = e
+        finally:
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            flight.done = True
+            flight.finished.set()
+            flight.notify()
+
+    def snapshot(self) -> dict[str, Any]:
+        """JSON-ready counters: runs started and requests that joined one."""
+        with self._lock:
+            return {
+                "runs_started": self.started,
+                "requests_joined": self.joined,
+                "in_flight": len(self._flights),
+            }
+
+
+flights = Coalescer()
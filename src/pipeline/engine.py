@@ -0,0 +1,561 @@
+"""Expert → Integrator → Validator orchestration as an event stream.
+
+:meth:`Pipeline.run` is an async generator of typed stage events. It is
+the only implementation of the pipeline; the CLI (``main.py``), the
+Streamlit backend (``main_app.main``) and services consume its events
+and render them progressively.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, MutableMapping
+from contextlib import aclosing, nullcontext
+from typing import Any
+
+import logfire
+from pydantic_ai.messages import ModelMessage, ModelResponse
+from pydantic_ai.models import Model
+
+from config import Settings
+from src.agents import (
+    ExpertAgent,
+    ExpertDeps,
+    ExpertOutput,
+    IntegratorAgent,
+    IntegratorDeps,
+    IntegratorOutput,
+    ValidatorAgent,
+    ValidatorDeps,
+)
+from src.agents.base import get_model
+from src.agents.sandbox import execute_code
+from src.artifacts import ArtifactStore, new_run_id, problem_key
+from src.datasets import Table, load_tables, schema_summary
+
+from . import precomputed
+from .cancel import CancelToken, RunCancelled, track_model
+from .cancel import metrics as cancel_metrics
+from .candidates import Candidate, RaceReport, race
+from .coalesce import flight_key, flights
+from .events import (
+    CandidatesRaced,
+    ClarificationNeeded,
+    CodeGenerated,
+    ExecutionProgress,
+    ExpertCompleted,
+    ExpertStarted,
+    LintPassed,
+    ModelRepair,
+    PipelineEvent,
+    Validated,
+)
+from .history import compact_history
+from .limits import StageLimits
+from .speculation import Speculation
+
+Clarifier = Callable[[list[str]], Awaitable[str]]
+
+# The stage a run is in after each kind of event.
+_STAGE_AFTER = {
+    "expert_completed": "integrator",
+    "candidates_raced": "integrator",
+    "code_generated": "validator",
+    "lint_passed": "validator",
+    "execution_progress": "validator",
+    "model_repair": "validator",
+}
+
+
+class Pipeline:
+    """Run the three agents and report progress as events.
+
+    Agents are created once per pipeline, so one instance can serve many
+    runs with the same API key. ``limits`` caps concurrent model requests
+    and sandbox executions across all pipelines sharing it.
+    """
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        api_key: str | None = None,
+        store: ArtifactStore | None = None,
+        limits: StageLimits | None = None,
+    ):
+        self.settings = settings or Settings()
+        self.api_key = api_key
+        self.expert = ExpertAgent(api_key).agent
+        self.integrator = IntegratorAgent(api_key).agent
+        self.validator = ValidatorAgent(api_key).agent
+        self.limits = limits
+        for agent in (self.expert, self.integrator, self.validator):
+            agent.model = self._wrap_model(agent.model)
+        self.store = store or ArtifactStore(
+            self.settings.artifact_dir, self.settings.artifact_max_bytes
+        )
+        # Read once, so serving an example costs no file reads per run.
+        self.instructions = precomputed.instruction_hashes()
+        self.example_keys = precomputed.example_keys()
+
+    async def run(
+        self,
+        prompt: str,
+        data_files: list[str] | None = None,
+        clarify: Clarifier | None = None,
+        checkpoints: MutableMapping[str, Any] | None = None,
+        history: list[ModelMessage] | None = None,
+        cancel: CancelToken | None = None,
+    ) -> AsyncIterator[PipelineEvent]:
+        """Yield the events of one run.
+
+        ``data_files`` are CSV/Parquet paths; only their schema enters the
+        prompts and the generated code reads the values from ``data``.
+        When the Expert asks questions, ``clarify`` is awaited for the
+        answers, at most ``settings.max_clarifications`` times; without it,
+        or once the rounds are used up, the run ends after
+        ``ClarificationNeeded``. Answers continue the Expert's message
+        history rather than restarting it. To answer after the run ended,
+        start a new run with the answer as ``prompt`` and the event's
+        ``history``.
+
+        ``checkpoints`` receives the JSON-ready output of every finished
+        stage (``"expert"``, ``"code"``, ``"execution"``). A run given the
+        checkpoints of an interrupted one resumes after its last finished
+        stage instead of calling the agents again.
+
+        Cancelling ``cancel``, from any thread, aborts the pending model
+        request or sandbox execution and ends the run with
+        :class:`RunCancelled`.
+
+        With ``settings.serve_precomputed``, a prompt of a bundled example
+        without data files or history is answered from its precomputed
+        result when that is fresh (see ``src/pipeline/precomputed``).
+        With ``settings.coalesce_requests``, a run without ``clarify``,
+        ``checkpoints`` and ``history`` joins an identical run in flight
+        instead of starting its own (see ``src/pipeline/coalesce``).
+        """
+        if (
+            self.settings.coalesce_requests
+            and clarify is None
+            and checkpoints is None
+            and not history
+        ):
+            key = flight_key(prompt, data_files, self.api_key, self.settings)
+            events = flights.join(
+                key,
+                lambda token: self._cancellable(
+                    prompt, data_files, None, None, None, token
+                ),
+                cancel,
+            )
+        else:
+            events = self._cancellable(
+                prompt, data_files, clarify, checkpoints, history, cancel
+            )
+        async with aclosing(events):
+            async for event in events:
+                yield event
+
+    async def _cancellable(
+        self,
+        prompt: str,
+        data_files: list[str] | None,
+        clarify: Clarifier | None,
+        checkpoints: MutableMapping[str, Any] | None,
+        history: list[ModelMessage] | None,
+        cancel: CancelToken | None,
+    ) -> AsyncIterator[PipelineEvent]:
+        """:meth:`_run`, stopped by ``cancel``."""
+        cancel = cancel or CancelToken()
+        task = asyncio.current_task()
+        loop = asyncio.get_running_loop()
+        # Only interrupt the task while it runs the pipeline, not while
+        # the consumer handles an event.
+        inside = True
+
+        def interrupt() -> None:
+            if inside and task is not None:
+                task.cancel()
+
+        unsubscribe = cancel.on_cancel(
+            lambda: loop.call_soon_threadsafe(interrupt)
+        )
+        last = None
+        try:
+            async for last in self._run(
+                prompt, data_files, clarify, checkpoints, history
+            ):
+                inside = False
+                yield last
+                inside = True
+                if cancel.cancelled:
+                    raise asyncio.CancelledError
+        except asyncio.CancelledError:
+            stage = _STAGE_AFTER.get(last.kind, "expert") if last else "expert"
+            cancel_metrics.run_cancelled(cancel.reason or "interrupted", stage)
+            if not cancel.cancelled:
+                raise  # a timeout or the consumer going away
+            if task is not None:
+                task.uncancel()
+            raise RunCancelled(cancel.reason) from None
+        finally:
+            inside = False
+            unsubscribe()
+
+    async def _run(
+        self,
+        prompt: str,
+        data_files: list[str] | None,
+        clarify: Clarifier | None,
+        checkpoints: MutableMapping[str, Any] | None,
+        history: list[ModelMessage] | None,
+    ) -> AsyncIterator[PipelineEvent]:
+        """The events of :meth:`run`."""
+        settings, store = self.settings, self.store
+        if (
+            settings.serve_precomputed
+            and not history
+            and not data_files
+            and problem_key(prompt) in self.example_keys
+        ):
+            served = precomputed.lookup(store, prompt, self.instructions)
+            if served is not None:
+                for event in served.events():
+                    yield event
+                return
+        checkpoints = {} if checkpoints is None else checkpoints
+        if "run_id" not in checkpoints:
+            checkpoints["run_id"] = new_run_id()
+        run_id = checkpoints["run_id"]
+        notes = []
+        tables = load_tables(
+            data_files or [], cache_dir=f"{settings.artifact_dir}/datasets"
+        )
+        data_schema = schema_summary(tables)
+
+        # --- Expert Step ---
+        if history:
+            # ``prompt`` answers the questions at the end of ``history``.
+            optimization_prompt = prompt
+        else:
+            optimization_prompt = (
+                f"{prompt}\n\n{data_schema}" if data_schema else prompt
+            )
+        if "expert" in checkpoints:
+            expert_output = ExpertOutput.model_validate(checkpoints["expert"])
+            notes.append("Resumed after the Expert step")
+        else:
+            with logfire.span("expert"):
+                rounds = 0
+                while True:
+                    yield ExpertStarted(optimization_prompt)
+                    expert_result = await self.expert.run(
+                        optimization_prompt,
+                        deps=ExpertDeps(),
+                        message_history=compact_history(
+                            history, settings.expert_history_chars
+                        )
+                        if history
+                        else None,
+                    )
+                    expert_output = expert_result.output
+                    if isinstance(expert_output, ExpertOutput):
+                        break
+                    questions = expert_output.clarification_questions
+                    history = expert_result.all_messages()
+                    yield ClarificationNeeded(
+                        expert_output.explanation, questions, history
+                    )
+                    if (
+                        clarify is None
+                        or rounds >= settings.max_clarifications
+                    ):
+                        return
+                    rounds += 1
+                    optimization_prompt = await clarify(questions)
+            checkpoints["expert"] = expert_output.model_dump(mode="json")
+
+        problem = expert_output.reformulated_problem
+        store.put(
+            "expert_output", expert_output, run_id=run_id, problem=problem
+        )
+        yield ExpertCompleted(expert_output)
+
+        # --- Integrator Step ---
+        attempt = 1
+        code_results = None
+        if "code" in checkpoints:
+            code, attempt = (
+                checkpoints["code"]["code"],
+                checkpoints["code"]["attempt"],
+            )
+            notes.append(f"Resumed with code from attempt {attempt}")
+            yield CodeGenerated(code, attempt=attempt, resumed=True)
+        else:
+            prior = (
+                store.find(problem, "validation", success=True)
+                if settings.reuse_artifacts
+                else None
+            )
+            code = (
+                store.get_text(prior.metadata["code_digest"])
+                if prior
+                else None
+            )
+            with logfire.span("integrator"):
+                if code is not None:
+                    notes.append(f"Reused code from run {prior.run_id}")
+                    yield CodeGenerated(code, reused_from=prior.run_id)
+                elif settings.integrator_candidates > 1:
+                    winner, report = await self.race_candidates(
+                        expert_output, data_schema, tables
+                    )
+                    raced = CandidatesRaced(report)
+                    yield raced
+                    if winner is None:
+                        raise RuntimeError(
+                            "No Integrator candidate produced code within "
+                            f"{settings.candidate_deadline:.0f} s."
+                        )
+                    notes.append(raced.message)
+                    code, code_results = winner.code, winner.results
+                    yield CodeGenerated(code)
+                    if winner.linted:
+                        yield LintPassed(code)
+                else:
+                    integration = await self._integrate(
+                        expert_output, data_schema, tables=tables
+                    )
+                    code, code_results = integration.code, integration.results
+                    yield CodeGenerated(code)
+                    if integration.linted:
+                        yield LintPassed(code)
+            checkpoints["code"] = {"code": code, "attempt": attempt}
+        code_artifact = store.put("code", code, run_id=run_id, problem=problem)
+        if code_results is not None:
+            # Already executed by the race or while linting.
+            checkpoints["execution"] = {
+                "code_digest": code_artifact.digest,
+                "results": code_results,
+            }
+
+        # --- Validator Step ---
+        with logfire.span("validator"):
+            while True:
+                yield ExecutionProgress("executing", f"attempt {attempt}")
+                executed = checkpoints.get("execution") or {}
+                deps = ValidatorDeps(
+                    code=code,
+                    data=dict(tables),
+                    execute=lambda c: self._execute(c, tables),
+                )
+                if executed.get("code_digest") == code_artifact.digest:
+                    # Executed before the interruption; skip the sandbox.
+                    deps.results = executed["results"]
+                validator_result = await self.validator.run("", deps=deps)
+                validation_output = validator_result.output
+                # Only the checks below may fill these, never the model.
+                validation_output.diagnosis = None
+                validation_output.max_violation = None
+                validation_output.feasibility = None
+                results = deps.results or {}
+                checkpoints["execution"] = {
+                    "code_digest": code_artifact.digest,
+                    "results": results,
+                }
+                yield ExecutionProgress(
+                    "executed", results.get("status", ""), deps.results
+                )
+                diagnosis = results.get("diagnosis")
+                if diagnosis is None:
+                    break
+                validation_output.diagnosis = diagnosis["message"]
+                if attempt > settings.diagnosis_retries:
+                    break
+                # One targeted correction from the local conflict set
+                # instead of restarting all agents.
+                repair = ModelRepair(
+                    diagnosis["status"], diagnosis["message"], attempt
+                )
+                notes.append(repair.message)
+                yield repair
+                attempt += 1
+                integration = await self._integrate(
+                    expert_output,
+                    data_schema,
+                    code,
+                    diagnosis["message"],
+                    tables=tables,
+                )
+                code = integration.code
+                yield CodeGenerated(code, attempt=attempt)
+                if integration.linted:
+                    yield LintPassed(code)
+                checkpoints["code"] = {"code": code, "attempt": attempt}
+                code_artifact = store.put(
+                    "code", code, run_id=run_id, problem=problem
+                )
+                if integration.results is not None:
+                    checkpoints["execution"] = {
+                        "code_digest": code_artifact.digest,
+                        "results": integration.results,
+                    }
+
+        feasibility = results.get("feasibility")
+        if feasibility is not None:
+            # The independent check overrides the Validator's judgement.
+            validation_output.max_violation = feasibility.get("max_violation")
+            validation_output.feasibility = feasibility["message"]
+            if feasibility["feasible"] is False:
+                validation_output.success = False
+        if deps.results is not None:
+            store.put(
+                "execution_result",
+                deps.results,
+                run_id=run_id,
+                problem=problem,
+            )
+        store.put(
+            "validation",
+            validation_output,
+            run_id=run_id,
+            problem=problem,
+            metadata={
+                "success": validation_output.success,
+                "code_digest": code_artifact.digest,
+            },
+        )
+        yield Validated(validation_output, deps.results, run_id, notes)
+
+    async def generate_code(
+        self,
+        expert_output: ExpertOutput,
+        data_schema: str = "",
+        previous_code: str | None = None,
+        diagnosis: str | None = None,
+    ) -> tuple[str, bool]:
+        """Run the Integrator and return the code and whether Ruff ran.
+
+        With ``previous_code`` and ``diagnosis`` the Integrator corrects
+        the rows named in the diagnosis instead of starting over.
+        """
+        integration = await self._integrate(
+            expert_output, data_schema, previous_code, diagnosis
+        )
+        return integration.code, integration.linted
+
+    async def race_candidates(
+        self,
+        expert_output: ExpertOutput,
+        data_schema: str = "",
+        tables: dict[str, Table] | None = None,
+    ) -> tuple[Candidate | None, RaceReport]:
+        """Race ``settings.integrator_candidates`` Integrator runs.
+
+        Every candidate's code is executed in its own sandbox process as
+        soon as it is ready. With ``settings.candidate_tiers``, candidate
+        ``i`` starts at ``MODEL_PRIORITY[i]`` instead of the first tier.
+        """
+        settings = self.settings
+        tables = tables or {}
+
+        async def generate(index: int) -> Candidate:
+            model = None
+            if settings.candidate_tiers and index > 0:
+                model = self._wrap_model(get_model(self.api_key, tier=index))
+            return await self._integrate(
+                expert_output, data_schema, model=model, tables=tables
+            )
+
+        return await race(
+            generate,
+            lambda code: self._execute(code, tables),
+            settings.integrator_candidates,
+            settings.candidate_deadline,
+            settings.candidate_selection,
+        )
+
+    async def _integrate(
+        self,
+        expert_output: ExpertOutput,
+        data_schema: str = "",
+        previous_code: str | None = None,
+        diagnosis: str | None = None,
+        model: Model | None = None,
+        tables: dict[str, Table] | None = None,
+    ) -> Candidate:
+        """:meth:`generate_code` as a candidate with the tokens used.
+
+        Given ``tables`` and with ``settings.speculative_execution``,
+        code is executed while Ruff lints it; the candidate's ``results``
+        are set if linting kept the code unchanged.
+        """
+        speculation = None
+        if tables is not None and self.settings.speculative_execution:
+            speculation = Speculation(lambda c: self._execute(c, tables))
+        deps_integrator = IntegratorDeps(
+            reformulated_problem=expert_output.reformulated_problem,
+            problem_type=expert_output.problem_type,
+            assumptions=expert_output.assumptions,
+            on_parsed=speculation.start if speculation else None,
+        )
+        integrator_prompt = f"""
+You are the Integrator Agent.
+Write a runnable Pyomo model for:
+
+{expert_output.reformulated_problem}
+
+Assumptions:
+{expert_output.assumptions}
+
+{data_schema}
+"""
+        if previous_code is not None:
+            integrator_prompt += f"""
+The previous model failed. Local diagnosis:
+{diagnosis}
+
+Correct only the constraints, bounds or data named above (wrong sign,
+direction, units or a missing term) and return the full corrected code.
+
+Previous code:
+```python
+{previous_code}
+```
+"""
+        try:
+            integrator_result = await self.integrator.run(
+                integrator_prompt, deps=deps_integrator, model=model
+            )
+            output = integrator_result.output
+            tokens = sum(
+                message.usage.total_tokens
+                for message in integrator_result.new_messages()
+                if isinstance(message, ModelResponse)
+            )
+            if isinstance(output, IntegratorOutput):
+                return Candidate(0, output.code.strip(), tokens=tokens)
+            # A plain string went through the ``ruff_check`` output
+            # function.
+            code = str(output).strip()
+            results = await speculation.result(code) if speculation else None
+            return Candidate(0, code, True, results, tokens)
+        finally:
+            if speculation is not None:
+                await speculation.cancel()
+
+    async def _execute(
+        self, code: str, tables: dict[str, Table]
+    ) -> dict[str, Any]:
+        """Execute ``code`` in a sandbox process, holding a sandbox slot."""
+        slot = self.limits.sandbox if self.limits else nullcontext()
+        async with slot:
+            try:
+                return await execute_code(code, dict(tables))
+            except asyncio.CancelledError:
+                cancel_metrics.sandbox_killed()
+                raise
+
+    def _wrap_model(self, model: Model) -> Model:
+        """Apply the stage limits and cancellation metrics to ``model``."""
+        if self.limits is not None:
+            model = self.limits.limit_model(model)
+        return track_model(model)
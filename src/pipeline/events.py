@@ -0,0 +1,158 @@
+"""Typed events emitted by :class:`~src.pipeline.Pipeline.run`.
+
+Every event has a ``kind`` tag for serialization and a one-line
+``message`` that consumers can render as it arrives.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
+
+from pydantic_ai.messages import ModelMessage
+
+from src.agents import ExpertOutput, ValidatorOutput
+
+from .candidates import RaceReport
+
+
+@dataclass(frozen=True)
+class ExpertStarted:
+    prompt: str
+    kind: ClassVar[str] = "expert_started"
+
+    @property
+    def message(self) -> str:
+        return "Reformulating the problem..."
+
+
+@dataclass(frozen=True)
+class ClarificationNeeded:
+    explanation: str
+    questions: list[str]
+    # Expert messages to continue with the answer, see ``Pipeline.run``.
+    history: list[ModelMessage] = field(
+        default_factory=list, repr=False, compare=False
+    )
+    kind: ClassVar[str] = "clarification_needed"
+
+    @property
+    def message(self) -> str:
+        return "\n".join(self.questions)
+
+
+@dataclass(frozen=True)
+class ExpertCompleted:
+    output: ExpertOutput
+    kind: ClassVar[str] = "expert_completed"
+
+    @property
+    def message(self) -> str:
+        return f"Problem type: {self.output.problem_type.value}"
+
+
+@dataclass(frozen=True)
+class CodeGenerated:
+    code: str
+    attempt: int = 1
+    reused_from: str | None = None
+    # Restored from the run's own checkpoint rather than generated.
+    resumed: bool = False
+    kind: ClassVar[str] = "code_generated"
+
+    @property
+    def message(self) -> str:
+        if self.resumed:
+            return f"Resumed with code from attempt {self.attempt}"
+        if self.reused_from is not None:
+            return f"Reused code from run {self.reused_from}"
+        return f"Generated model code (attempt {self.attempt})"
+
+
+@dataclass(frozen=True)
+class CandidatesRaced:
+    report: RaceReport
+    kind: ClassVar[str] = "candidates_raced"
+
+    @property
+    def message(self) -> str:
+        r = self.report
+        if r.winner is None:
+            return f"No candidate of {r.launched} produced code"
+        return (
+            f"Candidate {r.winner + 1} of {r.launched} chosen after "
+            f"{r.latency:.1f} s ({r.finished} finished, {r.validated} "
+            f"validated); {r.extra_tokens} extra tokens saved "
+            f"{r.latency_saved:.1f} s"
+        )
+
+
+@dataclass(frozen=True)
+class LintPassed:
+    code: str
+    kind: ClassVar[str] = "lint_passed"
+
+    @property
+    def message(self) -> str:
+        return "Ruff lint passed"
+
+
+@dataclass(frozen=True)
+class ExecutionProgress:
+    stage: str
+    detail: str = ""
+    results: dict[str, Any] | None = None
+    kind: ClassVar[str] = "execution_progress"
+
+    @property
+    def message(self) -> str:
+        return f"{self.stage}: {self.detail}" if self.detail else self.stage
+
+
+@dataclass(frozen=True)
+class ModelRepair:
+    status: str
+    diagnosis: str
+    attempt: int
+    kind: ClassVar[str] = "model_repair"
+
+    @property
+    def message(self) -> str:
+        return f"Model {self.status}, repairing:\n{self.diagnosis}"
+
+
+@dataclass(frozen=True)
+class Validated:
+    output: ValidatorOutput
+    results: dict[str, Any] | None = None
+    run_id: str = ""
+    notes: list[str] = field(default_factory=list)
+    kind: ClassVar[str] = "validated"
+
+    @property
+    def message(self) -> str:
+        """Summary in the format returned by ``main_app.main``."""
+        out = self.output
+        lines = [*self.notes, f" Success: {out.success}"]
+        if out.objective_name:
+            lines.append(f"Objective Name: {out.objective_name}")
+        if out.objective_value is not None:
+            lines.append(f"Objective Value: {out.objective_value}")
+        if out.stdout:
+            lines.append(f"Solver output:\n{out.stdout}")
+        if out.feasibility:
+            lines.append(f"Feasibility check: {out.feasibility}")
+        if out.diagnosis and not out.success:
+            lines.append(f"Diagnosis:\n{out.diagnosis}")
+        return "\n".join(lines)
+
+
+PipelineEvent = (
+    ExpertStarted
+    | ClarificationNeeded
+    | ExpertCompleted
+    | CodeGenerated
+    | CandidatesRaced
+    | LintPassed
+    | ExecutionProgress
+    | ModelRepair
+    | Validated
+)
@@ -0,0 +1,82 @@
+"""Expert message history for multi-round clarification dialogues.
+
+A clarification answer continues the Expert's previous run through its
+pydantic-ai message history instead of resending the whole prompt. Once
+the history grows past a size limit, :func:`compact_history` folds the
+older rounds into the first user prompt as plain question/answer text
+and keeps only the most recent round verbatim.
+"""
+
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    TextPart,
+    ToolCallPart,
+    UserPromptPart,
+)
+
+
+def history_size(messages: list[ModelMessage]) -> int:
+    """Characters of prompt, text and tool-argument content."""
+    size = 0
+    for message in messages:
+        for part in message.parts:
+            if isinstance(part, UserPromptPart | TextPart):
+                size += len(str(part.content))
+            elif isinstance(part, ToolCallPart):
+                size += len(part.args_as_json_str())
+    return size
+
+
+def _rounds(messages: list[ModelMessage]) -> list[list[ModelMessage]]:
+    """Split a history at every new user prompt."""
+    rounds: list[list[ModelMessage]] = []
+    for message in messages:
+        starts_round = isinstance(message, ModelRequest) and any(
+            isinstance(part, UserPromptPart) for part in message.parts
+        )
+        if starts_round or not rounds:
+            rounds.append([])
+        rounds[-1].append(message)
+    return rounds
+
+
+def _transcript(round_: list[ModelMessage]) -> list[str]:
+    lines = []
+    for message in round_:
+        for part in message.parts:
+            if isinstance(part, UserPromptPart):
+                lines.append(f"User: {part.content}")
+            elif isinstance(part, ToolCallPart):
+                questions = part.args_as_dict().get("clarification_questions")
+                lines.extend(f"Expert asked: {q}" for q in questions or [])
+            elif isinstance(part, TextPart):
+                lines.append(f"Expert: {part.content}")
+    return lines
+
+
+def compact_history(
+    messages: list[ModelMessage], max_chars: int = 12_000
+) -> list[ModelMessage]:
+    """Return ``messages``, or a compacted copy if above ``max_chars``.
+
+    The first round (the original problem) and the rounds before the
+    last one become a single user prompt; the last round is kept so that
+    its tool call and return stay paired.
+    """
+    rounds = _rounds(messages)
+    if history_size(messages) <= max_chars or len(rounds) <= 2:
+        return messages
+    first, *middle, last = rounds
+    lines = _transcript(first)
+    for round_ in middle:
+        lines.extend(_transcript(round_))
+    summary = ModelRequest(
+        parts=[
+            UserPromptPart(
+                "Conversation so far (earlier rounds condensed):\n"
+                + "\n".join(lines)
+            )
+        ]
+    )
+    return [summary, *last]
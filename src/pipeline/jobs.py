@@ -0,0 +1,225 @@
+"""Bounded in-process job queue in front of :class:`Pipeline`.
+
+Jobs wait in a fixed-size queue and a fixed number of worker tasks run
+them. When the queue is full, :meth:`JobQueue.submit` raises
+:class:`QueueFull` with a retry estimate instead of accepting unbounded
+work. Every job records its events as they arrive so that clients can
+poll its status.
+"""
+
+import asyncio
+import math
+import time
+import uuid
+from collections import OrderedDict, deque
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from pydantic_ai.messages import ModelMessage
+
+from .cancel import CancelToken, RunCancelled
+from .events import ClarificationNeeded, PipelineEvent, Validated
+
+RunJob = Callable[["Job"], AsyncIterator[PipelineEvent]]
+
+NO_RESULT = "Pipeline ended without a validation result."
+
+
+def outcome(last: PipelineEvent | None) -> tuple[str, dict[str, Any]]:
+    """Status and JSON-ready details of a run whose last event is ``last``.
+
+    The status is ``succeeded``, ``failed``, ``needs_clarification`` or,
+    when the run ended without a result, ``error``.
+    """
+    if isinstance(last, Validated):
+        status = "succeeded" if last.output.success else "failed"
+        return status, {
+            "result": {
+                "run_id": last.run_id,
+                "summary": last.message,
+                "notes": last.notes,
+                "output": last.output.model_dump(mode="json"),
+            }
+        }
+    if isinstance(last, ClarificationNeeded):
+        return "needs_clarification", {
+            "clarification": {
+                "explanation": last.explanation,
+                "questions": last.questions,
+            }
+        }
+    return "error", {}
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; retry after ``retry_after`` s."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Job queue is full; retry in {retry_after:.0f} s.")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Job:
+    """One pipeline run and its progress."""
+
+    prompt: str
+    data_files: list[str] = field(default_factory=list)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    # queued | running | succeeded | failed | needs_clarification | error
+    # | cancelled
+    status: str = "queued"
+    events: list[PipelineEvent] = field(default_factory=list)
+    error: str | None = None
+    created_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    # Expert history this job continues, see ``Pipeline.run``.
+    history: list[ModelMessage] = field(default_factory=list, repr=False)
+    # Passed to ``Pipeline.run``; see :meth:`JobQueue.cancel`.
+    cancel_token: CancelToken = field(
+        default_factory=CancelToken, repr=False, compare=False
+    )
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ("queued", "running")
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-ready status, events and, when finished, the result."""
+        data: dict[str, Any] = {
+            "id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": [
+                {"kind": e.kind, "message": e.message} for e in self.events
+            ],
+            "error": self.error,
+        }
+        data.update(outcome(self.events[-1] if self.events else None)[1])
+        return data
+
+
+class JobQueue:
+    """Run jobs on ``workers`` tasks with at most ``max_queued`` waiting.
+
+    ``run`` turns a job into its event stream, normally
+    ``Pipeline(...).run(job.prompt, job.data_files)``. Finished jobs are
+    kept for polling, up to ``keep_finished`` of them.
+    """
+
+    def __init__(
+        self,
+        run: RunJob,
+        workers: int = 4,
+        max_queued: int = 32,
+        keep_finished: int = 1000,
+    ):
+        self.run = run
+        self.workers = workers
+        self.keep_finished = keep_finished
+        self.jobs: OrderedDict[str, Job] = OrderedDict()
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(max_queued)
+        self._tasks: list[asyncio.Task] = []
+        self._durations: deque[float] = deque(maxlen=50)
+
+    async def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._work()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        prompt: str,
+        data_files: list[str] | None = None,
+        history: list[ModelMessage] | None = None,
+    ) -> Job:
+        """Queue a job, or raise :class:`QueueFull`."""
+        job = Job(prompt, list(data_files or []), history=list(history or []))
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFull(self.retry_after()) from None
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    def get(self, job_id: str) -> Job | None:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str, reason: str = "cancelled by client") -> bool:
+        """Cancel a queued or running job; False if it already finished.
+
+        A queued job is skipped when its turn comes; a running job stops
+        its pending model request or sandbox execution.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_token.cancel(reason)
+        if job.status == "queued":
+            job.status, job.error = "cancelled", reason
+            job.finished_at = time.time()
+        return True
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    @property
+    def running(self) -> int:
+        return sum(job.status == "running" for job in self.jobs.values())
+
+    def retry_after(self) -> float:
+        """Expected wait for a free queue slot, from recent run times."""
+        mean = (
+            sum(self._durations) / len(self._durations)
+            if self._durations
+            else 30.0
+        )
+        return max(1.0, math.ceil(mean / self.workers))
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.done:  # cancelled while queued
+                self._queue.task_done()
+                continue
+            try:
+                await self._execute(job)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job: Job) -> None:
+        job.status, job.started_at = "running", time.time()
+        try:
+            async for event in self.run(job):
+                job.events.append(event)
+        except asyncio.CancelledError:
+            job.status, job.error = "error", "Cancelled."
+            raise
+        except RunCancelled as e:
+            job.status, job.error = "cancelled", e.reason
+        except Exception as e:
+            job.status, job.error = "error", str(e)
+        else:
+            job.status, _ = outcome(job.events[-1] if job.events else None)
+            if job.status == "error":
+                job.error = NO_RESULT
+        finally:
+            job.finished_at = time.time()
+            self._durations.append(job.finished_at - job.started_at)
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, j in self.jobs.items() if j.done]
+        for job_id in finished[: max(0, len(finished) - self.keep_finished)]:
+            del self.jobs[job_id]
@@ -0,0 +1,302 @@
+"""SQLite-backed job queue with per-stage checkpoints.
+
+Jobs and the output of every finished pipeline stage are persisted, so a
+job whose process died or whose later stage failed is picked up again
+and resumes after its last checkpoint instead of repeating the Expert
+and Integrator calls. Workers in any number of processes claim jobs
+with a lease; a job whose lease expires without a heartbeat is claimed
+again.
+"""
+
+import json
+import os
+import sqlite3
+import time
+import uuid
+from collections.abc import Iterator, MutableMapping
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    prompt TEXT NOT NULL,
+    data_files TEXT NOT NULL DEFAULT '[]',
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id TEXT NOT NULL REFERENCES jobs(id),
+    stage TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+_FIELDS = (
+    "id, prompt, data_files, status, attempts, worker, lease_until, "
+    "created_at, updated_at, result, error"
+)
+
+
+@dataclass(frozen=True)
+class StoredJob:
+    """A row of the ``jobs`` table."""
+
+    id: str
+    prompt: str
+    data_files: list[str]
+    # queued | running | succeeded | failed | needs_clarification | error
+    # | cancelled
+    status: str
+    attempts: int
+    worker: str | None
+    lease_until: float | None
+    created_at: float
+    updated_at: float
+    result: dict[str, Any] | None
+    error: str | None
+
+
+class JobCheckpoints(MutableMapping[str, Any]):
+    """Checkpoints of one job, written through to the store."""
+
+    def __init__(self, store: "JobStore", job_id: str):
+        self.store = store
+        self.job_id = job_id
+        self._cache = store.load_checkpoints(job_id)
+
+    def __getitem__(self, stage: str) -> Any:
+        return self._cache[stage]
+
+    def __setitem__(self, stage: str, payload: Any) -> None:
+        self.store.save_checkpoint(self.job_id, stage, payload)
+        self._cache[stage] = payload
+
+    def __delitem__(self, stage: str) -> None:
+        self.store.delete_checkpoint(self.job_id, stage)
+        del self._cache[stage]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._cache)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+
+class JobStore:
+    """Persistent jobs with leases, attempts and stage checkpoints."""
+
+    def __init__(
+        self,
+        path: str | os.PathLike[str] = ".artifacts/jobs.sqlite",
+        max_attempts: int = 3,
+    ):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30.0)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    # --- Jobs ---
+    def submit(self, prompt: str, data_files: list[str] | None = None) -> str:
+        """Queue a job and return its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs(id, prompt, data_files, status, "
+                "created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, prompt, json.dumps(data_files or []), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> StoredJob | None:
+        with self._connect() as conn:
+            row = conn.execute(
+                f"SELECT {_FIELDS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._row_to_job(row) if row else None
+
+    def claim(self, worker: str, lease: float = 900.0) -> StoredJob | None:
+        """Take the oldest queued job, or one whose lease expired.
+
+        Jobs that already used ``max_attempts`` are marked as errors.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE jobs SET status = 'error', updated_at = ?, "
+                "error = 'Gave up after ' || attempts || ' attempts.' "
+                "WHERE status = 'running' AND lease_until < ? "
+                "AND attempts >= ?",
+                (now, now, self.max_attempts),
+            )
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'queued' "
+                "OR (status = 'running' AND lease_until < ?) "
+                "ORDER BY created_at LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, "
+                "lease_until = ?, attempts = attempts + 1, updated_at = ? "
+                "WHERE id = ?",
+                (worker, now + lease, now, row[0]),
+            )
+            claimed = conn.execute(
+                f"SELECT {_FIELDS} FROM jobs WHERE id = ?", (row[0],)
+            ).fetchone()
+        return self._row_to_job(claimed)
+
+    def heartbeat(
+        self, job_id: str, worker: str, lease: float = 900.0
+    ) -> bool:
+        """Extend the lease of a job this worker holds.
+
+        Returns False if the worker no longer holds it: the job was
+        cancelled, or its lease expired and another worker claimed it.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_until = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + lease, job_id, worker),
+            )
+        return cursor.rowcount == 1
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Record the outcome of a job.
+
+        A job that ended with ``status="error"`` and still has attempts
+        left goes back to the queue and later resumes from its
+        checkpoints. A cancelled job stays cancelled.
+        """
+        with self._connect() as conn:
+            (attempts,) = conn.execute(
+                "SELECT attempts FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if status == "error" and attempts < self.max_attempts:
+                status = "queued"
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, "
+                "lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status != 'cancelled'",
+                (
+                    status,
+                    json.dumps(result, default=str) if result else None,
+                    error,
+                    time.time(),
+                    job_id,
+                ),
+            )
+
+    def cancel(self, job_id: str, reason: str = "cancelled") -> bool:
+        """Cancel a queued or running job; False if it already finished.
+
+        The worker running the job notices on its next heartbeat.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = 'cancelled', error = ?, "
+                "lease_until = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN ('queued', 'running')",
+                (reason, time.time(), job_id),
+            )
+        return cursor.rowcount == 1
+
+    def retry(self, job_id: str) -> None:
+        """Queue a finished job again; it resumes from its checkpoints."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = 0, "
+                "error = NULL, updated_at = ? WHERE id = ?",
+                (time.time(), job_id),
+            )
+
+    # --- Checkpoints ---
+    def checkpoints(self, job_id: str) -> JobCheckpoints:
+        return JobCheckpoints(self, job_id)
+
+    def load_checkpoints(self, job_id: str) -> dict[str, Any]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT stage, payload FROM checkpoints WHERE job_id = ?",
+                (job_id,),
+            ).fetchall()
+        return {stage: json.loads(payload) for stage, payload in rows}
+
+    def save_checkpoint(self, job_id: str, stage: str, payload: Any) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO checkpoints(job_id, stage, payload, created_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(job_id, stage) DO UPDATE "
+                "SET payload = excluded.payload, "
+                "created_at = excluded.created_at",
+                (job_id, stage, json.dumps(payload, default=str), time.time()),
+            )
+
+    def delete_checkpoint(self, job_id: str, stage: str) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM checkpoints WHERE job_id = ? AND stage = ?",
+                (job_id, stage),
+            )
+
+    @staticmethod
+    def _row_to_job(row: tuple) -> StoredJob:
+        (
+            job_id,
+            prompt,
+            data_files,
+            status,
+            attempts,
+            worker,
+            lease_until,
+            created_at,
+            updated_at,
+            result,
+            error,
+        ) = row
+        return StoredJob(
+            job_id,
+            prompt,
+            json.loads(data_files),
+            status,
+            attempts,
+            worker,
+            lease_until,
+            created_at,
+            updated_at,
+            json.loads(result) if result else None,
+            error,
+        )
@@ -0,0 +1,53 @@
+"""Per-stage concurrency caps shared by all pipelines of a process.
+
+LLM requests are cheap to wait on but limited by quota; sandbox
+executions are CPU bound. :class:`StageLimits` caps them separately: the
+agents' models are wrapped so that every model request takes an LLM slot,
+and every sandbox process runs while holding a sandbox slot.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+from pydantic_ai.models import Model
+from pydantic_ai.models.wrapper import WrapperModel
+
+from config import Settings
+
+
+class _LimitedModel(WrapperModel):
+    """Model whose requests wait for a free LLM slot."""
+
+    def __init__(self, wrapped: Model, slots: asyncio.Semaphore):
+        super().__init__(wrapped)
+        self.slots = slots
+
+    async def request(self, *args: Any, **kwargs: Any) -> Any:
+        async with self.slots:
+            return await super().request(*args, **kwargs)
+
+    @asynccontextmanager
+    async def request_stream(
+        self, *args: Any, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        async with self.slots:
+            async with super().request_stream(*args, **kwargs) as stream:
+                yield stream
+
+
+class StageLimits:
+    """At most ``llm`` model requests and ``sandbox`` executions at once."""
+
+    def __init__(self, llm: int = 8, sandbox: int = 2):
+        self.llm = asyncio.Semaphore(llm)
+        self.sandbox = asyncio.Semaphore(sandbox)
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "StageLimits":
+        return cls(settings.llm_concurrency, settings.sandbox_concurrency)
+
+    def limit_model(self, model: Model) -> Model:
+        """Wrap ``model`` so that its requests take an LLM slot."""
+        return _LimitedModel(model, self.llm)
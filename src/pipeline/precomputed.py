@@ -0,0 +1,176 @@
+"""Precomputed results for the bundled example prompts.
+
+The welcome flow steers users to the problems in ``examples/``. A build
+step (``python precompute.py``) runs each of them once and stores the
+Expert output, the code, the execution results and the validation as a
+``precomputed`` artifact; every build adds a new version.
+:meth:`Pipeline.run` answers a matching prompt from the newest version
+built with the current agent instructions, without calling a model. Once
+an instruction file changes, the stored results are stale and the prompt
+runs live again until the next build. The instructions and examples are
+read from the repository, whatever the working directory.
+"""
+
+import hashlib
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from src.agents import ExpertOutput, ValidatorOutput
+from src.artifacts import ArtifactStore, new_run_id, problem_key
+
+from .events import (
+    ClarificationNeeded,
+    CodeGenerated,
+    ExecutionProgress,
+    ExpertCompleted,
+    PipelineEvent,
+    Validated,
+)
+
+if TYPE_CHECKING:
+    from .engine import Pipeline
+
+KIND = "precomputed"
+
+_ROOT = Path(__file__).resolve().parents[2]
+INSTRUCTIONS = _ROOT / "src" / "instructions"
+EXAMPLES = _ROOT / "examples"
+
+
+def instruction_hashes(
+    directory: str | Path = INSTRUCTIONS,
+) -> dict[str, str]:
+    """SHA-256 of every agent instruction file, by file name."""
+    return {
+        path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+        for path in sorted(Path(directory).glob("*.md"))
+    }
+
+
+def example_prompts(directory: str | Path = EXAMPLES) -> dict[str, str]:
+    """Prompts of the bundled examples, by file name."""
+    return {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(Path(directory).glob("*.txt"))
+    }
+
+
+def example_keys(directory: str | Path = EXAMPLES) -> set[str]:
+    """:func:`~src.artifacts.problem_key` of every bundled example."""
+    return {problem_key(p) for p in example_prompts(directory).values()}
+
+
+@dataclass(frozen=True)
+class Precomputed:
+    """The stored outcome of one example run."""
+
+    run_id: str
+    build: str
+    expert: ExpertOutput
+    code: str
+    results: dict[str, Any] | None
+    validation: ValidatorOutput
+
+    def events(self) -> list[PipelineEvent]:
+        """The events that answer the prompt from this result."""
+        note = (
+            f"Served the precomputed result of run {self.run_id} "
+            f"(build {self.build})"
+        )
+        return [
+            ExpertCompleted(self.expert),
+            CodeGenerated(self.code, reused_from=self.run_id),
+            ExecutionProgress(
+                "executed",
+                (self.results or {}).get("status", ""),
+                self.results,
+            ),
+            Validated(self.validation, self.results, self.run_id, [note]),
+        ]
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "build": self.build,
+            "expert": self.expert.model_dump(mode="json"),
+            "code": self.code,
+            "results": self.results,
+            "validation": self.validation.model_dump(mode="json"),
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "Precomputed":
+        return cls(
+            run_id=data["run_id"],
+            build=data["build"],
+            expert=ExpertOutput.model_validate(data["expert"]),
+            code=data["code"],
+            results=data["results"],
+            validation=ValidatorOutput.model_validate(data["validation"]),
+        )
+
+
+def lookup(
+    store: ArtifactStore,
+    prompt: str,
+    instructions: dict[str, str] | None = None,
+) -> Precomputed | None:
+    """Newest result for ``prompt`` built with ``instructions``.
+
+    ``instructions`` defaults to the current :func:`instruction_hashes`.
+    Returns None when there is none or its blob was evicted.
+    """
+    if instructions is None:
+        instructions = instruction_hashes()
+    artifact = store.find(prompt, KIND, instructions=instructions)
+    if artifact is None:
+        return None
+    data = store.get_json(artifact.digest)
+    return Precomputed.from_json(data) if data is not None else None
+
+
+async def build(
+    pipeline: "Pipeline",
+    prompts: dict[str, str],
+    force: bool = False,
+) -> dict[str, str]:
+    """Run every prompt and store its result; returns a status by name.
+
+    Prompts with a result for the current instructions are skipped
+    unless ``force``. Only validated results are stored. ``pipeline``
+    must not serve precomputed results itself, so it is built with
+    ``serve_precomputed=False``.
+    """
+    store, instructions = pipeline.store, pipeline.instructions
+    build_id = time.strftime("%Y%m%d-%H%M%S-") + new_run_id()[:6]
+    statuses = {}
+    for name, prompt in prompts.items():
+        if not force and lookup(store, prompt, instructions) is not None:
+            statuses[name] = "fresh"
+            continue
+        expert, code, last = None, None, None
+        async for last in pipeline.run(prompt):
+            if isinstance(last, ExpertCompleted):
+                expert = last.output
+            elif isinstance(last, CodeGenerated):
+                code = last.code
+        if isinstance(last, ClarificationNeeded):
+            statuses[name] = "needs clarification"
+            continue
+        if not isinstance(last, Validated) or not last.output.success:
+            statuses[name] = "failed"
+            continue
+        result = Precomputed(
+            last.run_id, build_id, expert, code, last.results, last.output
+        )
+        store.put(
+            KIND,
+            result.to_json(),
+            run_id=last.run_id,
+            problem=prompt,
+            metadata={"instructions": instructions, "build": build_id},
+        )
+        statuses[name] = f"built {build_id}"
+    return statuses
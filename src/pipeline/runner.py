@@ -0,0 +1,157 @@
+"""One background event loop shared by all synchronous callers.
+
+Streamlit runs every session in its own script thread without a usable
+event loop. :class:`LoopRunner` owns a single loop on a daemon thread;
+script threads submit coroutines or async generators to it and block on
+the result. Runs from all sessions then proceed concurrently on one loop,
+reuse the same HTTP clients, and are bounded by a semaphore and a
+per-run timeout.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterator
+from typing import Any, TypeVar
+
+from .cancel import CancelToken
+
+T = TypeVar("T")
+
+_DONE = object()
+
+
+class LoopRunner:
+    """Run coroutines on a background event loop from any thread.
+
+    At most ``max_concurrent`` submissions run at once; the others wait
+    for a slot. ``timeout`` counts from the moment a run gets its slot.
+    """
+
+    def __init__(self, max_concurrent: int = 4, name: str = "pipeline-loop"):
+        self.max_concurrent = max_concurrent
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._serve, name=name, daemon=True
+        )
+        self._thread.start()
+        self._ready.wait()
+
+    def _serve(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._slots = asyncio.Semaphore(self.max_concurrent)
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _limited(
+        self, coro: Coroutine[Any, Any, T], timeout: float | None
+    ) -> T:
+        async with self._slots:
+            async with asyncio.timeout(timeout):
+                return await coro
+
+    def submit(
+        self, coro: Coroutine[Any, Any, T], timeout: float | None = None
+    ) -> concurrent.futures.Future[T]:
+        """Schedule ``coro`` and return a thread-safe future."""
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "LoopRunner cannot wait on its own loop; await the "
+                "coroutine directly instead."
+            )
+        if self._loop.is_closed():
+            coro.close()
+            raise RuntimeError("LoopRunner is closed.")
+        return asyncio.run_coroutine_threadsafe(
+            self._limited(coro, timeout), self._loop
+        )
+
+    def run(
+        self, coro: Coroutine[Any, Any, T], timeout: float | None = None
+    ) -> T:
+        """Run ``coro`` and block until it returns.
+
+        Raises ``TimeoutError`` when ``timeout`` expires.
+        """
+        return self.submit(coro, timeout).result()
+
+    def stream(
+        self,
+        items: AsyncIterator[T],
+        timeout: float | None = None,
+        cancel: CancelToken | None = None,
+        idle: Callable[[], None] | None = None,
+        poll: float = 1.0,
+    ) -> Iterator[T]:
+        """Iterate an async generator from a synchronous caller.
+
+        Items are handed over as soon as they are produced. Closing the
+        iterator early cancels the generator on the loop, through
+        ``cancel`` if the generator observes that token. While waiting,
+        ``idle`` is called every ``poll`` seconds; an exception it raises
+        (such as Streamlit stopping the script) closes the iterator.
+        """
+        handoff: queue.Queue = queue.Queue()
+
+        async def pump() -> None:
+            try:
+                async for item in items:
+                    handoff.put(item)
+            finally:
+                handoff.put(_DONE)
+
+        future = self.submit(pump(), timeout)
+        finished = False
+        try:
+            while True:
+                try:
+                    item = handoff.get(timeout=poll if idle else None)
+                except queue.Empty:
+                    idle()
+                    continue
+                if item is _DONE:
+                    break
+                yield item
+            finished = True
+        finally:
+            if not finished and cancel is not None:
+                cancel.cancel("client disconnected")
+            elif not finished:
+                future.cancel()
+        future.result()  # re-raise errors and timeouts from the loop
+
+    def close(self) -> None:
+        """Stop the loop thread; pending runs are cancelled."""
+        if self._loop.is_closed():
+            return
+
+        async def shutdown() -> None:
+            tasks = [
+                t
+                for t in asyncio.all_tasks()
+                if t is not asyncio.current_task()
+            ]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop)
+        self._thread.join()
+        self._loop.close()
+
+
+_runner: LoopRunner | None = None
+_runner_lock = threading.Lock()
+
+
+def get_runner(max_concurrent: int = 4) -> LoopRunner:
+    """The process-wide runner, created on first use."""
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = LoopRunner(max_concurrent)
+        return _runner
@@ -0,0 +1,51 @@
+"""Speculative sandbox execution overlapped with linting.
+
+The Integrator's ``ruff_check`` output function hands over the code as
+soon as it parses. :class:`Speculation` starts executing it right away,
+while Ruff is still running. Once the Integrator run ends, the execution
+of the code that came out of linting is kept. Executions of code that
+Ruff rejected or changed are cancelled, which kills their sandbox.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+Execute = Callable[[str], Awaitable[dict[str, Any]]]
+
+
+class Speculation:
+    """Executions started from the Integrator's output function.
+
+    Create it on the event loop; :meth:`start` may be called from the
+    worker thread that runs the output function.
+    """
+
+    def __init__(self, execute: Execute):
+        self.execute = execute
+        self._loop = asyncio.get_running_loop()
+        self._tasks: dict[str, asyncio.Future[dict[str, Any]]] = {}
+
+    def start(self, code: str) -> None:
+        """Start executing ``code`` unless it already runs."""
+        self._loop.call_soon_threadsafe(self._start, code.strip())
+
+    def _start(self, code: str) -> None:
+        if code not in self._tasks:
+            self._tasks[code] = asyncio.ensure_future(self.execute(code))
+
+    async def result(self, code: str) -> dict[str, Any] | None:
+        """Result for the final ``code``, or None if it was not started.
+
+        Every other execution is cancelled.
+        """
+        task = self._tasks.pop(code.strip(), None)
+        await self.cancel()
+        return await task if task is not None else None
+
+    async def cancel(self) -> None:
+        """Cancel the executions that have not been kept."""
+        tasks, self._tasks = list(self._tasks.values()), {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
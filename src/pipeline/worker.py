@@ -0,0 +1,155 @@
+"""Worker loops and processes that run jobs from a :class:`JobStore`.
+
+Each worker claims a job, runs the pipeline with the job's checkpoints
+so that a retried job resumes after its last finished stage, renews its
+lease while it runs, and records the outcome. A job cancelled in the
+store stops at its worker's next heartbeat.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import socket
+
+import anyio
+from anyio import to_thread
+
+from config import Settings
+
+from .cancel import CancelToken, RunCancelled
+from .engine import Pipeline
+from .jobs import NO_RESULT, outcome
+from .jobstore import JobStore, StoredJob
+from .limits import StageLimits
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def run_job(
+    store: JobStore,
+    pipeline: Pipeline,
+    job: StoredJob,
+    worker: str,
+    lease: float = 900.0,
+    heartbeat: float = 5.0,
+) -> str:
+    """Run one claimed job to completion and return its status.
+
+    The lease is renewed on every event and every ``heartbeat`` seconds.
+    Once the worker no longer holds the job, because it was cancelled or
+    claimed by another worker, the run is cancelled. Store calls run in
+    worker threads so that a busy database cannot stall the event loop;
+    new checkpoints are written after the event that follows them.
+    """
+    cancel = CancelToken()
+    checkpoints = await to_thread.run_sync(store.load_checkpoints, job.id)
+    saved = dict(checkpoints)
+
+    async def renew() -> None:
+        held = await to_thread.run_sync(store.heartbeat, job.id, worker, lease)
+        if not held:
+            cancel.cancel("job cancelled or claimed by another worker")
+
+    async def save_checkpoints() -> None:
+        for stage, payload in list(checkpoints.items()):
+            if saved.get(stage) != payload:
+                await to_thread.run_sync(
+                    store.save_checkpoint, job.id, stage, payload
+                )
+                saved[stage] = payload
+
+    async def keep_lease() -> None:
+        while True:
+            await asyncio.sleep(heartbeat)
+            await renew()
+
+    async def finish(*args) -> None:
+        await to_thread.run_sync(store.finish, job.id, *args)
+
+    renewer = asyncio.create_task(keep_lease())
+    last = None
+    try:
+        with anyio.fail_after(pipeline.settings.pipeline_timeout):
+            async for last in pipeline.run(
+                job.prompt,
+                job.data_files,
+                checkpoints=checkpoints,
+                cancel=cancel,
+            ):
+                await save_checkpoints()
+                await renew()
+    except RunCancelled:
+        return "cancelled"
+    except Exception as e:
+        await save_checkpoints()
+        await finish("error", None, str(e) or type(e).__name__)
+        return "error"
+    finally:
+        renewer.cancel()
+    status, result = outcome(last)
+    await finish(status, result, NO_RESULT if status == "error" else None)
+    return status
+
+
+async def work(
+    store: JobStore,
+    pipeline: Pipeline,
+    worker: str | None = None,
+    poll: float = 1.0,
+    lease: float = 900.0,
+    drain: bool = False,
+) -> int:
+    """Claim and run jobs until cancelled, or until none is left with
+    ``drain``. Returns the number of jobs run."""
+    worker = worker or worker_name()
+    n_jobs = 0
+    while True:
+        job = await to_thread.run_sync(store.claim, worker, lease)
+        if job is None:
+            if drain:
+                return n_jobs
+            await anyio.sleep(poll)
+            continue
+        await run_job(store, pipeline, job, worker, lease)
+        n_jobs += 1
+
+
+async def _serve(settings: Settings, tasks: int) -> None:
+    store = JobStore(settings.job_db, settings.job_max_attempts)
+    pipeline = Pipeline(settings, limits=StageLimits.from_settings(settings))
+    async with anyio.create_task_group() as tg:
+        for i in range(tasks):
+            tg.start_soon(
+                work,
+                store,
+                pipeline,
+                f"{worker_name()}:{i}",
+                1.0,
+                settings.job_lease_seconds,
+            )
+
+
+def _process_main(settings: Settings, tasks: int) -> None:
+    anyio.run(_serve, settings, tasks)
+
+
+def serve(settings: Settings, processes: int = 1, tasks: int = 1) -> None:
+    """Run ``processes`` worker processes with ``tasks`` jobs each."""
+    if processes == 1:
+        _process_main(settings, tasks)
+        return
+    context = multiprocessing.get_context("spawn")
+    children = [
+        context.Process(target=_process_main, args=(settings, tasks))
+        for _ in range(processes)
+    ]
+    for child in children:
+        child.start()
+    try:
+        for child in children:
+            child.join()
+    finally:
+        for child in children:
+            child.terminate()
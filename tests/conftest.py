@@ -0,0 +1,7 @@
+import os
+from pathlib import Path
+
+# ``src.agents`` builds a Gemini provider at import time and loads its
+# instruction files relative to the repository root.
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.chdir(Path(__file__).resolve().parents[1])
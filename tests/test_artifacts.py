@@ -0,0 +1,46 @@
+from src.artifacts import ArtifactStore, content_digest, problem_key
+
+
+def test_put_is_content_addressed(tmp_path) -> None:
+    store = ArtifactStore(tmp_path)
+    first = store.put("code", "print(1)\n", run_id="a", problem="min x")
+    second = store.put("code", "print(1)\n", run_id="b", problem="min x")
+
+    assert first.digest == second.digest == content_digest(b"print(1)\n")
+    assert store.get_text(first.digest) == "print(1)\n"
+    assert [a.run_id for a in store.history("min x", "code")] == ["b", "a"]
+
+
+def test_find_matches_metadata_and_normalized_problem(tmp_path) -> None:
+    store = ArtifactStore(tmp_path)
+    store.put(
+        "validation",
+        {"success": True},
+        run_id="ok",
+        problem="min  x\n s.t. x >= 1",
+        metadata={"success": True},
+    )
+    store.put(
+        "validation",
+        {"success": False},
+        run_id="bad",
+        problem="min x s.t. x >= 1",
+        metadata={"success": False},
+    )
+
+    found = store.find("min x s.t. x >= 1", "validation", success=True)
+    assert found is not None and found.run_id == "ok"
+    assert found.problem_key == problem_key("min x s.t.   x >= 1")
+    assert store.find("other problem", "validation") is None
+
+
+def test_evicts_least_recently_used(tmp_path) -> None:
+    store = ArtifactStore(tmp_path, max_bytes=25)
+    old = store.put("code", "a" * 10, run_id="1")
+    kept = store.put("code", "b" * 10, run_id="2")
+    store.get(old.digest)
+    store.put("code", "c" * 10, run_id="3")
+
+    assert store.get(kept.digest) is None
+    assert store.get(old.digest) is not None
+    assert store.total_bytes() <= 25
@@ -0,0 +1,203 @@
+import control
+import numpy as np
+import pytest
+from scipy.optimize import lsq_linear
+
+from src.controls import (
+    LinearMPC,
+    PIDObjective,
+    WarmStartStore,
+    clear_plant_cache,
+    pid_characteristic_polynomials,
+    plant,
+    plant_cache_info,
+    roots_stable,
+    routh_hurwitz_stable,
+    screen_pid_candidates,
+    simulate_pid_batch,
+    step_metrics,
+    tune_pid_multistart,
+)
+
+HEATING_PLANT = control.tf([1], [1, 3, 2])
+
+
+def test_batch_simulation_matches_control_library() -> None:
+    gains = np.array([[2.0, 1.0, 0.5], [5.0, 3.0, 0.1]])
+    res = simulate_pid_batch(HEATING_PLANT, gains, t_final=5.0, dt=0.01)
+
+    s = control.tf([1, 0], [1])
+    for row, (kp, ki, kd) in enumerate(gains):
+        pid = kp + ki / s + kd * 100 * s / (s + 100)
+        loop = control.feedback(pid * HEATING_PLANT, 1)
+        _, y = control.forced_response(loop, res.t, np.ones_like(res.t))
+        np.testing.assert_allclose(res.y[row], y, atol=1e-9)
+
+    assert res.iae.shape == res.effort.shape == (2,)
+    np.testing.assert_allclose(
+        res.iae, np.trapezoid(np.abs(res.e), res.t, axis=1)
+    )
+
+
+def test_step_metrics_match_step_info() -> None:
+    res = simulate_pid_batch(
+        HEATING_PLANT, [[2.0, 1.0, 0.5], [8.0, 6.0, 0.2]], t_final=15.0
+    )
+    metrics = res.step_metrics()
+
+    for row, y in enumerate(res.y):
+        info = control.step_info(y, T=res.t)
+        assert metrics.overshoot[row] == pytest.approx(info["Overshoot"])
+        assert metrics.rise_time[row] == pytest.approx(info["RiseTime"])
+        assert metrics.settling_time[row] == pytest.approx(
+            info["SettlingTime"]
+        )
+    np.testing.assert_allclose(metrics.steady_state_error, 1 - res.y[:, -1])
+    np.testing.assert_allclose(metrics.peak_control, res.peak_control)
+
+
+def test_step_metrics_flag_invalid_responses() -> None:
+    t = np.linspace(0, 1, 5)
+    metrics = step_metrics(t, [[0, 0, 0, 0, 0], [0, 1, np.inf, 1, np.nan]])
+
+    assert np.all(np.isinf(metrics.settling_time))
+    assert np.all(np.isinf(metrics.overshoot))
+
+
+def test_stability_screen_matches_closed_loop_poles() -> None:
+    rng = np.random.default_rng(0)
+    gains = rng.uniform([-5, -5, -1], [50, 50, 10], size=(200, 3))
+    plant = control.tf([1], [1, 1, 0])
+
+    mask = screen_pid_candidates(plant, gains)
+    coeffs = pid_characteristic_polynomials(plant, gains)
+    np.testing.assert_array_equal(mask, roots_stable(coeffs))
+
+    s = control.tf([1, 0], [1])
+    for (kp, ki, kd), stable in zip(gains[:20], mask[:20], strict=True):
+        pid = kp + ki / s + kd * 100 * s / (s + 100)
+        poles = control.feedback(pid * plant, 1).poles()
+        assert stable == bool(np.all(poles.real < 0))
+
+
+def test_stability_screen_accepts_pd_loops() -> None:
+    # Ki = 0 removes the integrator, so its s factor must not count as a
+    # closed-loop pole at the origin.
+    plant = control.tf([1], [1, 1, 0])
+    gains = [[2, 0, 0.5], [2, 0, 0], [-2, 0, 0.5], [2, 1, 0.5]]
+
+    for method in ("routh", "roots"):
+        mask = screen_pid_candidates(plant, gains, method=method)
+        assert mask.tolist() == [True, True, False, True]
+    res = simulate_pid_batch(plant, gains[:1], t_final=20.0)
+    assert np.isfinite(res.iae[0])
+
+
+def test_routh_hurwitz_rejects_marginal_polynomials() -> None:
+    # s^2 + 1 (marginal), s^3 + s^2 + s + 1 (zero pivot), (s + 1)^3
+    coeffs = [[0, 1, 0, 1], [1, 1, 1, 1], [1, 3, 3, 1]]
+    assert routh_hurwitz_stable(coeffs).tolist() == [False, False, True]
+
+
+def test_unstable_candidates_are_not_simulated() -> None:
+    res = simulate_pid_batch(HEATING_PLANT, [[2, 1, 0.5], [-10, 0, 0]])
+
+    assert res.stable.tolist() == [True, False]
+    assert np.isnan(res.y[1]).all()
+    assert np.isinf(res.iae[1]) and np.isfinite(res.iae[0])
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_multistart_tuner_shares_incumbent(workers: int) -> None:
+    objective = PIDObjective.from_plant(
+        HEATING_PLANT, t_final=5.0, dt=0.02, max_overshoot=10.0
+    )
+    result = tune_pid_multistart(
+        objective, n_starts=4, workers=workers, maxiter=40, patience=5
+    )
+
+    assert len(result.starts) == 4
+    assert result.cost == min(s.cost for s in result.starts)
+    assert result.cost == pytest.approx(objective(result.gains))
+    assert result.n_evaluations == sum(s.nfev for s in result.starts)
+
+
+def test_plants_are_normalized_and_cached() -> None:
+    clear_plant_cache()
+    first = plant([2], [2, 6, 4])
+    second = plant([1.0], [1.0, 3.0, 2.0])
+
+    assert (
+        first == second == plant(*HEATING_PLANT.num[0] + HEATING_PLANT.den[0])
+    )
+    A, _, _, _ = first.state_space()
+    assert A is second.state_space()[0]
+    assert not A.flags.writeable
+
+    Ad, Bd = first.transition(0.1)
+    sysd = first.c2d(0.1)
+    np.testing.assert_allclose(Ad, sysd.A)
+    np.testing.assert_allclose(Bd, np.ravel(sysd.B))
+
+    simulate_pid_batch(first, [[1.0, 1.0, 0.0]])
+    info = plant_cache_info()
+    assert info["realization"].hits >= 2
+    assert info["pid_basis"].misses == 1
+
+
+def test_warm_start_seeds_nearest_plant(tmp_path) -> None:
+    store = WarmStartStore(tmp_path / "warmstart.sqlite")
+    objective = PIDObjective.from_plant(
+        ([1], [1, 3.2, 1.9]), t_final=5.0, dt=0.02
+    )
+    settings = objective.settings
+    store.record(([1], [1, 3, 2]), [5.0, 3.0, 0.5], 1.0, settings)
+    store.record(([1], [1, 30, 20]), [9.0, 9.0, 1.0], 1.0, settings)
+    store.record(([1], [1, 3, 2]), [1.0, 1.0, 1.0], 1.0, {"metric": "ise"})
+
+    nearest = store.nearest(([1], [1, 3.2, 1.9]), settings)
+    assert nearest[0].gains.tolist() == [5.0, 3.0, 0.5]
+    assert store.nearest(([1, 0], [1, 3, 2]), settings) == []
+
+    result = tune_pid_multistart(
+        objective, n_starts=2, workers=1, maxiter=40, warm_start=store
+    )
+    assert result.n_warm_starts == 2
+    np.testing.assert_allclose(result.starts[0].x0, [5.0, 3.0, 0.5])
+    assert len(store) == 4
+
+
+def test_mpc_matches_bounded_least_squares_and_respects_bounds() -> None:
+    mpc = LinearMPC.from_plant(
+        HEATING_PLANT,
+        0.1,
+        horizon=15,
+        u_min=0.0,
+        u_max=3.0,
+        eps_abs=1e-9,
+        eps_rel=1e-9,
+    )
+    x = np.array([0.2, -0.1])
+    step = mpc.solve(x, 1.0)
+    assert step.status == "solved"
+
+    # min 1/2 U'HU + f'U over a box equals min ||L'U + L^-1 f||^2 / 2.
+    f = mpc._f_x @ x + mpc._f_r @ np.ones(15)
+    L = np.linalg.cholesky(mpc.H)
+    ref = lsq_linear(L.T, -np.linalg.solve(L, f), bounds=(0.0, 3.0), tol=1e-12)
+    np.testing.assert_allclose(step.inputs.ravel(), ref.x, atol=1e-6)
+
+    mpc = LinearMPC.from_plant(
+        HEATING_PLANT,
+        0.1,
+        horizon=30,
+        u_min=0.0,
+        u_max=3.0,
+        du_max=0.5,
+        y_max=1.02,
+    )
+    sim = mpc.simulate(1.0, 100)
+    assert "max_iter" not in sim.status
+    assert sim.y.max() <= 1.02 + 1e-4
+    assert np.abs(np.diff(sim.u[:, 0], prepend=0.0)).max() <= 0.5 + 1e-4
+    assert sim.y[-1, 0] == pytest.approx(1.0, abs=1e-3)
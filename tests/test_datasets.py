@@ -0,0 +1,93 @@
+import numpy as np
+
+from app.uploads import clear_uploads, save_uploads
+from src.agents.base import safe_execute_python_code
+from src.datasets import load_tables, prune_dataset_cache, schema_summary
+
+CSV = """warehouse,store,cost,tons
+W1,S1,14,1
+W1,S2,10.5,2
+W2,S1,12,
+"""
+
+
+def test_csv_columns_are_cached_and_memory_mapped(tmp_path) -> None:
+    path = tmp_path / "Transport Costs.csv"
+    path.write_text(CSV)
+    cache = tmp_path / "cache"
+
+    tables = load_tables([path], cache_dir=cache)
+    table = tables["transport_costs"]
+    assert table.n_rows == 3
+    assert table["warehouse"].tolist() == ["W1", "W1", "W2"]
+    np.testing.assert_allclose(table["cost"], [14.0, 10.5, 12.0])
+    assert np.isnan(table["tons"][2])
+    assert isinstance(table["cost"], np.memmap)
+
+    # A second load reads the cached columns, even if the source is gone.
+    path.unlink()
+    path.write_text(CSV)
+    again = load_tables([path], cache_dir=cache)["transport_costs"]
+    assert again.digest == table.digest
+
+    summary = schema_summary(tables)
+    assert "`data['transport_costs']` (3 rows)" in summary
+    assert "2 distinct: W1, W2" in summary
+    assert "`cost` (float64): min 10.5, max 14" in summary
+
+
+def test_executor_exposes_data_to_code(tmp_path) -> None:
+    path = tmp_path / "costs.csv"
+    path.write_text(CSV)
+    tables = load_tables([path], cache_dir=tmp_path / "cache")
+
+    result = safe_execute_python_code(
+        'print(float(data["costs"]["cost"].sum()))', data=dict(tables)
+    )
+
+    assert result["error"] is None
+    assert result["stdout"].strip() == "36.5"
+
+
+def test_dataset_cache_evicts_least_recently_used(tmp_path) -> None:
+    cache = tmp_path / "cache"
+    paths = []
+    for name in ("a", "b"):
+        path = tmp_path / f"{name}.csv"
+        path.write_text(CSV.replace("W1", name.upper()))
+        paths.append(path)
+    old = load_tables([paths[0]], cache_dir=cache)["a"]
+    new = load_tables([paths[1]], cache_dir=cache, max_cache_bytes=0)["b"]
+
+    assert not (cache / old.digest).exists()
+    assert (cache / new.digest).exists()
+
+    prune_dataset_cache(cache, max_bytes=0)
+    assert not any(cache.iterdir())
+
+
+class _Upload:
+    def __init__(self, name: str, payload: bytes, file_id: str):
+        self.name, self.size, self.file_id = name, len(payload), file_id
+        self._payload = payload
+
+    def getbuffer(self) -> bytes:
+        return self._payload
+
+
+def test_uploads_are_saved_once_per_session(tmp_path) -> None:
+    state: dict = {}
+    first = _Upload("costs.csv", CSV.encode(), "1")
+    paths = save_uploads([first], state, root=str(tmp_path))
+    mtime = (tmp_path / paths[0]).stat().st_mtime_ns
+
+    assert save_uploads([first], state, root=str(tmp_path)) == paths
+    assert (tmp_path / paths[0]).stat().st_mtime_ns == mtime
+
+    second = _Upload("tons.csv", b"tons\n1\n", "2")
+    (path,) = save_uploads([second], state, root=str(tmp_path))
+    assert path not in paths
+    assert not (tmp_path / paths[0]).exists()
+
+    clear_uploads(state)
+    assert not any(tmp_path.iterdir())
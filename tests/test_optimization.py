@@ -0,0 +1,224 @@
+import math
+from functools import partial
+
+import numpy as np
+import pyomo.environ as pyo
+import pytest
+
+from src.agents.base import safe_execute_python_code
+from src.optimization import (
+    FirstStage,
+    Scenario,
+    SparseModel,
+    check_solution,
+    diagnose,
+    solve_extensive_form,
+    solve_l_shaped,
+)
+
+# Data of examples/transport_problem.txt.
+COST = np.array([[14.0, 10.0, 18.0], [12.0, 9.0, 11.0]])
+CAPACITY = [800.0, 700.0]
+DEMAND = [400.0, 500.0, 600.0]
+
+
+def test_sparse_transport_lp_and_duals() -> None:
+    m = SparseModel("transport")
+    x = m.add_variables("ship", COST.shape)
+    m.add_constraints("capacity", x.sum(axis=1) <= CAPACITY)
+    m.add_constraints("demand", x.sum(axis=0) >= DEMAND)
+    m.minimize(x.dot(COST), "total_cost")
+    solution = m.solve()
+
+    assert solution.success
+    assert solution.objective_value == pytest.approx(17000.0)
+    np.testing.assert_allclose(x.value.sum(axis=0), DEMAND)
+    assert np.all(x.value.sum(axis=1) <= np.array(CAPACITY) + 1e-9)
+    # Strong duality: b'y equals the optimal cost.
+    dual_bound = solution.duals["capacity"] @ CAPACITY + (
+        solution.duals["demand"] @ DEMAND
+    )
+    assert dual_bound == pytest.approx(17000.0)
+
+
+def test_sparse_milp_and_infeasible_status() -> None:
+    m = SparseModel("knapsack")
+    pick = m.add_variables("pick", 4, ub=1, integer=True)
+    m.add_constraints("weight", pick.dot([3, 4, 5, 6]) <= 10)
+    m.maximize(pick.dot([4, 5, 6, 7]))
+    assert m.solve().objective_value == pytest.approx(12.0)
+    assert set(pick.value) <= {0.0, 1.0}
+
+    m = SparseModel()
+    z = m.add_variables("z", 2)
+    m.add_constraints("low", z.sum() >= 5)
+    m.add_constraints("high", z.sum() <= 3)
+    m.minimize(z.sum())
+    m.solve()
+    assert m.result_dict()["error"] == "Solver status: infeasible"
+
+
+def test_variable_equality_constraints() -> None:
+    m = SparseModel()
+    x = m.add_variables("x", 3)
+    m.add_constraints("fix", np.array([1, 2, 3]) == x)
+    m.add_constraints("pin", x.dot([0, 0, 1]) == 3)
+    m.minimize(x.sum())
+    assert m.solve().objective_value == pytest.approx(6.0)
+    np.testing.assert_allclose(x.value, [1, 2, 3])
+
+
+def test_executor_reports_sparse_model() -> None:
+    code = f"""
+import numpy as np
+from src.optimization import SparseModel
+
+model = SparseModel("transport")
+x = model.add_variables("ship", (2, 3))
+model.add_constraints("capacity", x.sum(axis=1) <= {CAPACITY})
+model.add_constraints("demand", x.sum(axis=0) >= {DEMAND})
+model.minimize(x.dot(np.array({COST.tolist()})), "total_cost")
+"""
+    result = safe_execute_python_code(code)
+
+    assert result["error"] is None
+    assert result["status"] == "optimal"
+    assert result["objective_name"] == "total_cost"
+    assert result["objective_value"] == pytest.approx(17000.0)
+    assert result["feasibility"]["feasible"]
+
+
+def test_executor_skips_checks_for_non_models() -> None:
+    result = safe_execute_python_code('model = {"name": "plant"}')
+
+    assert result["error"] is None
+    assert "feasibility" not in result
+    assert "diagnosis" not in result
+
+
+# Birge & Louveaux farmer problem: wheat, corn and beets on 500 acres.
+FARMER = FirstStage(
+    c=[150.0, 230.0, 260.0], A=[[1.0, 1.0, 1.0]], upper=[500.0]
+)
+
+
+def _farmer_scenario(i: int, buy: float = np.inf) -> Scenario:
+    wheat, corn, beets = np.array([2.5, 3.0, 20.0]) * (1.2, 1.0, 0.8)[i]
+    # y: buy wheat, buy corn, sell wheat, corn, beets (quota), beets (extra)
+    return Scenario(
+        probability=1 / 3,
+        q=[238.0, 210.0, -170.0, -150.0, -36.0, -10.0],
+        T=[[wheat, 0, 0], [0, corn, 0], [0, 0, -beets]],
+        W=[[1, 0, -1, 0, 0, 0], [0, 1, 0, -1, 0, 0], [0, 0, 0, 0, 1, 1]],
+        lower=[200.0, 240.0, -np.inf],
+        upper=[np.inf, np.inf, 0.0],
+        y_ub=[buy, buy, np.inf, np.inf, 6000.0, np.inf],
+    )
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_l_shaped_matches_extensive_form(workers: int) -> None:
+    result = solve_l_shaped(FARMER, _farmer_scenario, 3, workers=workers)
+    x, objective = solve_extensive_form(
+        FARMER, [_farmer_scenario(i) for i in range(3)]
+    )
+
+    assert result.converged
+    assert objective == pytest.approx(-108390.0)
+    assert result.objective == pytest.approx(objective, rel=1e-6)
+    np.testing.assert_allclose(result.x, [170.0, 80.0, 250.0], atol=1e-4)
+    np.testing.assert_allclose(x, result.x, atol=1e-4)
+    assert result.lower_bound <= result.objective + 1e-6
+
+
+def test_l_shaped_feasibility_cuts() -> None:
+    # Without purchases every scenario must be self-sufficient.
+    result = solve_l_shaped(
+        FARMER, partial(_farmer_scenario, buy=0.0), 3, workers=1
+    )
+
+    assert result.converged
+    assert any(it.feasibility_cuts for it in result.iterations)
+    assert 2.0 * result.x[0] >= 200.0 - 1e-6
+    assert 2.4 * result.x[1] >= 240.0 - 1e-6
+
+
+def test_executor_diagnoses_infeasible_sparse_model() -> None:
+    code = """
+from src.optimization import SparseModel
+
+model = SparseModel("plan")
+x = model.add_variables("x", 3)
+model.add_constraints("budget", x.sum() <= 10)
+model.add_constraints("minimum", x >= [4, 4, 4])
+model.add_constraints("unrelated", x.dot([1, 0, 0]) <= 50)
+model.minimize(x.sum())
+"""
+    result = safe_execute_python_code(code)
+
+    assert result["error"] == "Solver status: infeasible"
+    diagnosis = result["diagnosis"]
+    assert diagnosis["irreducible"]
+    assert diagnosis["conflict"] == [
+        "budget",
+        "minimum[0]",
+        "minimum[1]",
+        "minimum[2]",
+    ]
+
+
+def test_diagnose_pyomo_model() -> None:
+    model = pyo.ConcreteModel()
+    model.x = pyo.Var([1, 2], domain=pyo.NonNegativeReals)
+    model.demand = pyo.Constraint(expr=model.x[1] + model.x[2] >= 5)
+    model.cap1 = pyo.Constraint(expr=model.x[1] <= 1)
+    model.cap2 = pyo.Constraint(expr=model.x[2] <= 2)
+    model.loose = pyo.Constraint(expr=model.x[1] <= 10)
+    model.product = pyo.Constraint(expr=model.x[1] * model.x[2] <= 4)
+    model.obj = pyo.Objective(expr=model.x[1])
+
+    diagnosis = diagnose(model, "infeasible")
+    assert diagnosis.conflict == ["demand", "cap1", "cap2"]
+    assert diagnosis.skipped == ["product"]
+
+    model.del_component(model.cap1)
+    model.del_component(model.cap2)
+    model.del_component(model.obj)
+    model.obj = pyo.Objective(expr=sum(model.x.values()), sense=pyo.maximize)
+    diagnosis = diagnose(model, "infeasible_or_unbounded")
+    assert diagnosis.status == "unbounded"
+    assert diagnosis.unbounded == ["x[2]"]
+
+
+def test_check_solution_reports_violations() -> None:
+    model = pyo.ConcreteModel()
+    model.x = pyo.Var([1, 2], domain=pyo.NonNegativeIntegers)
+    model.demand = pyo.Constraint(expr=model.x[1] + model.x[2] >= 5)
+    model.cap = pyo.Constraint(expr=model.x[1] <= 3)
+    model.product = pyo.Constraint(expr=model.x[1] * model.x[2] <= 6)
+    model.obj = pyo.Objective(expr=model.x[1] + 2 * model.x[2])
+    assert check_solution(model) is None
+
+    model.x[1], model.x[2] = 3, 2
+    report = check_solution(model)
+    assert report.feasible and report.n_checked == 5
+
+    model.x[1], model.x[2] = 4.5, 2
+    report = check_solution(model)
+    assert not report.feasible
+    assert report.max_violation == pytest.approx(3.0)
+    assert dict(report.violations) == {
+        "product": pytest.approx(3.0),
+        "cap": pytest.approx(1.5),
+        "integrality of x[1]": pytest.approx(0.5),
+    }
+
+
+def test_l_shaped_theta_lower_bounds_first_master() -> None:
+    result = solve_l_shaped(
+        FARMER, _farmer_scenario, 3, workers=1, theta_lower=-1e6
+    )
+
+    assert result.converged
+    assert result.objective == pytest.approx(-108390.0, rel=1e-6)
+    assert math.isfinite(result.iterations[0].lower_bound)
@@ -0,0 +1,671 @@
+import json
+import multiprocessing
+import subprocess
+import threading
+import time
+from contextlib import ExitStack
+
+import anyio
+import pytest
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.models.function import AgentInfo, FunctionModel
+
+from config import Settings
+from src.agents import ValidatorOutput
+from src.artifacts import ArtifactStore, problem_key
+from src.pipeline import (
+    CancelToken,
+    Candidate,
+    CandidatesRaced,
+    ClarificationNeeded,
+    CodeGenerated,
+    JobStore,
+    ModelRepair,
+    Pipeline,
+    RunCancelled,
+    Validated,
+    precomputed,
+)
+from src.pipeline.cancel import metrics as cancel_metrics
+from src.pipeline.cancel import track_model
+from src.pipeline.candidates import race, select
+from src.pipeline.coalesce import flights
+from src.pipeline.history import compact_history, history_size
+from src.pipeline.worker import run_job, work
+
+PROBLEM = {
+    "reformulated_problem": "Ship from 2 plants to 3 markets at least cost.",
+    "problem_type": "Linear Programming",
+    "assumptions": ["Costs are linear."],
+}
+
+TRANSPORT = """
+import numpy as np
+from src.optimization import SparseModel
+
+model = SparseModel("transport")
+x = model.add_variables("ship", (2, 3))
+model.add_constraints("capacity", x.sum(axis=1) <= [800, {capacity}])
+model.add_constraints("demand", x.sum(axis=0) >= [400, 500, 600])
+model.minimize(x.dot(np.array([[14, 10, 18], [12, 9, 11]])), "total_cost")
+"""
+
+
+def _output(info: AgentInfo, name: str, args: dict) -> ModelResponse:
+    tool = next(t for t in info.output_tools if name in t.name)
+    return ModelResponse(parts=[ToolCallPart(tool.name, args)])
+
+
+def _expert(asks: int, seen: list | None = None):
+    """Expert that asks for clarification on its first ``asks`` runs.
+
+    ``seen`` collects the messages of every request.
+    """
+    calls = 0
+
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        nonlocal calls
+        calls += 1
+        if seen is not None:
+            seen.append(messages)
+        if calls <= asks:
+            return _output(
+                info,
+                "ExpertInquiry",
+                {
+                    "explanation": "Capacities are missing.",
+                    "clarification_questions": ["What are the capacities?"],
+                },
+            )
+        return _output(info, "ExpertOutput", PROBLEM)
+
+    return FunctionModel(respond)
+
+
+def _integrator(codes: list[str]):
+    def respond(messages, info: AgentInfo) -> ModelResponse:
+        return _output(info, "IntegratorOutput", {"code": codes.pop(0)})
+
+    return FunctionModel(respond)
+
+
+def _validator(messages, info: AgentInfo) -> ModelResponse:
+    returns = [
+        part
+        for message in messages
+        for part in message.parts
+        if isinstance(part, ToolReturnPart)
+    ]
+    if not returns:
+        return ModelResponse(parts=[ToolCallPart("run_and_validate_code", {})])
+    result = returns[-1].content
+    return _output(
+        info,
+        "final_result",
+        {
+            "success": result["error"] is None,
+            "stdout": result["stdout"],
+            "error": result["error"],
+            "objective_name": result.get("objective_name"),
+            "objective_value": result.get("objective_value"),
+        },
+    )
+
+
+@pytest.fixture
+def pipeline(tmp_path) -> Pipeline:
+    settings = Settings(artifact_dir=str(tmp_path), reuse_artifacts=False)
+    return Pipeline(settings, store=ArtifactStore(str(tmp_path)))
+
+
+def _override(pipeline: Pipeline, codes: list[str], asks: int = 0):
+    stack = ExitStack()
+    stack.enter_context(pipeline.expert.override(model=_expert(asks)))
+    stack.enter_context(pipeline.integrator.override(model=_integrator(codes)))
+    stack.enter_context(
+        pipeline.validator.override(model=FunctionModel(_validator))
+    )
+    return stack
+
+
+async def _collect(pipeline: Pipeline, *args, **kwargs) -> list:
+    return [event async for event in pipeline.run(*args, **kwargs)]
+
+
+@pytest.mark.anyio
+async def test_pipeline_event_stream(pipeline: Pipeline) -> None:
+    with _override(pipeline, [TRANSPORT.format(capacity=700)]):
+        events = await _collect(pipeline, "Transport problem")
+
+    assert [e.kind for e in events] == [
+        "expert_started",
+        "expert_completed",
+        "code_generated",
+        "execution_progress",
+        "execution_progress",
+        "validated",
+    ]
+    validated = events[-1]
+    assert isinstance(validated, Validated)
+    assert validated.output.success
+    assert validated.output.objective_value == pytest.approx(17000.0)
+    assert validated.output.max_violation == pytest.approx(0.0, abs=1e-9)
+    assert "Objective Value: 17000" in validated.message
+    stored = pipeline.store.find(PROBLEM["reformulated_problem"], "code")
+    assert stored is not None
+
+
+def _inventing_validator(messages, info: AgentInfo) -> ModelResponse:
+    """Validator that makes up the checker's fields."""
+    response = _validator(messages, info)
+    for part in response.parts:
+        if part.tool_name == "final_result":
+            part.args |= {
+                "diagnosis": "made up",
+                "max_violation": 99.0,
+                "feasibility": "made up",
+            }
+    return response
+
+
+@pytest.mark.anyio
+async def test_checker_fields_never_come_from_the_validator(
+    pipeline: Pipeline,
+) -> None:
+    schema = ValidatorOutput.model_json_schema()["properties"]
+    assert not {"diagnosis", "max_violation", "feasibility"} & set(schema)
+
+    with (
+        _override(pipeline, ['print("no model")']),
+        pipeline.validator.override(model=FunctionModel(_inventing_validator)),
+    ):
+        events = await _collect(pipeline, "Print something")
+
+    output = events[-1].output
+    assert output.success
+    assert output.diagnosis is None
+    assert output.max_violation is None
+    assert output.feasibility is None
+
+
+@pytest.mark.anyio
+async def test_pipeline_clarification(pipeline: Pipeline) -> None:
+    code = TRANSPORT.format(capacity=700)
+    with _override(pipeline, [code], asks=1):
+        events = await _collect(pipeline, "Transport problem")
+    assert isinstance(events[-1], ClarificationNeeded)
+    assert events[-1].message == "What are the capacities?"
+
+    answers = []
+
+    async def clarify(questions: list[str]) -> str:
+        answers.append(questions)
+        return json.dumps([800, 700])
+
+    seen: list = []
+    with (
+        _override(pipeline, [code]),
+        pipeline.expert.override(model=_expert(1, seen)),
+    ):
+        events = await _collect(pipeline, "Transport problem", clarify=clarify)
+    assert answers == [["What are the capacities?"]]
+    assert isinstance(events[-1], Validated)
+    # The answer continues the Expert's history instead of a new prompt.
+    prompts = _user_prompts(seen[-1])
+    assert prompts == ["Transport problem", "[800, 700]"]
+
+
+@pytest.mark.anyio
+async def test_pipeline_continues_ended_clarification(
+    pipeline: Pipeline,
+) -> None:
+    with _override(pipeline, [], asks=1):
+        (*_, asked) = await _collect(pipeline, "Transport problem")
+    assert asked.history
+
+    seen: list = []
+    with (
+        _override(pipeline, [TRANSPORT.format(capacity=700)]),
+        pipeline.expert.override(model=_expert(0, seen)),
+    ):
+        events = await _collect(
+            pipeline, "800 and 700 units", history=asked.history
+        )
+    assert events[-1].output.success
+    assert _user_prompts(seen[0]) == ["Transport problem", "800 and 700 units"]
+
+
+def test_compact_history_condenses_old_rounds() -> None:
+    def round_(prompt: str, question: str) -> list:
+        return [
+            ModelRequest(parts=[UserPromptPart(prompt)]),
+            ModelResponse(
+                parts=[
+                    ToolCallPart(
+                        "final_result_ExpertInquiry",
+                        {
+                            "explanation": "Missing data. " * 10,
+                            "clarification_questions": [question],
+                        },
+                        tool_call_id=question,
+                    )
+                ]
+            ),
+            ModelRequest(
+                parts=[
+                    ToolReturnPart(
+                        "final_result_ExpertInquiry",
+                        "Final result processed.",
+                        tool_call_id=question,
+                    )
+                ]
+            ),
+        ]
+
+    history = (
+        round_("x" * 200, "Q1?") + round_("A1", "Q2?") + round_("A2", "Q3?")
+    )
+    assert compact_history(history, max_chars=10_000) is history
+
+    compacted = compact_history(history, max_chars=500)
+    assert len(compacted) == 4
+    summary = compacted[0].parts[0].content
+    assert "Expert asked: Q1?" in summary and "User: A1" in summary
+    assert "Q3?" not in summary
+    assert compacted[1:] == history[-3:]
+    assert history_size(compacted) < history_size(history)
+
+
+def _user_prompts(messages: list) -> list[str]:
+    return [
+        part.content
+        for message in messages
+        for part in message.parts
+        if isinstance(part, UserPromptPart)
+    ]
+
+
+@pytest.mark.anyio
+async def test_pipeline_caps_clarification_rounds(pipeline: Pipeline) -> None:
+    pipeline.settings.max_clarifications = 2
+    answers = []
+
+    async def clarify(questions: list[str]) -> str:
+        answers.append(questions)
+        return "I do not know."
+
+    with _override(pipeline, [], asks=10):
+        events = await _collect(pipeline, "Transport problem", clarify=clarify)
+
+    assert len(answers) == 2
+    assert [e.kind for e in events].count("clarification_needed") == 3
+    assert isinstance(events[-1], ClarificationNeeded)
+
+
+@pytest.mark.anyio
+async def test_pipeline_repairs_infeasible_model(pipeline: Pipeline) -> None:
+    codes = [TRANSPORT.format(capacity=70), TRANSPORT.format(capacity=700)]
+    with _override(pipeline, codes):
+        events = await _collect(pipeline, "Transport problem")
+
+    repair = next(e for e in events if isinstance(e, ModelRepair))
+    assert repair.status == "infeasible"
+    assert "capacity[1]" in repair.diagnosis
+    generated = [e for e in events if isinstance(e, CodeGenerated)]
+    assert [e.attempt for e in generated] == [1, 2]
+    assert events[-1].output.success
+    assert events[-1].output.diagnosis is None
+
+
+@pytest.mark.anyio
+async def test_pipeline_races_integrator_candidates(
+    pipeline: Pipeline,
+) -> None:
+    pipeline.settings.integrator_candidates = 3
+    codes = [
+        TRANSPORT.format(capacity=70),
+        "raise ValueError('broken')",
+        TRANSPORT.format(capacity=700),
+    ]
+    feasible = codes[2].strip()
+    with _override(pipeline, codes):
+        events = await _collect(pipeline, "Transport problem")
+
+    raced = next(e for e in events if isinstance(e, CandidatesRaced))
+    assert raced.report.launched == 3
+    assert raced.report.winner == 2
+    assert raced.report.tokens >= raced.report.winner_tokens > 0
+    generated = [e for e in events if isinstance(e, CodeGenerated)]
+    assert [e.code for e in generated] == [feasible]
+    assert "model_repair" not in [e.kind for e in events]
+    assert events[-1].output.success
+    assert events[-1].results["objective_sense"] == "min"
+
+
+def test_select_best_candidate_by_objective_sense() -> None:
+    def done(index: int, value: float, sense: str) -> Candidate:
+        results = {
+            "error": None,
+            "objective_value": value,
+            "objective_sense": sense,
+        }
+        return Candidate(index, results=results)
+
+    failed = Candidate(0, results={"error": "Solver status: infeasible"})
+    cheap, costly = done(1, 3.0, "min"), done(2, 5.0, "min")
+    assert select([failed, costly, cheap], "first") is costly
+    assert select([failed, costly, cheap], "best") is cheap
+    low, high = done(1, 3.0, "max"), done(2, 5.0, "max")
+    assert select([low, high], "best") is high
+    # Without a validated candidate, any code is kept for the Validator.
+    assert select([failed], "best") is failed
+    assert select([Candidate(3, error="quota exhausted")]) is None
+
+
+@pytest.mark.anyio
+async def test_race_cancels_candidates_after_deadline() -> None:
+    async def generate(index: int) -> Candidate:
+        if index == 1:
+            await anyio.sleep(60)
+        return Candidate(index, f"code {index}", tokens=10)
+
+    async def execute(code: str) -> dict:
+        return {"error": None, "objective_value": 1.0}
+
+    with anyio.fail_after(5):
+        winner, report = await race(generate, execute, 2, 0.2, "best")
+    assert winner.code == "code 0"
+    assert (report.finished, report.winner, report.extra_tokens) == (1, 0, 0)
+    assert report.mean_latency >= 0.1
+
+
+def _fake_ruff(fix: str | None = None):
+    """``subprocess.run`` stand-in for Ruff, appending ``fix`` if given."""
+
+    def run(args, **kwargs):
+        time.sleep(0.2)
+        if fix is not None:
+            with open(args[-1], "a", encoding="utf-8") as f:
+                f.write(fix)
+        return subprocess.CompletedProcess(args, 0, "All checks passed!", "")
+
+    return run
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("fix", [None, "\n# fixed\n"])
+async def test_pipeline_executes_while_linting(
+    pipeline: Pipeline, monkeypatch, fix: str | None
+) -> None:
+    import src.agents.integrator
+
+    executions = []
+    sandbox = pipeline._execute
+
+    async def execute(code, tables):
+        executions.append(code)
+        return await sandbox(code, tables)
+
+    monkeypatch.setattr(
+        src.agents.integrator.subprocess, "run", _fake_ruff(fix)
+    )
+    monkeypatch.setattr(pipeline, "_execute", execute)
+
+    def integrator(messages, info: AgentInfo) -> ModelResponse:
+        code = TRANSPORT.format(capacity=700)
+        return _output(info, "ruff_check", {"code": code})
+
+    with (
+        pipeline.expert.override(model=_expert(0)),
+        pipeline.integrator.override(model=FunctionModel(integrator)),
+        pipeline.validator.override(model=FunctionModel(_validator)),
+    ):
+        events = await _collect(pipeline, "Transport problem")
+
+    assert "lint_passed" in [e.kind for e in events]
+    assert events[-1].output.success
+    # Clean code ran once, during linting; fixed code runs again.
+    assert len(executions) == (1 if fix is None else 2)
+
+
+async def _hang(messages, info: AgentInfo) -> ModelResponse:
+    await anyio.sleep(60)
+    raise AssertionError("not cancelled")
+
+
+@pytest.mark.anyio
+async def test_example_prompts_are_served_from_precomputed_results(
+    pipeline: Pipeline, monkeypatch
+) -> None:
+    prompts = {"transport.txt": "Transport problem"}
+    with _override(pipeline, [TRANSPORT.format(capacity=700)]):
+        built = await precomputed.build(pipeline, prompts)
+    assert built["transport.txt"].startswith("built ")
+    assert await precomputed.build(pipeline, prompts) == {
+        "transport.txt": "fresh"
+    }
+
+    # Only the bundled examples are looked up.
+    with (
+        pipeline.expert.override(model=FunctionModel(_crash)),
+        pytest.raises(RuntimeError, match="model crashed"),
+    ):
+        await _collect(pipeline, "Transport problem")
+
+    pipeline.example_keys = {problem_key("Transport problem")}
+    with (
+        anyio.fail_after(5),
+        pipeline.expert.override(model=FunctionModel(_hang)),
+    ):
+        events = await _collect(pipeline, " Transport\nproblem")
+    validated = events[-1]
+    assert isinstance(validated, Validated)
+    assert validated.output.objective_value == pytest.approx(17000.0)
+    assert "precomputed result" in validated.notes[0]
+    assert isinstance(events[1], CodeGenerated)
+    assert events[1].reused_from == validated.run_id
+
+    # Changed instructions make the stored result stale.
+    monkeypatch.setattr(
+        precomputed, "instruction_hashes", lambda: {"expert.md": "new"}
+    )
+    assert precomputed.lookup(pipeline.store, "Transport problem") is None
+
+
+def _slow_expert(calls: list):
+    async def respond(messages, info: AgentInfo) -> ModelResponse:
+        calls.append(messages)
+        await anyio.sleep(0.3)
+        return _output(info, "ExpertOutput", PROBLEM)
+
+    return FunctionModel(respond)
+
+
+@pytest.mark.anyio
+async def test_identical_concurrent_runs_share_one_execution(
+    pipeline: Pipeline,
+) -> None:
+    calls = []
+    before = flights.snapshot()
+    token = CancelToken()
+    results = {}
+
+    async def client(name: str, prompt: str, cancel=None) -> None:
+        events = []
+        try:
+            async for event in pipeline.run(prompt, cancel=cancel):
+                events.append(event)
+                if name == "leaver":
+                    token.cancel("left")
+        except RunCancelled:
+            events.append("cancelled")
+        results[name] = events
+
+    codes = [TRANSPORT.format(capacity=700)]
+    with (
+        _override(pipeline, codes),
+        pipeline.expert.override(model=_slow_expert(calls)),
+    ):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(client, "first", "Transport  problem")
+            await anyio.sleep(0.05)
+            tg.start_soon(client, "second", "transport problem ")
+            tg.start_soon(client, "leaver", "Transport problem", token)
+
+    assert len(calls) == 1
+    assert results["first"] == results["second"]
+    assert isinstance(results["first"][-1], Validated)
+    assert results["leaver"][-1] == "cancelled"
+    after = flights.snapshot()
+    assert after["runs_started"] == before["runs_started"] + 1
+    assert after["requests_joined"] == before["requests_joined"] + 2
+    assert after["in_flight"] == 0
+
+
+@pytest.mark.anyio
+async def test_cancel_token_stops_pending_model_request(
+    pipeline: Pipeline,
+) -> None:
+    before = cancel_metrics.snapshot()
+    token = CancelToken()
+    threading.Timer(0.2, token.cancel, ["reset"]).start()
+
+    # ``override`` bypasses the model wrapped by the pipeline.
+    model = track_model(FunctionModel(_hang))
+    with (
+        anyio.fail_after(10),
+        pipeline.expert.override(model=model),
+        pytest.raises(RunCancelled, match="reset"),
+    ):
+        await _collect(pipeline, "Transport problem", cancel=token)
+
+    after = cancel_metrics.snapshot()
+    assert after["llm_requests_cancelled"] == (
+        before["llm_requests_cancelled"] + 1
+    )
+    assert after["stages_skipped"] == before["stages_skipped"] + 2
+    assert after["runs_cancelled"]["reset"] == (
+        before["runs_cancelled"].get("reset", 0) + 1
+    )
+
+
+@pytest.mark.anyio
+async def test_cancel_token_kills_sandbox(pipeline: Pipeline) -> None:
+    before = cancel_metrics.snapshot()["sandboxes_killed"]
+    token = CancelToken()
+
+    def cancel_once_executing() -> None:
+        while not multiprocessing.active_children():
+            time.sleep(0.01)
+        token.cancel("client disconnected")
+
+    threading.Thread(target=cancel_once_executing, daemon=True).start()
+    with (
+        anyio.fail_after(30),
+        _override(pipeline, ["import time\ntime.sleep(60)"]),
+        pytest.raises(RunCancelled),
+    ):
+        await _collect(pipeline, "Transport problem", cancel=token)
+
+    assert cancel_metrics.snapshot()["sandboxes_killed"] == before + 1
+    for _ in range(100):
+        if not multiprocessing.active_children():
+            break
+        time.sleep(0.05)
+    assert not multiprocessing.active_children()
+
+
+def _crash(messages, info: AgentInfo) -> ModelResponse:
+    raise RuntimeError("model crashed")
+
+
+@pytest.mark.anyio
+async def test_pipeline_resumes_from_checkpoints(pipeline: Pipeline) -> None:
+    checkpoints: dict = {}
+    with (
+        pipeline.expert.override(model=_expert(0)),
+        pipeline.integrator.override(
+            model=_integrator([TRANSPORT.format(capacity=700)])
+        ),
+        pipeline.validator.override(model=FunctionModel(_crash)),
+        pytest.raises(RuntimeError, match="model crashed"),
+    ):
+        await _collect(pipeline, "Transport problem", checkpoints=checkpoints)
+    assert {"run_id", "expert", "code"} <= set(checkpoints)
+
+    # Neither the Expert nor the Integrator may run again.
+    with (
+        pipeline.expert.override(model=FunctionModel(_crash)),
+        pipeline.integrator.override(model=FunctionModel(_crash)),
+        pipeline.validator.override(model=FunctionModel(_validator)),
+    ):
+        events = await _collect(
+            pipeline, "Transport problem", checkpoints=checkpoints
+        )
+    assert "expert_started" not in [e.kind for e in events]
+    code = next(e for e in events if isinstance(e, CodeGenerated))
+    assert code.resumed and code.reused_from is None
+    assert events[-1].output.success
+    assert events[-1].run_id == checkpoints["run_id"]
+    assert checkpoints["execution"]["results"]["status"] == "optimal"
+
+
+@pytest.mark.anyio
+async def test_job_store_workers_retry_and_resume(
+    pipeline: Pipeline, tmp_path
+) -> None:
+    store = JobStore(tmp_path / "jobs.sqlite", max_attempts=2)
+    job_id = store.submit("Transport problem")
+    codes = [TRANSPORT.format(capacity=700)]
+
+    with (
+        pipeline.expert.override(model=_expert(0)),
+        pipeline.integrator.override(model=_integrator(codes)),
+        pipeline.validator.override(model=FunctionModel(_crash)),
+    ):
+        assert await work(store, pipeline, "w1", drain=True) == 2
+    job = store.get(job_id)
+    assert job.status == "error" and job.attempts == 2
+    assert set(store.load_checkpoints(job_id)) >= {"expert", "code"}
+
+    store.retry(job_id)
+    with _override(pipeline, []):
+        assert await work(store, pipeline, "w2", drain=True) == 1
+    job = store.get(job_id)
+    assert job.status == "succeeded"
+    assert job.result["result"]["output"]["objective_value"] == 17000.0
+
+
+@pytest.mark.anyio
+async def test_job_store_cancels_running_job(
+    pipeline: Pipeline, tmp_path
+) -> None:
+    store = JobStore(tmp_path / "jobs.sqlite")
+    job_id = store.submit("Transport problem")
+    job = store.claim("w")
+    threading.Timer(0.2, store.cancel, [job_id]).start()
+
+    with (
+        anyio.fail_after(10),
+        pipeline.expert.override(model=FunctionModel(_hang)),
+    ):
+        status = await run_job(store, pipeline, job, "w", heartbeat=0.05)
+
+    assert status == "cancelled"
+    assert store.get(job_id).status == "cancelled"
+    assert not store.cancel(job_id)
+    assert not store.heartbeat(job_id, "w")
+
+
+def test_job_store_reclaims_expired_leases(tmp_path) -> None:
+    store = JobStore(tmp_path / "jobs.sqlite")
+    job_id = store.submit("p")
+    assert store.claim("a", lease=-1).id == job_id
+    assert store.claim("b").worker == "b"  # lease of "a" expired
+    assert store.claim("c") is None
@@ -0,0 +1,181 @@
+import anyio
+import google.genai.errors
+import pytest
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart
+from pydantic_ai.models.google import GoogleModel
+from pydantic_ai.usage import RequestUsage
+
+from src.agents.base import GeminiFallbackModel
+from src.agents.keys import ApiKey, KeyPool
+from src.agents.quota import (
+    MemoryBuckets,
+    QuotaScheduler,
+    QuotaWaitTooLong,
+    SqliteBuckets,
+    key_id,
+)
+
+
+def test_buckets_queue_requests_in_arrival_order(tmp_path) -> None:
+    for buckets in (MemoryBuckets(), SqliteBuckets(tmp_path / "q.sqlite")):
+        waits = [buckets.take("k/m/requests", 1, 2, 1.0) for _ in range(4)]
+        assert waits[:2] == [0.0, 0.0]
+        assert waits[2] == pytest.approx(1.0, abs=0.1)
+        assert waits[3] == pytest.approx(2.0, abs=0.1)
+
+        buckets.give("k/m/requests", 2, 2)
+        assert buckets.take("k/m/requests", 1, 2, 1.0) == pytest.approx(
+            1.0, abs=0.1
+        )
+
+
+def test_sqlite_buckets_are_shared_between_processes(tmp_path) -> None:
+    first = SqliteBuckets(tmp_path / "q.sqlite")
+    second = SqliteBuckets(tmp_path / "q.sqlite")
+
+    assert first.take("k/m/tokens", 100, 100, 10.0) == 0.0
+    assert second.take("k/m/tokens", 50, 100, 10.0) == pytest.approx(
+        5.0, abs=0.1
+    )
+
+
+@pytest.mark.anyio
+async def test_scheduler_returns_reservation_of_abandoned_waits() -> None:
+    scheduler = QuotaScheduler({"m": (1, 1000)}, max_wait=0.0)
+    await scheduler.acquire("m", "k", 10)
+
+    with pytest.raises(QuotaWaitTooLong):
+        await scheduler.acquire("m", "k", 10)
+    with anyio.move_on_after(0.05):
+        await scheduler.acquire("m", "k", 10, max_wait=float("inf"))
+    with pytest.raises(QuotaWaitTooLong) as raised:
+        await scheduler.acquire("m", "k", 10)
+
+    # Neither the refused nor the cancelled request kept its turn.
+    assert raised.value.wait == pytest.approx(60.0, abs=1.0)
+    assert scheduler.requests == 1
+    # Other keys and models have their own quota.
+    await scheduler.acquire("m", "other", 10)
+    await scheduler.acquire("n", "k", 10)
+
+
+def _fake_gemini(sent: list, exhausted: set, once: bool = False):
+    """Gemini that answers 429 for ``exhausted`` (model, key) pairs.
+
+    With ``once``, each pair recovers after its first 429.
+    """
+
+    async def request(self, messages, *args):
+        key = self.client._api_client.api_key
+        sent.append((self.model_name, key))
+        await anyio.sleep(0.01)
+        if (self.model_name, key) in exhausted:
+            if once:
+                exhausted.discard((self.model_name, key))
+            raise google.genai.errors.ClientError(
+                429, {"error": {"status": "RESOURCE_EXHAUSTED"}}
+            )
+        return ModelResponse(
+            [TextPart("ok")], usage=RequestUsage(input_tokens=5)
+        )
+
+    return request
+
+
+@pytest.mark.anyio
+async def test_fallback_model_skips_models_without_quota(monkeypatch) -> None:
+    sent = []
+    monkeypatch.setattr(
+        GoogleModel, "request", _fake_gemini(sent, {("a", "k")})
+    )
+    scheduler = QuotaScheduler(
+        {"a": (10, 1000), "b": (1, 1000), "c": (10, 1000)}, max_wait=1.0
+    )
+    pool = KeyPool([ApiKey.from_key("k")], scheduler)
+
+    messages = [ModelRequest.user_text_prompt("hello")]
+    await GeminiFallbackModel(["a", "b", "c"], pool).request(messages)
+    await GeminiFallbackModel(["a", "b", "c"], pool).request(messages)
+
+    # The 429 cooled the key down for "a", and "b" would have kept the
+    # second request waiting for a minute, so it went straight to "c".
+    assert sent == [("a", "k"), ("b", "k"), ("c", "k")]
+
+
+@pytest.mark.anyio
+async def test_key_pool_uses_every_key_before_downgrading(
+    monkeypatch,
+) -> None:
+    sent = []
+    monkeypatch.setattr(
+        GoogleModel, "request", _fake_gemini(sent, {("a", "k1")})
+    )
+    scheduler = QuotaScheduler({"a": (2, 1000), "b": (10, 1000)}, max_wait=0)
+    pool = KeyPool([ApiKey.from_key(k) for k in ("k1", "k2", "k3")], scheduler)
+
+    messages = [ModelRequest.user_text_prompt("hello")]
+    for _ in range(5):
+        await GeminiFallbackModel(["a", "b"], pool).request(messages)
+
+    # k1 answers 429 and cools down; k2 and k3 take turns on "a" until
+    # both used their two requests a minute, and only then is "b" used.
+    assert sent[0] == ("a", "k1")
+    assert sorted(sent[1:5]) == [
+        ("a", "k2"),
+        ("a", "k2"),
+        ("a", "k3"),
+        ("a", "k3"),
+    ]
+    assert sent[1] != sent[2]
+    assert sent[5][0] == "b"
+    counters = {c["key"]: c for c in pool.snapshot()}
+    assert counters[key_id("k1")]["rate_limited"] == 1
+    assert counters[key_id("k1")]["cooling_down"] == ["a"]
+    assert sum(c["requests"] for c in counters.values()) == 5
+    assert sum(c["tokens"] for c in counters.values()) == 25
+
+
+@pytest.mark.anyio
+async def test_fallback_model_returns_to_first_tier_after_cooldown(
+    monkeypatch,
+) -> None:
+    sent = []
+    monkeypatch.setattr(
+        GoogleModel, "request", _fake_gemini(sent, {("a", "k")}, once=True)
+    )
+    scheduler = QuotaScheduler({"a": (600, 10**6)}, max_wait=1.0)
+    pool = KeyPool([ApiKey.from_key("k")], scheduler, cooldown=0.1)
+    model = GeminiFallbackModel(["a", "b"], pool)
+
+    messages = [ModelRequest.user_text_prompt("hello")]
+    first = await model.request(messages)
+    await anyio.sleep(0.15)
+    second = await model.request(messages)
+
+    assert first.model_name == "b"
+    assert second.model_name == "a"
+    assert model.model_name == "a"
+
+
+@pytest.mark.anyio
+async def test_concurrent_exhausting_requests_fall_back_one_tier(
+    monkeypatch,
+) -> None:
+    sent = []
+    monkeypatch.setattr(
+        GoogleModel, "request", _fake_gemini(sent, {("a", "k")})
+    )
+    pool = KeyPool([ApiKey.from_key("k")], QuotaScheduler(max_wait=1.0))
+    model = GeminiFallbackModel(["a", "b", "c"], pool)
+    messages = [ModelRequest.user_text_prompt("hello")]
+    responses = []
+
+    async def ask() -> None:
+        responses.append(await model.request(messages))
+
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(ask)
+        tg.start_soon(ask)
+
+    assert [r.model_name for r in responses] == ["b", "b"]
+    assert ("c", "k") not in sent
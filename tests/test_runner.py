@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.pipeline import LoopRunner
+
+
+@pytest.fixture
+def runner():
+    runner = LoopRunner(max_concurrent=2)
+    yield runner
+    runner.close()
+
+
+def test_runner_serves_many_threads_on_one_loop(runner: LoopRunner) -> None:
+    active = peak = 0
+    loops = set()
+
+    async def job(i: int) -> int:
+        nonlocal active, peak
+        loops.add(asyncio.get_running_loop())
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return i
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda i=i: results.append(runner.run(job(i))))
+        for i in range(6)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == list(range(6))
+    assert peak == 2
+    assert len(loops) == 1
+
+
+def test_runner_works_inside_a_running_loop(runner: LoopRunner) -> None:
+    async def caller() -> int:
+        # A Streamlit script thread may already have a running loop.
+        return runner.run(asyncio.sleep(0, result=7))
+
+    assert asyncio.run(caller()) == 7
+
+
+def test_runner_timeout_and_stream(runner: LoopRunner) -> None:
+    with pytest.raises(TimeoutError):
+        runner.run(asyncio.sleep(1), timeout=0.05)
+
+    async def count(n: int):
+        for i in range(n):
+            await asyncio.sleep(0)
+            yield i
+
+    assert list(runner.stream(count(3))) == [0, 1, 2]
+
+    async def fail():
+        yield 1
+        raise ValueError("boom")
+
+    items = runner.stream(fail())
+    assert next(items) == 1
+    with pytest.raises(ValueError, match="boom"):
+        next(items)
@@ -0,0 +1,139 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart
+from pydantic_ai.models.function import FunctionModel
+
+from src.agents import ValidatorOutput
+from src.pipeline import (
+    ClarificationNeeded,
+    ExpertStarted,
+    RunCancelled,
+    StageLimits,
+    Validated,
+)
+
+pytest.importorskip("fastapi")
+from fastapi.testclient import TestClient  # noqa: E402
+
+import service  # noqa: E402
+
+OUTPUT = ValidatorOutput(success=True, objective_value=1.0)
+
+
+def _fake_run(gate: threading.Event):
+    async def run(job):
+        yield ExpertStarted(job.prompt)
+        while not gate.is_set():
+            await asyncio.sleep(0.01)
+        yield Validated(OUTPUT, {}, "run-1", [])
+
+    return run
+
+
+def test_service_queues_jobs_and_applies_backpressure(monkeypatch) -> None:
+    monkeypatch.setattr(service.settings, "service_workers", 1)
+    monkeypatch.setattr(service.settings, "service_queue_size", 1)
+    gate = threading.Event()
+
+    with TestClient(service.create_app(_fake_run(gate))) as client:
+        first = client.post("/jobs", json={"prompt": "a"}).json()
+        for _ in range(100):
+            if client.get("/health").json()["running"]:
+                break
+            time.sleep(0.01)
+        second = client.post("/jobs", json={"prompt": "b"})
+        full = client.post("/jobs", json={"prompt": "c"})
+
+        assert second.status_code == 202
+        assert full.status_code == 429
+        assert int(full.headers["Retry-After"]) >= 1
+        running = client.get(f"/jobs/{first['id']}").json()
+        assert running["status"] == "running"
+        assert running["events"][0]["kind"] == "expert_started"
+
+        gate.set()
+        for _ in range(200):
+            done = client.get(f"/jobs/{second.json()['id']}").json()
+            if done["status"] == "succeeded":
+                break
+            time.sleep(0.01)
+        assert done["result"]["output"]["objective_value"] == 1.0
+        assert client.get("/jobs/missing").status_code == 404
+
+
+@pytest.mark.anyio
+async def test_stage_limits_cap_model_requests() -> None:
+    active = peak = 0
+
+    async def respond(messages, info) -> ModelResponse:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return ModelResponse(parts=[TextPart("ok")])
+
+    limits = StageLimits(llm=2, sandbox=1)
+    agent = Agent(limits.limit_model(FunctionModel(respond)))
+    await asyncio.gather(*(agent.run("hi") for _ in range(6)))
+
+    assert peak == 2
+
+
+def _wait(client: TestClient, job_id: str, status: str) -> dict:
+    for _ in range(200):
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] == status:
+            break
+        time.sleep(0.01)
+    return job
+
+
+def test_service_answers_clarifications() -> None:
+    histories = []
+
+    async def run(job):
+        histories.append(job.history)
+        if not job.history:
+            yield ClarificationNeeded("Missing data.", ["Capacity?"], ["m"])
+        else:
+            yield Validated(OUTPUT, {}, "run-2", [])
+
+    with TestClient(service.create_app(run)) as client:
+        job_id = client.post("/jobs", json={"prompt": "a"}).json()["id"]
+        asked = _wait(client, job_id, "needs_clarification")
+        assert asked["clarification"]["questions"] == ["Capacity?"]
+
+        reply = client.post(f"/jobs/{job_id}/answer", json={"prompt": "9"})
+        assert reply.status_code == 202
+        _wait(client, reply.json()["id"], "succeeded")
+        assert histories == [[], ["m"]]
+
+        again = client.post(
+            f"/jobs/{reply.json()['id']}/answer", json={"prompt": "9"}
+        )
+        assert again.status_code == 409
+
+
+def test_service_cancels_jobs() -> None:
+    async def run(job):
+        yield ExpertStarted(job.prompt)
+        while not job.cancel_token.cancelled:
+            await asyncio.sleep(0.01)
+        raise RunCancelled(job.cancel_token.reason)
+
+    with TestClient(service.create_app(run)) as client:
+        job_id = client.post("/jobs", json={"prompt": "a"}).json()["id"]
+        _wait(client, job_id, "running")
+
+        assert client.delete(f"/jobs/{job_id}").status_code == 202
+        job = _wait(client, job_id, "cancelled")
+        assert job["error"] == "cancelled by client"
+        assert client.delete(f"/jobs/{job_id}").status_code == 409
+        assert client.delete("/jobs/unknown").status_code == 404
+        metrics = client.get("/metrics").json()
+        assert "runs_cancelled" in metrics["cancellation"]
@@ -0,0 +1,63 @@
+"""Submit pipeline jobs to the persistent queue and run workers on it.
+
+    python worker.py submit examples/pid_tuning.txt
+    python worker.py run --processes 4
+    python worker.py status <job id>
+    python worker.py cancel <job id>
+
+Jobs live in ``Settings.job_db``. Every finished stage is checkpointed,
+so a job whose worker died or failed resumes after its last completed
+stage when it is claimed again.
+"""
+
+import argparse
+import json
+
+import logfire
+
+from config import Settings
+from src.pipeline import JobStore
+from src.pipeline.worker import serve
+
+settings = Settings()
+logfire.configure(
+    token=settings.logfire_token or None, send_to_logfire="if-token-present"
+)
+logfire.instrument_pydantic_ai()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    submit = commands.add_parser("submit", help="queue a prompt file")
+    submit.add_argument("prompt_file")
+    submit.add_argument("--data", nargs="*", default=[])
+    run = commands.add_parser("run", help="run worker processes")
+    run.add_argument("--processes", type=int, default=1)
+    run.add_argument("--tasks", type=int, default=1, help="jobs per process")
+    status = commands.add_parser("status", help="show a job")
+    status.add_argument("job_id")
+    retry = commands.add_parser("retry", help="queue a finished job again")
+    retry.add_argument("job_id")
+    cancel = commands.add_parser("cancel", help="stop a queued/running job")
+    cancel.add_argument("job_id")
+    args = parser.parse_args()
+
+    store = JobStore(settings.job_db, settings.job_max_attempts)
+    if args.command == "submit":
+        with open(args.prompt_file, encoding="utf-8") as f:
+            print(store.submit(f.read(), args.data))
+    elif args.command == "run":
+        serve(settings, args.processes, args.tasks)
+    elif args.command == "status":
+        job = store.get(args.job_id)
+        if job is None:
+            parser.error(f"unknown job {args.job_id}")
+        print(json.dumps(job.__dict__, indent=2, default=str))
+    elif args.command == "retry":
+        store.retry(args.job_id)
+    elif args.command == "cancel":
+        if not store.cancel(args.job_id):
+            parser.error(f"job {args.job_id} is not queued or running")